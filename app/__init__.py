@@ -5,8 +5,12 @@ from flask_swagger_ui import get_swaggerui_blueprint
 from .models import db
 from .utils.logging import configure_logging
 from .routes.integration import integration_bp
+from .routes.integration_async import integration_async_bp
+from .routes.export import export_bp
+from .routes.webhooks import webhooks_bp
 from .routes.auth import auth_bp
 from .middleware.logging import LoggingMiddleware
+from .cli import process_jobs, sync_hubspot
 
 
 def create_app(config_class=None):
@@ -48,8 +52,15 @@ def create_app(config_class=None):
     # Register blueprints
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(integration_bp, url_prefix='/api')
+    app.register_blueprint(integration_async_bp, url_prefix='/api/async')
+    app.register_blueprint(export_bp, url_prefix='/api/export')
+    app.register_blueprint(webhooks_bp, url_prefix='/api/webhooks')
     app.register_blueprint(swagger_ui_blueprint, url_prefix=SWAGGER_URL)
 
+    # Register CLI commands
+    app.cli.add_command(sync_hubspot)
+    app.cli.add_command(process_jobs)
+
     @app.route("/health")
     def health_check():
         return {"status": "healthy"}, 200
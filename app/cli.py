@@ -0,0 +1,37 @@
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from app.config import Config
+from app.services.jobs import JobWorkers, drain_jobs
+from app.services.mirror import MIRRORS, MirrorSync
+
+
+@click.command("sync-hubspot")
+@click.option("--object-type", "-o", "object_types", multiple=True,
+              type=click.Choice(list(MIRRORS)), help="Object type to sync (default: all)")
+@click.option("--full", is_flag=True, help="Run the backfill again from the start")
+@with_appcontext
+def sync_hubspot(object_types, full):
+    """Pull HubSpot contacts, deals and tickets into the local mirror tables."""
+    synced = MirrorSync().sync(object_types or None, full=full)
+
+    for object_type, count in synced.items():
+        click.echo(f"{object_type}: {count} objects synced")
+
+
+@click.command("process-jobs")
+@click.option("--workers", "-w", default=Config.HUBSPOT_JOB_WORKERS or 2, show_default=True,
+              help="Worker threads")
+@click.option("--once", is_flag=True, help="Exit once no job is runnable")
+@with_appcontext
+def process_jobs(workers, once):
+    """Write queued create requests (202 Accepted jobs) to HubSpot."""
+    if once:
+        click.echo(f"{drain_jobs()} jobs processed")
+        return
+
+    pool = JobWorkers(current_app._get_current_object(), workers, Config.HUBSPOT_JOB_POLL_INTERVAL)
+    try:
+        pool.start().join()
+    except KeyboardInterrupt:
+        pool.stop()
@@ -25,6 +25,112 @@ class Config:
     HUBSPOT_CLIENT_SECRET = os.getenv('HUBSPOT_CLIENT_SECRET')
     HUBSPOT_REFRESH_TOKEN = os.getenv('HUBSPOT_REFRESH_TOKEN')
 
+    # Refresh the access token this many seconds before it expires
+    HUBSPOT_TOKEN_REFRESH_MARGIN = int(os.getenv('HUBSPOT_TOKEN_REFRESH_MARGIN', 300))
+
+    # Build HubSpot services in gunicorn's post_fork hook instead of on first use
+    HUBSPOT_WARM_ON_FORK = os.getenv('HUBSPOT_WARM_ON_FORK', 'false').lower() == 'true'
+
+    # HubSpot HTTP transport (shared connection pool per worker)
+    HUBSPOT_POOL_CONNECTIONS = int(os.getenv('HUBSPOT_POOL_CONNECTIONS', 10))
+    HUBSPOT_POOL_MAXSIZE = int(os.getenv('HUBSPOT_POOL_MAXSIZE', 20))
+    HUBSPOT_POOL_BLOCK = os.getenv('HUBSPOT_POOL_BLOCK', 'false').lower() == 'true'
+    HUBSPOT_TCP_KEEPALIVE = os.getenv('HUBSPOT_TCP_KEEPALIVE', 'true').lower() == 'true'
+    HUBSPOT_TCP_KEEPIDLE = int(os.getenv('HUBSPOT_TCP_KEEPIDLE', 60))
+    HUBSPOT_CONNECT_TIMEOUT = float(os.getenv('HUBSPOT_CONNECT_TIMEOUT', 5))
+    HUBSPOT_READ_TIMEOUT = float(os.getenv('HUBSPOT_READ_TIMEOUT', 30))
+
+    # HubSpot rate limits; the 10-second window is updated from response headers
+    HUBSPOT_RATE_LIMIT_MAX = int(os.getenv('HUBSPOT_RATE_LIMIT_MAX', 100))
+    HUBSPOT_RATE_LIMIT_INTERVAL = float(os.getenv('HUBSPOT_RATE_LIMIT_INTERVAL', 10))
+    HUBSPOT_SEARCH_RATE_LIMIT_MAX = int(os.getenv('HUBSPOT_SEARCH_RATE_LIMIT_MAX', 5))
+    HUBSPOT_SEARCH_RATE_LIMIT_INTERVAL = float(os.getenv('HUBSPOT_SEARCH_RATE_LIMIT_INTERVAL', 1))
+    HUBSPOT_RATE_LIMIT_BURST = float(os.getenv('HUBSPOT_RATE_LIMIT_BURST', 0.2))
+    # The daily limit resets at midnight in the HubSpot account's timezone
+    HUBSPOT_TIMEZONE = os.getenv('HUBSPOT_TIMEZONE', 'UTC')
+
+    # Retries for 429s, 5xx and connection errors, and per-endpoint circuit breakers
+    HUBSPOT_RETRY_MAX_ATTEMPTS = int(os.getenv('HUBSPOT_RETRY_MAX_ATTEMPTS', 4))
+    HUBSPOT_RETRY_BASE_DELAY = float(os.getenv('HUBSPOT_RETRY_BASE_DELAY', 0.25))
+    HUBSPOT_RETRY_MAX_DELAY = float(os.getenv('HUBSPOT_RETRY_MAX_DELAY', 5))
+    HUBSPOT_RETRY_DEADLINE = float(os.getenv('HUBSPOT_RETRY_DEADLINE', 20))
+    HUBSPOT_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('HUBSPOT_CIRCUIT_FAILURE_THRESHOLD', 5))
+    HUBSPOT_CIRCUIT_RESET_TIMEOUT = float(os.getenv('HUBSPOT_CIRCUIT_RESET_TIMEOUT', 30))
+
+    # Concurrent HubSpot calls within one request (e.g. /api/new_crm_objects)
+    HUBSPOT_FANOUT_WORKERS = int(os.getenv('HUBSPOT_FANOUT_WORKERS', 8))
+    HUBSPOT_FANOUT_TIMEOUT = float(os.getenv('HUBSPOT_FANOUT_TIMEOUT', 10))
+
+    # Connection limit for the asyncio HubSpot client used by /api/async
+    HUBSPOT_ASYNC_MAX_CONNECTIONS = int(os.getenv('HUBSPOT_ASYNC_MAX_CONNECTIONS', 100))
+
+    # Streaming exports (/api/export/<object_type>); HubSpot pages hold at most 100 objects
+    HUBSPOT_EXPORT_PAGE_SIZE = int(os.getenv('HUBSPOT_EXPORT_PAGE_SIZE', 100))
+    HUBSPOT_EXPORT_PREFETCH = int(os.getenv('HUBSPOT_EXPORT_PREFETCH', 1))
+
+    # Largest body accepted by the batch endpoints; HubSpot is called 100 items at a time
+    HUBSPOT_BATCH_MAX_ITEMS = int(os.getenv('HUBSPOT_BATCH_MAX_ITEMS', 10000))
+
+    # Largest request body accepted, in bytes (Flask's own setting; 413 above it)
+    MAX_CONTENT_LENGTH = int(os.getenv('MAX_CONTENT_LENGTH', 16 * 1024 * 1024))
+
+    # Batch bodies of at least this many bytes, or of unknown length, are parsed as they
+    # are read and validated and sent to HubSpot WINDOW inputs at a time
+    HUBSPOT_STREAM_MIN_BYTES = int(os.getenv('HUBSPOT_STREAM_MIN_BYTES', 1024 * 1024))
+    HUBSPOT_STREAM_WINDOW = int(os.getenv('HUBSPOT_STREAM_WINDOW', 1000))
+
+    # In-process cache of object IDs by lookup key (e.g. contact email)
+    HUBSPOT_ID_CACHE_SIZE = int(os.getenv('HUBSPOT_ID_CACHE_SIZE', 10000))
+    HUBSPOT_ID_CACHE_TTL = float(os.getenv('HUBSPOT_ID_CACHE_TTL', 3600))
+
+    # "local" keeps caches per worker; "database" backs them with a table shared by all
+    # workers (UNLOGGED on Postgres), read through a short-lived local tier
+    HUBSPOT_CACHE_BACKEND = os.getenv('HUBSPOT_CACHE_BACKEND', 'local')
+    HUBSPOT_CACHE_DATABASE_URL = os.getenv('HUBSPOT_CACHE_DATABASE_URL')
+    HUBSPOT_CACHE_LOCAL_TTL = float(os.getenv('HUBSPOT_CACHE_LOCAL_TTL', 60))
+
+    # Deal-name index: scope names per pipeline, warm it from a full scan in each worker,
+    # or skip it and upsert on a unique deal property (e.g. a custom "deal_key")
+    HUBSPOT_DEAL_INDEX_BY_PIPELINE = os.getenv('HUBSPOT_DEAL_INDEX_BY_PIPELINE', 'false').lower() == 'true'
+    HUBSPOT_DEAL_INDEX_WARM = os.getenv('HUBSPOT_DEAL_INDEX_WARM', 'false').lower() == 'true'
+    HUBSPOT_DEAL_UNIQUE_PROPERTY = os.getenv('HUBSPOT_DEAL_UNIQUE_PROPERTY')
+
+    # Concurrent create-or-updates for one email or deal name share a single HubSpot
+    # operation per worker; the advisory lock (Postgres) serializes them across workers
+    HUBSPOT_UPSERT_ADVISORY_LOCK = os.getenv('HUBSPOT_UPSERT_ADVISORY_LOCK', 'false').lower() == 'true'
+
+    # Contact lookups by email from concurrent requests are collected for this many seconds
+    # and sent as one IN-filter search
+    HUBSPOT_RESOLVE_WINDOW = float(os.getenv('HUBSPOT_RESOLVE_WINDOW', 0.01))
+
+    # Skip contact and deal updates whose properties match the last write (or send only
+    # the changed ones); fingerprints expire so edits made in HubSpot are not masked for long
+    HUBSPOT_SKIP_UNCHANGED = os.getenv('HUBSPOT_SKIP_UNCHANGED', 'true').lower() == 'true'
+    HUBSPOT_FINGERPRINT_TTL = float(os.getenv('HUBSPOT_FINGERPRINT_TTL', 3600))
+
+    # /api/new_crm_objects responses: fresh for FRESH seconds, then served stale while one
+    # background refresh runs; the last good response outlives HubSpot errors for STALE_IF_ERROR
+    HUBSPOT_RESPONSE_CACHE_SIZE = int(os.getenv('HUBSPOT_RESPONSE_CACHE_SIZE', 256))
+    HUBSPOT_RESPONSE_CACHE_FRESH = float(os.getenv('HUBSPOT_RESPONSE_CACHE_FRESH', 5))
+    HUBSPOT_RESPONSE_CACHE_STALE = float(os.getenv('HUBSPOT_RESPONSE_CACHE_STALE', 60))
+    HUBSPOT_RESPONSE_CACHE_STALE_IF_ERROR = float(os.getenv('HUBSPOT_RESPONSE_CACHE_STALE_IF_ERROR', 86400))
+
+    # Create requests sent with "Prefer: respond-async" are stored as jobs and written to
+    # HubSpot by worker threads in each web worker (0 leaves them to `flask process-jobs`)
+    HUBSPOT_JOB_WORKERS = int(os.getenv('HUBSPOT_JOB_WORKERS', 2))
+    HUBSPOT_JOB_POLL_INTERVAL = float(os.getenv('HUBSPOT_JOB_POLL_INTERVAL', 1))
+    HUBSPOT_JOB_MAX_ATTEMPTS = int(os.getenv('HUBSPOT_JOB_MAX_ATTEMPTS', 5))
+    HUBSPOT_JOB_RETRY_DELAY = float(os.getenv('HUBSPOT_JOB_RETRY_DELAY', 10))
+    HUBSPOT_JOB_LEASE = int(os.getenv('HUBSPOT_JOB_LEASE', 300))
+
+    # HubSpot webhooks (/api/webhooks/hubspot): events are queued and applied to the local
+    # mirror in the background; set the URL when a proxy changes the one Flask sees
+    HUBSPOT_WEBHOOK_URL = os.getenv('HUBSPOT_WEBHOOK_URL')
+    HUBSPOT_WEBHOOK_MAX_AGE = int(os.getenv('HUBSPOT_WEBHOOK_MAX_AGE', 300))
+    HUBSPOT_WEBHOOK_QUEUE_SIZE = int(os.getenv('HUBSPOT_WEBHOOK_QUEUE_SIZE', 10000))
+    HUBSPOT_WEBHOOK_BATCH_SIZE = int(os.getenv('HUBSPOT_WEBHOOK_BATCH_SIZE', 100))
+    HUBSPOT_WEBHOOK_DEDUPE_TTL = float(os.getenv('HUBSPOT_WEBHOOK_DEDUPE_TTL', 86400))
+
     # Remove any proxy settings that might be causing issues
     HTTP_PROXY = None
     HTTPS_PROXY = None
@@ -17,3 +17,112 @@ class User(db.Model):
         
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
+
+
+class HubSpotObjectMixin:
+    """Columns shared by the local mirrors of HubSpot CRM objects."""
+
+    # HubSpot object ID
+    id = db.Column(db.String(32), primary_key=True)
+    properties = db.Column(db.JSON, nullable=False, default=dict)
+    created_at = db.Column(db.DateTime, index=True)
+    updated_at = db.Column(db.DateTime, index=True)
+    synced_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        # Same shape as the HubSpot SDK's object.to_dict()
+        return {
+            "id": self.id,
+            "properties": self.properties,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "archived": False,
+        }
+
+
+class HubSpotContact(HubSpotObjectMixin, db.Model):
+    __tablename__ = 'hubspot_contacts'
+
+    email = db.Column(db.String(255), index=True)
+    firstname = db.Column(db.String(255))
+    lastname = db.Column(db.String(255))
+    phone = db.Column(db.String(64))
+
+
+class HubSpotDeal(HubSpotObjectMixin, db.Model):
+    __tablename__ = 'hubspot_deals'
+
+    dealname = db.Column(db.String(255), index=True)
+    amount = db.Column(db.Numeric(18, 2))
+    dealstage = db.Column(db.String(100))
+    pipeline = db.Column(db.String(100))
+
+
+class HubSpotTicket(HubSpotObjectMixin, db.Model):
+    __tablename__ = 'hubspot_tickets'
+
+    subject = db.Column(db.String(500))
+    hs_pipeline = db.Column(db.String(100))
+    hs_pipeline_stage = db.Column(db.String(100))
+    hs_ticket_priority = db.Column(db.String(50))
+
+
+class HubSpotAssociation(db.Model):
+    __tablename__ = 'hubspot_associations'
+
+    from_type = db.Column(db.String(20), primary_key=True)
+    from_id = db.Column(db.String(32), primary_key=True)
+    to_type = db.Column(db.String(20), primary_key=True)
+    to_id = db.Column(db.String(32), primary_key=True)
+
+    __table_args__ = (
+        db.Index('ix_hubspot_associations_to', 'to_type', 'to_id'),
+    )
+
+
+class SyncCheckpoint(db.Model):
+    __tablename__ = 'hubspot_sync_checkpoints'
+
+    object_type = db.Column(db.String(20), primary_key=True)
+    # Highest last-modified timestamp pulled so far; incremental syncs start here
+    last_modified = db.Column(db.DateTime)
+    # Paging cursor of an unfinished backfill, so it can resume
+    backfill_after = db.Column(db.String(64))
+    backfilled_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class Job(db.Model):
+    """A create request accepted with 202 and written to HubSpot by a job worker."""
+    __tablename__ = 'hubspot_jobs'
+
+    id = db.Column(db.String(36), primary_key=True)
+    # "contact", "deal" or "ticket"
+    kind = db.Column(db.String(20), nullable=False)
+    payload = db.Column(db.JSON, nullable=False)
+    # queued -> running -> succeeded | failed; transient failures go back to queued
+    status = db.Column(db.String(20), nullable=False, default='queued')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    result = db.Column(db.JSON)
+    error = db.Column(db.Text)
+    # Earliest time a queued job may run, pushed back after a transient failure
+    run_after = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_at = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_hubspot_jobs_status_run_after', 'status', 'run_after'),
+    )
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "attempts": self.attempts,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+        }
@@ -1,4 +1,4 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, g, jsonify
 from flask_jwt_extended import create_access_token
 import logging
 from ..repository.user_repository import UserRepository
@@ -12,7 +12,7 @@ logger = logging.getLogger(__name__)
 @auth_bp.route('/register', methods=['POST'])
 @validate_request(UserValidator.validate_user_registration)
 def register():
-    data = request.get_json()
+    data = g.payload
     user_repo = UserRepository()
     
     try: 
@@ -36,7 +36,7 @@ def register():
 @auth_bp.route('/login', methods=['POST'])
 @validate_request(UserValidator.validate_login)
 def login():
-    data = request.get_json()
+    data = g.payload
     user_repo = UserRepository()
     
     try:
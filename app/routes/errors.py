@@ -0,0 +1,57 @@
+from flask import jsonify
+import logging
+from hubspot.crm.contacts import ApiException as ContactApiException
+from hubspot.crm.deals import ApiException as DealApiException
+from hubspot.crm.tickets import ApiException as TicketApiException
+from app.services.async_client import HubSpotApiError
+from app.services.rate_limit import RateLimitExceeded
+from app.services.resilience import HubSpotUnavailableError, CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+
+def handle_rate_limit_exceeded(e):
+    logger.error(f"HubSpot rate limit exhausted: {e}")
+    return jsonify({"Error": str(e)}), 429
+
+
+def handle_hubspot_unavailable(e):
+    logger.error(f"HubSpot unavailable: {e}")
+    headers = {}
+    if isinstance(e, CircuitOpenError):
+        headers["Retry-After"] = str(int(e.retry_after))
+    return jsonify({"Error": str(e)}), 503, headers
+
+
+def handle_hubspot_api_error(e):
+    logger.error(f"HubSpot request failed. Status code: {e.status}, Response: {e.body}")
+
+    # HubSpot 4xx means the payload was rejected; anything else is an upstream failure
+    status_code = 400 if e.status and 400 <= e.status < 500 else 502
+    return jsonify({
+        "Error": "HubSpot request failed",
+        "status_code": e.status,
+        "response": e.body
+    }), status_code
+
+
+def page_parameter_error(args):
+    """400 for the removed `page` parameter of /new_crm_objects; None if it is absent."""
+    if 'page' not in args:
+        return None
+
+    # `page` used to be silently ignored, which returned the first page again
+    return jsonify({
+        "Error": "The 'page' parameter is no longer supported",
+        "details": "Page with the contacts_after, deals_after and tickets_after cursors "
+                   "returned in the response's 'paging' object"
+    }), 400
+
+
+def register_hubspot_error_handlers(blueprint):
+    """Map HubSpot failures raised by a blueprint's views to JSON responses."""
+    blueprint.register_error_handler(RateLimitExceeded, handle_rate_limit_exceeded)
+    blueprint.register_error_handler(HubSpotUnavailableError, handle_hubspot_unavailable)
+
+    for exception in (ContactApiException, DealApiException, TicketApiException, HubSpotApiError):
+        blueprint.register_error_handler(exception, handle_hubspot_api_error)
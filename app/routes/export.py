@@ -0,0 +1,87 @@
+from flask import Blueprint, Response, request, jsonify
+import logging
+from app.services.registry import services
+from app.config import Config
+from ..middleware.auth import auth_middleware
+from ..utils.streaming import ndjson_line, gzip_chunks
+from .errors import register_hubspot_error_handlers
+
+# Initialize blueprint for export routes
+export_bp = Blueprint('export_bp', __name__)
+logger = logging.getLogger(__name__)
+register_hubspot_error_handlers(export_bp)
+
+EXPORT_ITERATORS = {
+    "contacts": "iter_contacts",
+    "deals": "iter_deals",
+    "tickets": "iter_tickets",
+}
+
+
+def _project(obj, properties):
+    """Keep only the requested properties of an exported object."""
+    if not properties:
+        return obj
+
+    projected = dict(obj)
+    projected["properties"] = {
+        name: value for name, value in (obj.get("properties") or {}).items() if name in properties
+    }
+    return projected
+
+
+def _export_lines(object_type, first_page, pages, properties):
+    """NDJSON for every object, with a paging line after each page so exports can resume."""
+    page = first_page
+    exported = 0
+
+    try:
+        while page is not None:
+            results, next_after = page
+            chunk = b"".join(ndjson_line(_project(obj, properties)) for obj in results)
+            if next_after:
+                chunk += ndjson_line({"paging": {"next": {"after": next_after}}})
+
+            exported += len(results)
+            yield chunk
+            page = next(pages, None)
+    except Exception as e:
+        # Headers are already sent, so the failure is reported in-band
+        logger.error(f"Export of {object_type} failed after {exported} objects: {e}")
+        yield ndjson_line({"error": str(e)})
+    else:
+        logger.info(f"Exported {exported} {object_type}")
+    finally:
+        pages.close()
+
+
+@export_bp.route('/<object_type>', methods=['GET'])
+# @auth_middleware()
+def export_objects(object_type):
+    if object_type not in EXPORT_ITERATORS:
+        return jsonify({"Error": f"Unknown object type: {object_type}"}), 404
+
+    try:
+        page_size = min(int(request.args.get('page_size', Config.HUBSPOT_EXPORT_PAGE_SIZE)), 100)
+    except ValueError:
+        return jsonify({"Error": "page_size must be an integer"}), 400
+
+    properties = [name for name in request.args.get('properties', '').split(',') if name]
+    service = services.get(object_type)
+    pages = getattr(service, EXPORT_ITERATORS[object_type])(
+        page_size=page_size,
+        after=request.args.get('after'),
+        properties=properties or None,
+        prefetch=Config.HUBSPOT_EXPORT_PREFETCH
+    )
+
+    # Fetch the first page up front so HubSpot errors still map to a proper status code
+    first_page = next(pages, None)
+
+    body = _export_lines(object_type, first_page, pages, set(properties))
+    headers = {"Vary": "Accept-Encoding", "X-Accel-Buffering": "no"}
+    if request.accept_encodings["gzip"]:
+        body = gzip_chunks(body)
+        headers["Content-Encoding"] = "gzip"
+
+    return Response(body, mimetype="application/x-ndjson", headers=headers)
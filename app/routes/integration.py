@@ -1,85 +1,285 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, g, request, jsonify, url_for
+from werkzeug.exceptions import RequestEntityTooLarge
 import logging
-from app.services.contact_service import ContactService
-from app.services.deal_service import DealService
-from app.services.support_ticket_service import SupportTicketService
+from app.services.registry import get_contact_service, get_deal_service, get_ticket_service
+from app.models import db, Job
+from app.services.cache import cache_stats
+from app.services.fingerprints import fingerprint_stats
+from app.services.jobs import enqueue_job, get_workers
+from app.services.mirror import recent_objects
+from app.services.rate_limit import get_governor
+from app.services.resilience import breaker_states
+from app.services.webhooks import webhook_stats
+from app.config import Config
 from ..middleware.auth import auth_middleware
+from ..utils.cache import ResponseCache
+from ..utils.concurrency import fan_out
+from ..utils.streaming import JSONStreamError
 from ..validations.contact_validator import ContactValidator
 from ..validations.deal_validator import DealValidator
 from ..validations.support_ticket_validator import SupportTicketValidator
 from ..validations.base import validate_request
+from .errors import page_parameter_error, register_hubspot_error_handlers
 
 # Initialize blueprint for Integration routes
 integration_bp = Blueprint('integration_bp', __name__)
 logger = logging.getLogger(__name__)
+register_hubspot_error_handlers(integration_bp)
 
-# Instantiate services 
-contact_service = ContactService() 
-deal_service = DealService()
-ticket_service = SupportTicketService()
+# Serialized /new_crm_objects responses, polled by dashboards
+new_objects_cache = ResponseCache(
+    maxsize=Config.HUBSPOT_RESPONSE_CACHE_SIZE,
+    fresh_for=Config.HUBSPOT_RESPONSE_CACHE_FRESH,
+    stale_for=Config.HUBSPOT_RESPONSE_CACHE_STALE,
+    stale_if_error=Config.HUBSPOT_RESPONSE_CACHE_STALE_IF_ERROR
+)
+
+
+def _wants_async():
+    # RFC 7240: "Prefer: respond-async" opts into 202 Accepted and a job to poll
+    return "respond-async" in request.headers.get("Prefer", "")
+
+
+def _accept_job(kind, data):
+    """Queue a validated create request and answer 202 with the job to poll."""
+    job = enqueue_job(kind, data)
+    if Config.HUBSPOT_JOB_WORKERS > 0:
+        get_workers(current_app._get_current_object()).wake()
+
+    return jsonify(job.to_dict()), 202, {
+        "Location": url_for('integration_bp.get_job', job_id=job.id),
+        "Preference-Applied": "respond-async",
+    }
 
 
 @integration_bp.route('/create_contact', methods=['POST'])
 # @auth_middleware()
 @validate_request(ContactValidator.validate_registration)
 def create_or_update_contact():
-    data = request.get_json()
+    data = g.payload
+    if _wants_async():
+        return _accept_job("contact", data)
 
     try:
-        contact = contact_service.create_or_update_contact(data)
+        contact = get_contact_service().create_or_update_contact(data)
         return jsonify(contact), 200
     except ValueError as e:
         logger.error(f"Error processing contact: {e}")
         return jsonify({"Error": str(e)}), 400
 
 
+def _batch_windows(inputs):
+    """A parsed body is one window; a streamed one is read and sent WINDOW inputs at a time."""
+    if isinstance(inputs, list):
+        yield inputs
+        return
+
+    window = []
+    for item in inputs:
+        window.append(item)
+        if len(window) >= Config.HUBSPOT_STREAM_WINDOW:
+            yield window
+            window = []
+    if window:
+        yield window
+
+
+def _batch_results(window, start, schema, process):
+    """Validate one window in bulk, process its valid inputs and return a result per input."""
+    # Streamed bodies are only counted as they arrive; inputs past the limit are not sent
+    accepted = max(0, min(len(window), Config.HUBSPOT_BATCH_MAX_ITEMS - start))
+    valid, invalid = schema.validate_many(window[:accepted])
+    processed = process([window[index] for index in valid]) if valid else []
+
+    results = [None] * len(window)
+    for index, result in zip(valid, processed):
+        results[index] = {"index": start + index, **result}
+    for index, errors in invalid.items():
+        results[index] = {"index": start + index, "status": "invalid", "errors": errors}
+    for index in range(accepted, len(window)):
+        results[index] = {"index": start + index, "status": "invalid", "errors": {
+            "inputs": f"inputs must contain no more than {Config.HUBSPOT_BATCH_MAX_ITEMS} items"}}
+    return results
+
+
+def _batch_response(inputs, schema, process):
+    """Validate batch inputs in bulk, process the valid ones and report every input in order."""
+    # Invalid inputs are reported per item and never sent to HubSpot
+    results = []
+    failure = None
+    try:
+        for window in _batch_windows(inputs):
+            results += _batch_results(window, len(results), schema, process)
+    except JSONStreamError as e:
+        logger.warning(f"Batch body is invalid after {len(results)} inputs: {e}")
+        failure = {"error": "Invalid request", "details": str(e)}, 400
+    except RequestEntityTooLarge:
+        logger.warning(f"Batch body is too large after {len(results)} inputs")
+        failure = {"error": "Payload too large", "details": (
+            f"Request body must be no more than {current_app.config['MAX_CONTENT_LENGTH']} bytes")}, 413
+
+    if not results and failure is None:
+        return jsonify({
+            'error': 'Validation error',
+            'details': {'inputs': "inputs must be a non-empty list"}
+        }), 422
+
+    summary = {status: 0 for status in ("created", "updated", "invalid", "error")}
+    for result in results:
+        summary[result["status"]] += 1
+
+    # A streamed body that breaks off reports the inputs already processed with the error
+    if failure is not None:
+        body, status_code = failure
+        return jsonify({**body, "summary": summary, "results": results}), status_code
+
+    # 207 when only some inputs went through
+    status_code = 207 if summary["invalid"] or summary["error"] else 200
+    return jsonify({"summary": summary, "results": results}), status_code
+
+
+@integration_bp.route('/contacts/batch', methods=['POST'])
+# @auth_middleware()
+@validate_request(ContactValidator.validate_batch, stream='inputs')
+def batch_upsert_contacts():
+    inputs = g.payload['inputs']
+    return _batch_response(
+        inputs, ContactValidator.batch_item_schema, get_contact_service().batch_upsert_contacts)
+
+
 @integration_bp.route('/create_deal', methods=['POST'])
 # @auth_middleware()
 @validate_request(DealValidator.validate_create_deal)
 def create_or_update_deal():
-    data = request.get_json()
+    data = g.payload
+    if _wants_async():
+        return _accept_job("deal", data)
 
     try:
-        deal = deal_service.create_or_update_deal(data)
+        deal = get_deal_service().create_or_update_deal(data)
         return jsonify(deal), 200
     except ValueError as e:
         logger.error(f"Error processing deal: {e}")
         return jsonify({"Error": str(e)}), 400
 
 
+@integration_bp.route('/deals/batch', methods=['POST'])
+# @auth_middleware()
+@validate_request(DealValidator.validate_batch, stream='inputs')
+def batch_create_or_update_deals():
+    inputs = g.payload['inputs']
+    return _batch_response(
+        inputs, DealValidator.batch_item_schema, get_deal_service().batch_create_or_update_deals)
+
+
 @integration_bp.route('/create_ticket', methods=['POST'])
 # @auth_middleware()
 @validate_request(SupportTicketValidator.validate_create_support_ticket)
 def create_ticket():
-    data = request.get_json()
+    data = g.payload
+    if _wants_async():
+        return _accept_job("ticket", data)
 
     try:
-        ticket = ticket_service.create_ticket(data)
+        ticket = get_ticket_service().create_ticket(data)
         return jsonify(ticket), 200
     except ValueError as e:
         logger.error(f"Error processing ticket: {e}")
         return jsonify({"Error": str(e)}), 400
 
 
+@integration_bp.route('/tickets/batch', methods=['POST'])
+# @auth_middleware()
+@validate_request(SupportTicketValidator.validate_batch, stream='inputs')
+def batch_create_tickets():
+    inputs = g.payload['inputs']
+    return _batch_response(
+        inputs,
+        SupportTicketValidator.create_ticket_schema,
+        get_ticket_service().batch_create_tickets
+    )
+
+
 @integration_bp.route('/new_crm_objects', methods=['GET'])
 # @auth_middleware()
 def get_new_crm_objects():
-    page = int(request.args.get('page', 1))
+    error = page_parameter_error(request.args)
+    if error is not None:
+        return error
+
     page_size = int(request.args.get('page_size', 10))
+    source = request.args.get('source')
+
+    # Each section pages independently with the cursor returned in "paging"
+    cursors = {
+        section: request.args.get(f'{section}_after')
+        for section in ("contacts", "deals", "tickets")
+    }
+    app = current_app._get_current_object()
+
+    def build():
+        # Also runs on a background thread when a stale entry is refreshed
+        with app.app_context():
+            if source == 'local':
+                # Answer from the mirror tables kept current by `flask sync-hubspot`
+                results = {section: recent_objects(section, page_size, cursors[section]) for section in cursors}
+                errors = {}
+            else:
+                # Fetch the three sections concurrently; a failed section comes back empty
+                results, errors = fan_out({
+                    "contacts": lambda: get_contact_service().get_recent_contacts(page_size, cursors["contacts"]),
+                    "deals": lambda: get_deal_service().get_recent_deals(page_size, cursors["deals"]),
+                    "tickets": lambda: get_ticket_service().get_recent_tickets(page_size, cursors["tickets"]),
+                }, timeout=Config.HUBSPOT_FANOUT_TIMEOUT)
+
+            # Return the results and next-page cursors in an object
+            crm_objects = {"paging": {}}
+            for section in cursors:
+                objects, next_after = results.get(section, ([], None))
+                crm_objects[section] = objects
+                crm_objects["paging"][section] = {"next": {"after": next_after}} if next_after else None
+
+            if errors:
+                crm_objects["errors"] = errors
+
+            # Partial results are returned but never cached
+            return jsonify(crm_objects).get_data(), not errors
 
     try:
-        contacts = contact_service.get_recent_contacts(page, page_size)
-        deals = deal_service.get_recent_deals(page, page_size)
-        tickets = ticket_service.get_recent_tickets(page, page_size)
-
-        # Return the results in an object
-        crm_objects = {
-            "contacts": contacts,
-            "deals": deals,
-            "tickets": tickets
-        }
-
-        return jsonify(crm_objects), 200
+        key = (source, page_size, *cursors.values())
+        body, etag, state = new_objects_cache.get(key, build)
     except ValueError as e:
         logger.error(f"Error retrieving new CRM objects: {e}")
         return jsonify({"Error": str(e)}), 400
+
+    response = current_app.response_class(body, mimetype="application/json")
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = f"max-age={int(Config.HUBSPOT_RESPONSE_CACHE_FRESH)}"
+    response.headers["X-Cache"] = state.upper()
+
+    # Answers If-None-Match with 304 Not Modified
+    return response.make_conditional(request)
+
+
+@integration_bp.route('/jobs/<job_id>', methods=['GET'])
+# @auth_middleware()
+def get_job(job_id):
+    job = db.session.get(Job, job_id)
+    if job is None:
+        return jsonify({"Error": f"Job {job_id} not found"}), 404
+
+    return jsonify(job.to_dict()), 200
+
+
+@integration_bp.route('/stats', methods=['GET'])
+# @auth_middleware()
+def get_stats():
+    # Counters are per worker process
+    return jsonify({
+        "caches": cache_stats(),
+        "rate_limit": get_governor().stats(),
+        "open_circuits": breaker_states(),
+        "webhooks": webhook_stats(),
+        "responses": new_objects_cache.stats(),
+        "updates": fingerprint_stats(),
+    }), 200
@@ -0,0 +1,110 @@
+from flask import Blueprint, g, request, jsonify
+from functools import wraps
+import asyncio
+import logging
+from app.config import Config
+from app.services.async_client import AsyncHubSpotClient
+from ..validations.contact_validator import ContactValidator
+from ..validations.deal_validator import DealValidator
+from ..validations.support_ticket_validator import SupportTicketValidator
+from ..validations.base import validate_request
+from .errors import page_parameter_error, register_hubspot_error_handlers
+
+# Initialize blueprint for async Integration routes
+integration_async_bp = Blueprint('integration_async_bp', __name__)
+logger = logging.getLogger(__name__)
+register_hubspot_error_handlers(integration_async_bp)
+
+# No network calls until the first request
+hubspot = AsyncHubSpotClient()
+
+
+def _releases_client(view):
+    """Close the HubSpot client after the view unless its event loop outlives the request."""
+    @wraps(view)
+    async def decorated_coroutine(*args, **kwargs):
+        try:
+            return await view(*args, **kwargs)
+        finally:
+            await hubspot.release_loop()
+
+    return decorated_coroutine
+
+
+@integration_async_bp.route('/create_contact', methods=['POST'])
+@validate_request(ContactValidator.validate_registration)
+@_releases_client
+async def create_or_update_contact():
+    data = g.payload
+
+    try:
+        contact = await hubspot.create_or_update_contact(data)
+        return jsonify(contact), 200
+    except ValueError as e:
+        logger.error(f"Error processing contact: {e}")
+        return jsonify({"Error": str(e)}), 400
+
+
+@integration_async_bp.route('/create_deal', methods=['POST'])
+@validate_request(DealValidator.validate_create_deal)
+@_releases_client
+async def create_or_update_deal():
+    data = g.payload
+
+    try:
+        deal = await hubspot.create_or_update_deal(data)
+        return jsonify(deal), 200
+    except ValueError as e:
+        logger.error(f"Error processing deal: {e}")
+        return jsonify({"Error": str(e)}), 400
+
+
+@integration_async_bp.route('/create_ticket', methods=['POST'])
+@validate_request(SupportTicketValidator.validate_create_support_ticket)
+@_releases_client
+async def create_ticket():
+    data = g.payload
+
+    try:
+        ticket = await hubspot.create_ticket(data)
+        return jsonify(ticket), 200
+    except ValueError as e:
+        logger.error(f"Error processing ticket: {e}")
+        return jsonify({"Error": str(e)}), 400
+
+
+@integration_async_bp.route('/new_crm_objects', methods=['GET'])
+@_releases_client
+async def get_new_crm_objects():
+    error = page_parameter_error(request.args)
+    if error is not None:
+        return error
+
+    page_size = int(request.args.get('page_size', 10))
+    sections = ("contacts", "deals", "tickets")
+
+    # All three fetches share the event loop; a failed section comes back empty
+    results = await asyncio.gather(*(
+        asyncio.wait_for(
+            hubspot.get_recent(section, page_size, request.args.get(f'{section}_after')),
+            timeout=Config.HUBSPOT_FANOUT_TIMEOUT)
+        for section in sections
+    ), return_exceptions=True)
+
+    crm_objects = {"paging": {}}
+    errors = {}
+    for section, result in zip(sections, results):
+        if isinstance(result, asyncio.TimeoutError):
+            errors[section] = f"Timed out after {Config.HUBSPOT_FANOUT_TIMEOUT} seconds"
+        elif isinstance(result, Exception):
+            errors[section] = str(result)
+
+        objects, next_after = ([], None) if section in errors else result
+        crm_objects[section] = objects
+        crm_objects["paging"][section] = {"next": {"after": next_after}} if next_after else None
+
+    if errors:
+        logger.error(f"Error retrieving new CRM objects: {errors}")
+        crm_objects["errors"] = errors
+
+    return jsonify(crm_objects), 200
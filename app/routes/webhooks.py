@@ -0,0 +1,42 @@
+from flask import Blueprint, current_app, request, jsonify
+import json
+import logging
+from app.config import Config
+from app.services.webhooks import get_processor, verify_signature
+
+# Initialize blueprint for HubSpot webhook routes
+webhooks_bp = Blueprint('webhooks_bp', __name__)
+logger = logging.getLogger(__name__)
+
+
+@webhooks_bp.route('/hubspot', methods=['POST'])
+def receive_hubspot_events():
+    body = request.get_data()
+
+    # HubSpot signs the URL it called, which differs from request.url behind a proxy
+    url = Config.HUBSPOT_WEBHOOK_URL or request.url
+    if not verify_signature(
+        Config.HUBSPOT_CLIENT_SECRET,
+        request.method,
+        url,
+        body,
+        request.headers.get('X-HubSpot-Signature-v3'),
+        request.headers.get('X-HubSpot-Request-Timestamp'),
+        max_age=Config.HUBSPOT_WEBHOOK_MAX_AGE
+    ):
+        logger.warning("Rejected HubSpot webhook with an invalid signature")
+        return jsonify({"Error": "Invalid signature"}), 401
+
+    try:
+        events = json.loads(body)
+    except ValueError:
+        return jsonify({"Error": "Body must be a JSON array of events"}), 400
+    if not isinstance(events, list):
+        return jsonify({"Error": "Body must be a JSON array of events"}), 400
+
+    # Respond right away; HubSpot retries deliveries that take longer than 5 seconds
+    if not get_processor(current_app._get_current_object()).submit(events):
+        logger.warning(f"Webhook queue full, asking HubSpot to retry {len(events)} events")
+        return jsonify({"Error": "Webhook queue is full"}), 503, {"Retry-After": "10"}
+
+    return jsonify({"accepted": len(events)}), 200
@@ -1,70 +1,227 @@
-import requests
 import json
 import logging
 from app.config import Config
-from hubspot import HubSpot
+from app.services.cache import advisory_lock
+from app.services.http import get_session, request_timeout, build_hubspot_client
+from app.services.rate_limit import RateLimitExceeded
+from app.services.resilience import HubSpotUnavailableError
+from app.services.token_manager import get_token_manager
+from app.utils.concurrency import iter_pages, upserts
 
 
 logger = logging.getLogger(__name__)
 
+# Most inputs HubSpot accepts in one batch call
+BATCH_LIMIT = 100
+
+# Statuses that reject a whole batch for one bad input; others (401, 403, 404, ...) apply to every input
+INPUT_ERROR_STATUSES = (400, 409, 422)
+
 class HubSpotClient:
     def __init__(self):
         self.base_url = "https://api.hubapi.com"
-        self.client_id = Config.HUBSPOT_CLIENT_ID
-        self.client_secret = Config.HUBSPOT_CLIENT_SECRET
-        self.refresh_token = Config.HUBSPOT_REFRESH_TOKEN
-        self.access_token = self._get_access_token()
+        self.token_manager = get_token_manager()
+
+    @property
+    def access_token(self):
+        """Current access token, shared by every client in this process."""
+        return self.token_manager.get_token()
 
     def _get_access_token(self):
-        """Retrieve the access token using the refresh token."""
-        url = f"https://api.hubapi.com/oauth/v1/token"
-        payload = {
-            "grant_type": "refresh_token",
-            "client_id": self.client_id,
-            "client_secret": self.client_secret,
-            "refresh_token": self.refresh_token
+        """Force a refresh of the shared access token."""
+        return self.token_manager.refresh(stale_token=self.token_manager.get_token())
+
+    def _build_sdk_client(self):
+        """Build a pooled HubSpot SDK client that follows token refreshes."""
+        return self.token_manager.bind(build_hubspot_client(self.access_token))
+
+    def _get_page(self, object_type, limit, after=None, properties=None):
+        """Fetch one page of CRM objects; returns (objects, next `after` cursor or None)."""
+        basic_api = getattr(self.client.crm, object_type).basic_api
+        response = basic_api.get_page(limit=limit, after=after, properties=properties)
+
+        next_after = None
+        if response.paging and response.paging.next:
+            next_after = response.paging.next.after
+
+        return [obj.to_dict() for obj in response.results], next_after
+
+    def _iter_pages(self, object_type, page_size, after=None, properties=None, prefetch=1):
+        """Lazily walk every page of CRM objects, prefetching up to `prefetch` pages."""
+        return iter_pages(
+            lambda cursor: self._get_page(object_type, page_size, cursor, properties),
+            after=after,
+            prefetch=prefetch
+        )
+
+    @staticmethod
+    def _with_contact_id(data):
+        """Request body with a `contact_email` property replaced by the matching `contact_id`."""
+        properties = data['properties']
+        if properties.get('contact_id') or not properties.get('contact_email'):
+            return data
+
+        from app.services.registry import get_contact_service
+
+        email = properties['contact_email']
+        contact_id = get_contact_service().find_contact_id(email)
+        if contact_id is None:
+            raise ValueError(f"No contact found with email {email}")
+
+        return HubSpotClient._set_contact_id(data, contact_id)
+
+    @staticmethod
+    def _set_contact_id(data, contact_id):
+        """Request body with its `contact_email` property replaced by `contact_id`."""
+        properties = {name: value for name, value in data['properties'].items() if name != 'contact_email'}
+        properties['contact_id'] = contact_id
+        return {**data, 'properties': properties}
+
+    @staticmethod
+    def _with_contact_ids(items):
+        """Batch version of `_with_contact_id`; returns the bodies and an error by index.
+
+        Every `contact_email` in the batch is resolved together, and items whose
+        email could not be resolved are left as they are and reported in the errors.
+        """
+        emails = {
+            index: item['properties']['contact_email'] for index, item in enumerate(items)
+            if not item['properties'].get('contact_id') and item['properties'].get('contact_email')
         }
-        response = requests.post(url, data=payload)
+        if not emails:
+            return items, {}
 
-        if response.status_code == 200:
-            data = response.json()
-            self.access_token = data.get('access_token')
-            logger.info(f"Access token obtained successfully: {self.access_token[:10]}...")
-            return self.access_token
-        else:
-            logger.error(
-                f"Failed to get access token. Status code: {response.status_code}, Response: {response.text}")
-            raise Exception("Unable to get access token")
+        from app.services.registry import get_contact_service
+
+        contacts = get_contact_service()
+        found, failed = contacts.find_contact_ids(emails.values())
+
+        items = list(items)
+        errors = {}
+        for index, email in emails.items():
+            key = contacts.normalize_email(email)
+            if key in failed:
+                errors[index] = f"Could not look up contact {email}: {failed[key]}"
+            elif key not in found:
+                errors[index] = f"No contact found with email {email}"
+            else:
+                items[index] = HubSpotClient._set_contact_id(items[index], found[key])
+
+        return items, errors
+
+    def _single_flight(self, key, data, operation):
+        """Run a create-or-update once for concurrent callers with the same key and payload."""
+        def run():
+            if not Config.HUBSPOT_UPSERT_ADVISORY_LOCK:
+                return operation()
+            # Also serialize the key across workers; they see each other's writes
+            # through the shared ID cache rather than the lagging search API
+            with advisory_lock(key):
+                return operation()
+
+        return upserts.do(key, run, token=json.dumps(data, sort_keys=True, default=str))
 
     def _make_request(self, method, url, data=None):
         """Helper method to make authenticated API requests."""
+        # The shared session refreshes the token once on a 401 and retries transient failures
         headers = {
             "Authorization": f"Bearer {self.access_token}",
             "Content-Type": "application/json"
         }
-        if method == 'GET':
-            response = requests.get(url, headers=headers)
-        elif method == 'POST':
-            response = requests.post(
-                url, headers=headers, data=json.dumps(data))
-
-        if response.status_code == 401:
-            # Log the failed API request and authentication issue
-            logger.warning(
-                f"API Authentication failed for URL: {url}. Retrying token refresh.")
-
-            # Token expired, refresh it
-            self.access_token = self._get_access_token()
-            return self._make_request(method, url, data)
-        
-        if response.status_code != 200:
+        body = json.dumps(data) if data is not None else None
+        response = get_session().request(
+            method, url, headers=headers, data=body, timeout=request_timeout())
+
+        if response.status_code >= 400:
             # Log any other error responses to help with debugging
             logger.error(
                 f"API Request failed for URL: {url}. Status code: {response.status_code}, Response: {response.text}")
 
         return response
 
+    def _post_batch(self, path, inputs):
+        """POST inputs to a HubSpot batch endpoint, BATCH_LIMIT at a time.
+
+        Returns the objects HubSpot returned, (input, message) pairs for inputs
+        that failed, and the per-item errors of partially successful batches.
+        """
+        results, failures, errors = [], [], []
+        for start in range(0, len(inputs), BATCH_LIMIT):
+            self._post_chunk(path, inputs[start:start + BATCH_LIMIT], results, failures, errors)
+        return results, failures, errors
+
+    def _post_chunk(self, path, chunk, results, failures, errors):
+        try:
+            response = self._make_request("POST", f"{self.base_url}{path}", {"inputs": chunk})
+        except (HubSpotUnavailableError, RateLimitExceeded) as e:
+            failures.extend((item, str(e)) for item in chunk)
+            return
+
+        status = response.status_code
+        if status < 400:
+            # 207 Multi-Status carries the failed items next to the successful ones
+            body = response.json()
+            results.extend(body.get("results", []))
+            errors.extend(body.get("errors", []))
+        elif status in INPUT_ERROR_STATUSES and len(chunk) > 1:
+            # HubSpot rejects a whole batch for one bad input; halve it to isolate that input
+            middle = len(chunk) // 2
+            self._post_chunk(path, chunk[:middle], results, failures, errors)
+            self._post_chunk(path, chunk[middle:], results, failures, errors)
+        else:
+            try:
+                message = response.json().get("message", response.text)
+            except ValueError:
+                message = response.text
+            failures.extend((item, message) for item in chunk)
+
+    def _search_in(self, object_type, property_name, values, properties=None):
+        """Find objects whose `property_name` is one of `values`, BATCH_LIMIT values per search.
+
+        Returns the objects found and a message for each value that could not be looked up.
+        """
+        url = f"{self.base_url}/crm/v3/objects/{object_type}/search"
+        found, failed = [], {}
+
+        for start in range(0, len(values), BATCH_LIMIT):
+            chunk = values[start:start + BATCH_LIMIT]
+            search_request = {
+                "filterGroups": [{"filters": [
+                    {"propertyName": property_name, "operator": "IN", "values": chunk}
+                ]}],
+                "properties": properties or [property_name],
+                "limit": 200
+            }
+
+            try:
+                while True:
+                    response = self._make_request("POST", url, search_request)
+                    if response.status_code != 200:
+                        raise ValueError(f"Search failed with status {response.status_code}")
+
+                    body = response.json()
+                    found.extend(body.get("results", []))
+
+                    after = ((body.get("paging") or {}).get("next") or {}).get("after")
+                    if not after:
+                        break
+                    search_request["after"] = after
+            except (ValueError, HubSpotUnavailableError, RateLimitExceeded) as e:
+                logger.error(f"Error searching {object_type} by {property_name}: {e}")
+                failed.update((value, str(e)) for value in chunk)
+
+        return found, failed
+
+    @staticmethod
+    def _batch_error(key, errors):
+        """Message of the batch error that mentions `key`, if any."""
+        for error in errors:
+            for values in (error.get("context") or {}).values():
+                values = values if isinstance(values, list) else [values]
+                if str(key) in map(str, values):
+                    return error.get("message")
+        return errors[0].get("message") if errors else "Not returned by HubSpot"
+
     def check_and_refresh_token(self):
         """Check if the token is valid; refresh if necessary."""
-        if not self.access_token:
-            self.access_token = self._get_access_token()
+        return self.token_manager.get_token()
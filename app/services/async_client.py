@@ -0,0 +1,303 @@
+import asyncio
+import time
+import weakref
+import logging
+import httpx
+from app.config import Config
+from app.services import HubSpotClient
+from app.services.contact_service import ContactService
+from app.services.deal_service import DealService
+from app.services.fingerprints import get_fingerprints
+from app.services.support_ticket_service import SupportTicketService
+from app.services.rate_limit import get_governor
+from app.services.resilience import (
+    HubSpotUnavailableError,
+    RETRYABLE_STATUSES,
+    endpoint_key,
+    get_breaker,
+    get_retry_policy,
+    is_idempotent,
+)
+from app.services.token_manager import get_token_manager
+
+
+logger = logging.getLogger(__name__)
+
+
+class HubSpotApiError(Exception):
+    """Non-2xx response from HubSpot; mirrors the SDK's ApiException attributes."""
+
+    def __init__(self, status, body):
+        self.status = status
+        self.body = body
+        super().__init__(f"HubSpot returned {status}: {body}")
+
+
+class AsyncHubSpotClient:
+    """asyncio implementation of the HubSpotClient surface used by the services."""
+
+    def __init__(self, base_url="https://api.hubapi.com"):
+        self.base_url = base_url
+        self.token_manager = get_token_manager()
+
+        # httpx clients and locks are bound to the event loop that created them
+        self._clients = weakref.WeakKeyDictionary()
+        self._token_locks = weakref.WeakKeyDictionary()
+        # Loops that outlive a request (an ASGI server's) keep their client between requests
+        self._shared_loops = weakref.WeakSet()
+
+    def _client(self):
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+
+        if client is None:
+            client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=Config.HUBSPOT_ASYNC_MAX_CONNECTIONS,
+                    max_keepalive_connections=Config.HUBSPOT_POOL_MAXSIZE
+                ),
+                timeout=httpx.Timeout(
+                    Config.HUBSPOT_READ_TIMEOUT, connect=Config.HUBSPOT_CONNECT_TIMEOUT)
+            )
+            self._clients[loop] = client
+
+        return client
+
+    def share_loop(self):
+        """Keep the running loop's client across requests, e.g. from an ASGI lifespan startup."""
+        self._shared_loops.add(asyncio.get_running_loop())
+
+    async def release_loop(self):
+        """Close the running loop's client at the end of a request, unless the loop is shared.
+
+        Under WSGI every async view runs on a new event loop, and a client left
+        open on it would leak its connections once the loop is gone.
+        """
+        if asyncio.get_running_loop() not in self._shared_loops:
+            await self.aclose()
+
+    async def aclose(self):
+        """Close the running loop's client."""
+        loop = asyncio.get_running_loop()
+        self._token_locks.pop(loop, None)
+        client = self._clients.pop(loop, None)
+        if client is not None:
+            await client.aclose()
+
+    def _token_lock(self):
+        loop = asyncio.get_running_loop()
+        lock = self._token_locks.get(loop)
+        if lock is None:
+            lock = self._token_locks[loop] = asyncio.Lock()
+        return lock
+
+    async def access_token(self):
+        """Return a valid access token, refreshing it without blocking the loop."""
+        token = self.token_manager.current_token()
+        if token:
+            return token
+
+        async with self._token_lock():
+            # Another task refreshed while we were waiting
+            token = self.token_manager.current_token()
+            if token:
+                return token
+
+            url, payload = self.token_manager.token_request()
+            response = await self._client().post(url, data=payload)
+
+            if response.status_code != 200:
+                logger.error(
+                    f"Failed to get access token. Status code: {response.status_code}, Response: {response.text}")
+                raise Exception("Unable to get access token")
+
+            return self.token_manager.store(response.json())
+
+    async def _request(self, method, path, json=None, params=None):
+        """Paced, retried and circuit-broken request that returns the decoded JSON body."""
+        url = f"{self.base_url}{path}"
+        governor = get_governor()
+        policy = get_retry_policy()
+        breaker = get_breaker(endpoint_key(method, url))
+        started = time.monotonic()
+        reauthorized = False
+        attempt = 0
+
+        while True:
+            # Paced first, so a refused call (daily limit) never takes the breaker's probe
+            await asyncio.sleep(governor.reserve(url))
+            token = await self.access_token()
+
+            breaker.before_call()
+            try:
+                response = await self._client().request(
+                    method, url, json=json, params=params,
+                    headers={"Authorization": f"Bearer {token}"})
+            except httpx.TransportError as e:
+                breaker.record_failure()
+
+                # Writes are only repeated when they never reached HubSpot
+                delay = None
+                if isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout)) \
+                        or is_idempotent(method, url):
+                    delay = policy.next_delay(attempt, started)
+                if delay is None:
+                    raise HubSpotUnavailableError(f"HubSpot request failed: {str(e)}") from e
+
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            except BaseException:
+                # Every call reports back, or a half-open breaker would wait on its probe
+                breaker.record_failure()
+                raise
+
+            status = response.status_code
+            if status in RETRYABLE_STATUSES:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+
+            governor.observe(url, status, response.headers)
+
+            if status == 401 and not reauthorized:
+                logger.warning(f"API Authentication failed for URL: {url}. Retrying token refresh.")
+                self.token_manager.expire(token)
+                reauthorized = True
+                continue
+
+            delay = None
+            if status == 429:
+                delay = policy.next_delay(attempt, started, delay=0)
+            elif status in RETRYABLE_STATUSES and is_idempotent(method, url):
+                delay = policy.next_delay(attempt, started)
+
+            if delay is None:
+                break
+
+            logger.warning(f"HubSpot returned {status} for {url}. Retrying in {delay:.2f}s.")
+            await asyncio.sleep(delay)
+            attempt += 1
+
+        if status >= 400:
+            logger.error(
+                f"API Request failed for URL: {url}. Status code: {status}, Response: {response.text}")
+            raise HubSpotApiError(status, response.text)
+
+        return response.json() if response.content else None
+
+    # Generic CRM object operations
+
+    async def create(self, object_type, payload):
+        return await self._request("POST", f"/crm/v3/objects/{object_type}", json=payload)
+
+    async def update(self, object_type, object_id, payload):
+        return await self._request(
+            "PATCH", f"/crm/v3/objects/{object_type}/{object_id}", json=payload)
+
+    async def search(self, object_type, search_request):
+        return await self._request(
+            "POST", f"/crm/v3/objects/{object_type}/search", json=search_request)
+
+    async def get_page(self, object_type, limit=10, after=None, properties=None):
+        params = {"limit": limit}
+        if after:
+            params["after"] = after
+        if properties:
+            params["properties"] = ",".join(properties)
+        return await self._request("GET", f"/crm/v3/objects/{object_type}", params=params)
+
+    async def _find_first(self, object_type, search_request):
+        """First search result, or None (also when the search fails, like the services)."""
+        try:
+            response = await self.search(object_type, search_request)
+        except HubSpotApiError as e:
+            logger.error(
+                f"Error searching {object_type}. Status code: {e.status}, Response: {e.body}")
+            return None
+
+        results = response.get("results", [])
+        return results[0] if results else None
+
+    async def _save(self, object_type, object_id, payload):
+        """Create (or update, given an ID) an object, keeping the services' fingerprints current."""
+        fingerprints = get_fingerprints(object_type)
+        try:
+            if object_id:
+                result = await self.update(object_type, object_id, payload)
+            else:
+                result = await self.create(object_type, payload)
+        except Exception:
+            # The write may have been applied; the shared cache tier is blocking I/O
+            if object_id:
+                await asyncio.to_thread(fingerprints.forget, object_id)
+            raise
+
+        await asyncio.to_thread(fingerprints.remember, result["id"], payload["properties"])
+        return result
+
+    async def _with_contact_id(self, data):
+        """Request body with a `contact_email` property replaced by the matching `contact_id`."""
+        properties = data['properties']
+        if properties.get('contact_id') or not properties.get('contact_email'):
+            return data
+
+        # Unlike _find_first, a failed search is raised rather than taken for "not found"
+        email = properties['contact_email']
+        response = await self.search("contacts", ContactService.email_filter(email))
+        results = response.get("results", [])
+        if not results:
+            raise ValueError(f"No contact found with email {email}")
+
+        return HubSpotClient._set_contact_id(data, results[0]["id"])
+
+    # Service-level operations, matching the synchronous services
+
+    async def create_or_update_contact(self, data):
+        """Create or update a contact in HubSpot."""
+        email = data['properties']['email']
+        payload = ContactService.contact_payload(data)
+
+        contact = await self._find_first("contacts", ContactService.email_filter(email))
+        if contact:
+            logger.info(f"Contact with email {email} exists. Updating contact.")
+            return await self._save("contacts", contact["id"], payload)
+
+        logger.info(f"Contact with email {email} does not exist. Creating a new contact.")
+        return await self._save("contacts", None, payload)
+
+    async def create_or_update_deal(self, data):
+        """Create or update a deal in HubSpot."""
+        data = await self._with_contact_id(data)
+        deal_name = data['properties']['dealname']
+        payload = DealService.deal_payload(data)
+
+        deal = await self._find_first(
+            "deals", DealService.name_filter(deal_name, data['properties'].get('pipeline')))
+        if deal:
+            logger.info(f"Deal with name {deal_name} exists. Updating deal.")
+            return await self._save("deals", deal["id"], payload)
+
+        logger.info(f"Deal with name {deal_name} does not exist. Creating a new deal.")
+        return await self._save("deals", None, payload)
+
+    async def create_ticket(self, data):
+        """Create a new support ticket in HubSpot."""
+        data = await self._with_contact_id(data)
+        try:
+            return await self.create("tickets", SupportTicketService.ticket_payload(data))
+        except HubSpotApiError as e:
+            logger.error(f"Failed to create ticket: {e.status}, Response: {e.body}")
+            return {"error": "Ticket creation failed", "status_code": e.status, "response": e.body}
+
+    async def get_recent(self, object_type, page_size, after=None):
+        """Retrieve a page of recently created objects and the cursor for the next page."""
+        try:
+            response = await self.get_page(object_type, limit=page_size, after=after)
+        except HubSpotApiError as e:
+            logger.error(
+                f"Error fetching recent {object_type}. Status code: {e.status}, Response: {e.body}")
+            raise
+
+        next_page = (response.get("paging") or {}).get("next") or {}
+        return response.get("results", []), next_page.get("after")
@@ -0,0 +1,287 @@
+import os
+import json
+import time
+import threading
+import hashlib
+import logging
+import sqlalchemy as sa
+from contextlib import contextmanager
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import SQLAlchemyError
+from app.config import Config
+from app.utils.cache import TTLCache
+
+
+logger = logging.getLogger(__name__)
+
+_table = sa.Table(
+    "hubspot_cache",
+    sa.MetaData(),
+    sa.Column("key", sa.String(512), primary_key=True),
+    sa.Column("value", sa.Text, nullable=False),
+    sa.Column("expires_at", sa.Float, nullable=False, index=True),
+)
+
+# Process-wide engine and caches, dropped after fork()
+_engine = None
+_engine_lock = threading.Lock()
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_engine():
+    """Engine for the shared cache tier; creates the cache table on first use."""
+    global _engine
+
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                engine = sa.create_engine(
+                    Config.HUBSPOT_CACHE_DATABASE_URL or Config.SQLALCHEMY_DATABASE_URI,
+                    pool_pre_ping=True)
+                _create_table(engine)
+                _engine = engine
+
+    return _engine
+
+
+def _create_table(engine):
+    if engine.dialect.name == "postgresql":
+        # Cache rows are disposable, so skip the write-ahead log
+        with engine.begin() as conn:
+            conn.execute(sa.text(
+                "CREATE UNLOGGED TABLE IF NOT EXISTS hubspot_cache ("
+                "key VARCHAR(512) PRIMARY KEY, value TEXT NOT NULL, "
+                "expires_at DOUBLE PRECISION NOT NULL)"))
+            conn.execute(sa.text(
+                "CREATE INDEX IF NOT EXISTS ix_hubspot_cache_expires_at "
+                "ON hubspot_cache (expires_at)"))
+    else:
+        _table.metadata.create_all(engine, checkfirst=True)
+
+
+class DatabaseCache:
+    """Cache tier shared by every worker, stored in a table of the app database."""
+
+    PURGE_INTERVAL = 60
+
+    def __init__(self, namespace, ttl=3600, engine=None):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._engine = engine
+        self._purged_at = time.time()
+
+    @property
+    def engine(self):
+        return self._engine or get_engine()
+
+    def _key(self, key):
+        return f"{self.namespace}:{key}"
+
+    def get(self, key, default=None):
+        return self.get_many([key]).get(key, default)
+
+    def get_many(self, keys):
+        """Values for the keys that are present and unexpired, in one query."""
+        keys = list(keys)
+        if not keys:
+            return {}
+
+        stored = {self._key(key): key for key in keys}
+        try:
+            with self.engine.connect() as conn:
+                rows = conn.execute(
+                    sa.select(_table.c.key, _table.c.value).where(
+                        _table.c.key.in_(list(stored)),
+                        _table.c.expires_at > time.time()
+                    )
+                ).all()
+        except SQLAlchemyError as e:
+            # The shared tier is an optimization; treat an outage as a miss
+            self.errors += 1
+            logger.warning(f"Shared cache read failed: {str(e)}")
+            return {}
+
+        found = {stored[row.key]: json.loads(row.value) for row in rows}
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def set(self, key, value, ttl=None):
+        self.set_many({key: value}, ttl)
+
+    def set_many(self, mapping, ttl=None):
+        if not mapping:
+            return
+
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        rows = [
+            {"key": self._key(key), "value": json.dumps(value), "expires_at": expires_at}
+            for key, value in mapping.items()
+        ]
+        try:
+            with self.engine.begin() as conn:
+                self._upsert(conn, rows)
+                self._purge_expired(conn)
+        except SQLAlchemyError as e:
+            self.errors += 1
+            logger.warning(f"Shared cache write failed: {str(e)}")
+
+    @staticmethod
+    def _upsert(conn, rows):
+        dialects = {"postgresql": postgresql, "sqlite": sqlite}
+        dialect = dialects.get(conn.dialect.name)
+
+        if dialect is None:
+            conn.execute(_table.delete().where(_table.c.key.in_([row["key"] for row in rows])))
+            conn.execute(_table.insert(), rows)
+            return
+
+        # Workers may write the same key at once, so let the database resolve the conflict
+        insert = dialect.insert(_table)
+        conn.execute(insert.on_conflict_do_update(
+            index_elements=[_table.c.key],
+            set_={"value": insert.excluded.value, "expires_at": insert.excluded.expires_at}
+        ), rows)
+
+    def pop(self, key, default=None):
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(_table.delete().where(_table.c.key == self._key(key)))
+        except SQLAlchemyError as e:
+            self.errors += 1
+            logger.warning(f"Shared cache delete failed: {str(e)}")
+        return default
+
+    def _purge_expired(self, conn):
+        now = time.time()
+        if now - self._purged_at < self.PURGE_INTERVAL:
+            return
+
+        self._purged_at = now
+        conn.execute(_table.delete().where(_table.c.expires_at <= now))
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "errors": self.errors}
+
+
+class TieredCache:
+    """In-process LRU in front of the shared tier.
+
+    Local entries live for at most `local_ttl` seconds, which bounds how long
+    another worker's invalidation can go unnoticed.
+    """
+
+    def __init__(self, local, shared, local_ttl=60):
+        self.local = local
+        self.shared = shared
+        self.local_ttl = local_ttl
+
+    def get(self, key, default=None):
+        value = self.local.get(key)
+        if value is not None:
+            return value
+
+        value = self.shared.get(key)
+        if value is None:
+            return default
+
+        self.local.set(key, value, min(self.local_ttl, self.local.ttl))
+        return value
+
+    def get_many(self, keys):
+        found = self.local.get_many(keys)
+        missing = [key for key in keys if key not in found]
+
+        if missing:
+            shared = self.shared.get_many(missing)
+            self.local.set_many(shared, min(self.local_ttl, self.local.ttl))
+            found.update(shared)
+
+        return found
+
+    def set(self, key, value, ttl=None):
+        self.set_many({key: value}, ttl)
+
+    def set_many(self, mapping, ttl=None):
+        local_ttl = min(self.local_ttl, self.local.ttl if ttl is None else ttl)
+        self.local.set_many(mapping, local_ttl)
+        self.shared.set_many(mapping, ttl)
+
+    def pop(self, key, default=None):
+        value = self.local.pop(key, default)
+        self.shared.pop(key)
+        return value
+
+    def clear(self):
+        self.local.clear()
+
+    def __len__(self):
+        return len(self.local)
+
+    def stats(self):
+        return {"local": self.local.stats(), "shared": self.shared.stats()}
+
+
+def get_cache(namespace, maxsize=None, ttl=None):
+    """Return the process's cache for `namespace`, shared across workers if configured."""
+    cache = _caches.get(namespace)
+    if cache is not None:
+        return cache
+
+    with _caches_lock:
+        cache = _caches.get(namespace)
+        if cache is None:
+            maxsize = maxsize or Config.HUBSPOT_ID_CACHE_SIZE
+            ttl = ttl or Config.HUBSPOT_ID_CACHE_TTL
+            cache = TTLCache(maxsize, ttl)
+
+            if Config.HUBSPOT_CACHE_BACKEND == "database":
+                cache = TieredCache(
+                    cache, DatabaseCache(namespace, ttl), local_ttl=Config.HUBSPOT_CACHE_LOCAL_TTL)
+
+            _caches[namespace] = cache
+
+    return cache
+
+
+@contextmanager
+def advisory_lock(name):
+    """Hold a Postgres advisory lock on `name` across every worker; a no-op on other databases."""
+    engine = get_engine()
+    if engine.dialect.name != "postgresql":
+        yield
+        return
+
+    lock_id = int.from_bytes(hashlib.blake2b(name.encode(), digest_size=8).digest(), "big", signed=True)
+    with engine.connect() as conn:
+        conn.execute(sa.text("SELECT pg_advisory_lock(:id)"), {"id": lock_id})
+        try:
+            yield
+        finally:
+            conn.execute(sa.text("SELECT pg_advisory_unlock(:id)"), {"id": lock_id})
+            conn.commit()
+
+
+def cache_stats():
+    """Hit and miss counters of every cache in this process."""
+    return {namespace: cache.stats() for namespace, cache in list(_caches.items())}
+
+
+def _reset_after_fork():
+    """Drop the parent's engine and caches; pooled DB connections must not be shared."""
+    global _engine, _engine_lock, _caches, _caches_lock
+
+    if _engine is not None:
+        _engine.dispose(close=False)
+    _engine = None
+    _engine_lock = threading.Lock()
+    _caches = {}
+    _caches_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -1,8 +1,9 @@
-from hubspot import HubSpot
 from hubspot.crm.contacts import ApiException
-from app.services import HubSpotClient
+from app.services import BATCH_LIMIT, HubSpotClient
 from app.config import Config
-import time
+from app.services.cache import get_cache
+from app.services.fingerprints import get_fingerprints
+from app.utils.concurrency import MicroBatcher
 import logging
 
 logger = logging.getLogger(__name__)
@@ -12,53 +13,101 @@ class ContactService(HubSpotClient):
     def __init__(self):
         # Initialize HubSpot client with OAuth access token
         super().__init__()
-        self.client = HubSpot(access_token=self.access_token)
+        self.client = self._build_sdk_client()
+
+        # Contact IDs by normalized email, filled from our own writes
+        self.contact_ids = get_cache("contact_ids")
+        # Hashes of the properties last written to each contact
+        self.fingerprints = get_fingerprints("contacts")
+        # Email lookups from concurrent requests, sent as one IN-filter search
+        self.email_resolver = MicroBatcher(
+            self._resolve_pending, window=Config.HUBSPOT_RESOLVE_WINDOW, max_size=BATCH_LIMIT)
+
+    @staticmethod
+    def normalize_email(email):
+        return email.strip().lower()
 
     def create_or_update_contact(self, data):
         """Create or update a contact in HubSpot."""
+        # Concurrent requests for one email would each search, miss and create a duplicate
+        key = self.normalize_email(data['properties']['email'])
+        return self._single_flight(
+            f"contacts:{key}", data, lambda: self._create_or_update_contact(data, key))
+
+    def _create_or_update_contact(self, data, key):
         email = data['properties']['email']
 
-        contact_exists = self._get_contact_by_email(email)
+        # A cached ID skips the search API, which also lags behind recent writes
+        contact_id = self.contact_ids.get(key)
+        if contact_id:
+            try:
+                return self._update_contact(contact_id, data)
+            except ApiException as e:
+                if e.status != 404:
+                    raise
+                logger.info(f"Cached contact {contact_id} for {email} no longer exists.")
+
+        try:
+            contact_id = self.email_resolver.get(key)
+        except ValueError:
+            # A failed lookup falls through to create; HubSpot rejects a duplicate email
+            contact_id = None
 
-        if contact_exists:
+        if contact_id:
             # If contact exists, update
             logger.info(
                 f"Contact with email {email} exists. Updating contact.")
 
-            return self._update_contact(contact_exists.id, data)
+            return self._update_contact(contact_id, data)
         else:
             # If contact does not exist, create a new one
             logger.info(
                 f"Contact with email {email} does not exist. Creating a new contact.")
             return self._create_contact(data)
 
-    def _get_contact_by_email(self, email):
-        """Check if the contact exists by email and return the contact if found."""
-        try:
-            # Search API to find a contact by email
-            filter = {
-                "filters": [
-                    {
-                        "propertyName": "email",
-                        "operator": "EQ",
-                        "value": email
-                    }
-                ]
-            }
-            response = self.client.crm.contacts.search_api.do_search(filter)
-            if response.results:
-                # Return the first result
-                contact = response.results[0]
-                return contact
-            return None
-        except ApiException as e:
-            logger.error(
-                f"Error fetching contact by email {email}. Status code: {e.status}, Response: {e.body}")
-            return None
+    def find_contact_id(self, email):
+        """ID of the contact with this email, or None; concurrent lookups share one search."""
+        key = self.normalize_email(email)
+        return self.contact_ids.get(key) or self.email_resolver.get(key)
 
-    def _create_contact(self, data):
-        """Create a new contact in HubSpot."""
-        contact_data = {
+    def find_contact_ids(self, emails):
+        """IDs of the contacts with these emails, from the cache or one round of IN-filter searches.
+
+        Returns (found, failed) by normalized email; emails in neither have no contact.
+        """
+        keys = {self.normalize_email(email) for email in emails}
+        found = self.contact_ids.get_many(keys)
+        missing = [key for key in keys if key not in found]
+        if not missing:
+            return found, {}
+
+        resolved, failed = self.resolve_contact_ids(missing)
+        return {**found, **resolved}, failed
+
+    def resolve_contact_ids(self, emails):
+        """Look up contact IDs by email with IN-filter searches; returns (found, failed) by normalized email."""
+        keys = sorted({self.normalize_email(email) for email in emails})
+        results, failed = self._search_in("contacts", "email", keys)
+
+        found = {}
+        for contact in results:
+            email = (contact.get("properties") or {}).get("email")
+            if email:
+                found[self.normalize_email(email)] = contact["id"]
+
+        self.contact_ids.set_many(found)
+        return found, failed
+
+    def _resolve_pending(self, keys):
+        found, failed = self.resolve_contact_ids(keys)
+        for key, message in failed.items():
+            found[key] = ValueError(f"Could not look up contact {key}: {message}")
+        return found
+
+    @staticmethod
+    def contact_payload(data):
+        """Build the HubSpot contact payload from a request body."""
+        return {
             "properties": {
                 "email": data['properties']['email'],
                 "firstname": data['properties'].get('firstname'),
@@ -66,12 +115,31 @@ class ContactService(HubSpotClient):
                 "phone": data['properties'].get('phone')
             }
         }
+
+    @staticmethod
+    def email_filter(email):
+        """Search filter that finds a contact by email."""
+        return {
+            "filters": [
+                {
+                    "propertyName": "email",
+                    "operator": "EQ",
+                    "value": email
+                }
+            ]
+        }
+
+    def _create_contact(self, data):
+        """Create a new contact in HubSpot."""
+        contact_data = self.contact_payload(data)
         try:
             # Create a contact
             response = self.client.crm.contacts.basic_api.create(contact_data)
             logger.info(
                 f"Successfully created contact with email {data['properties']['email']}")
-            return response
+            self.contact_ids.set(self.normalize_email(data['properties']['email']), response.id)
+            self.fingerprints.remember(response.id, contact_data["properties"])
+            return response.to_dict()
         except ApiException as e:
             logger.error(
                 f"Failed to create contact. Status code: {e.status}, Response: {e.body}")
@@ -79,50 +147,93 @@ class ContactService(HubSpotClient):
 
     def _update_contact(self, contact_id, data):
         """Update an existing contact in HubSpot."""
-        contact_data = {
-            "properties": {
-                "email": data['properties']['email'],
-                "firstname": data['properties']['firstname'],
-                "lastname": data['properties']['lastname'],
-                "phone": data['properties']['phone']
-            }
-        }
+        contact_data = self.contact_payload(data)
+        key = self.normalize_email(data['properties']['email'])
+
+        # Only send the properties that changed since our last write
+        changed = self.fingerprints.changed(contact_id, contact_data["properties"])
+        if not changed:
+            logger.info(f"Contact with email {data['properties']['email']} is unchanged. Skipping update.")
+            self.contact_ids.set(key, contact_id)
+            return {"id": contact_id, "properties": contact_data["properties"], "unchanged": True}
+
         try:
             # Update the contact
             response = self.client.crm.contacts.basic_api.update(
-                contact_id, contact_data)
+                contact_id, {"properties": changed})
             logger.info(
                 f"Successfully updated contact with email {data['properties']['email']}")
+            self.contact_ids.set(key, response.id)
+            self.fingerprints.remember(response.id, changed)
             return response.to_dict()
         except ApiException as e:
+            if e.status == 404:
+                # The contact was deleted or merged; forget any cached ID pointing at it
+                self.contact_ids.pop(key)
+                self.fingerprints.forget(contact_id)
             logger.error(
                 f"Failed to update contact. Status code: {e.status}, Response: {e.body}")
             raise
 
-    def get_recent_contacts(self, page, page_size):
-        """Retrieve recently created contacts."""
+    def batch_upsert_contacts(self, items):
+        """Create or update contacts by email in batches; returns one result per item."""
+        # HubSpot rejects a batch that names the same contact twice, so the last one wins
+        inputs = {}
+        for item in items:
+            payload = self.contact_payload(item)
+            email = payload["properties"]["email"]
+            inputs[self.normalize_email(email)] = {"idProperty": "email", "id": email, **payload}
+
+        results, failures, errors = self._post_batch(
+            "/crm/v3/objects/contacts/batch/upsert", list(inputs.values()))
+
+        upserted = {}
+        for contact in results:
+            email = (contact.get("properties") or {}).get("email")
+            if email:
+                key = self.normalize_email(email)
+                upserted[key] = {
+                    "status": "created" if contact.get("new") else "updated",
+                    "id": contact.get("id")
+                }
+        self.contact_ids.set_many({key: result["id"] for key, result in upserted.items()})
+        failed = {self.normalize_email(item["id"]): message for item, message in failures}
+
+        # Keep single upserts diffing against what HubSpot now holds; a failed
+        # write may still have been applied, so its last write is no longer known
+        self.fingerprints.remember_many({
+            result["id"]: inputs[key]["properties"] for key, result in upserted.items() if result["id"]
+        })
+        unknown = self.contact_ids.get_many([key for key in inputs if key not in upserted])
+        self.fingerprints.forget_many(unknown.values())
+
+        outcome = []
+        for item in items:
+            email = item['properties']['email']
+            key = self.normalize_email(email)
+            if key in upserted:
+                outcome.append({"email": email, **upserted[key]})
+            else:
+                outcome.append({
+                    "email": email,
+                    "status": "error",
+                    "error": failed.get(key) or self._batch_error(email, errors)
+                })
+
+        logger.info(
+            f"Batch upserted {len(upserted)} of {len(inputs)} contacts in {len(items)} inputs")
+        return outcome
+
+    def get_recent_contacts(self, page_size, after=None):
+        """Retrieve a page of recently created contacts and the cursor for the next page."""
         try:
-            # Retrieve the most recent contacts
-            response = self.client.crm.contacts.basic_api.get_page(
-                limit=page_size, after=page * page_size)
-            return response.results
+            return self._get_page("contacts", page_size, after)
         except ApiException as e:
             logger.error(
                 f"Error fetching recent contacts. Status code: {e.status}, Response: {e.body}")
-            return []
-
-    def handle_rate_limit(self, response):
-        """Handle rate limits using exponential backoff."""
-        retries = 3
-
-        if response.status_code == 429:
-            # Get retry-after time from headers
-            retry_after = int(response.headers.get("Retry-After", 1))
-            wait_time = retry_after * (2 ** retries)
-            logger.warning(
-                f"Rate limit exceeded. Retrying after {wait_time} seconds.")
-            time.sleep(retry_after)
-
-            # Retry after waiting
-            return True
-        return False
+            # An empty page would be cached as a good response
+            raise
+
+    def iter_contacts(self, page_size=100, after=None, properties=None, prefetch=1):
+        """Lazily walk every contact page by page, yielding (results, next_after)."""
+        return self._iter_pages("contacts", page_size, after, properties, prefetch)
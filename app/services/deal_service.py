@@ -1,7 +1,8 @@
-from hubspot import HubSpot
 from hubspot.crm.deals import ApiException
 from app.services import HubSpotClient
 from app.config import Config
+from app.services.cache import get_cache
+from app.services.fingerprints import get_fingerprints
 import logging
 
 logger = logging.getLogger(__name__)
@@ -11,12 +12,38 @@ class DealService(HubSpotClient):
     def __init__(self):
         # Initialize HubSpot client with OAuth access token
         super().__init__()
-        self.client = HubSpot(access_token=self.access_token)
+        self.client = self._build_sdk_client()
+
+        # Deal IDs by deal name, filled from index scans and our own writes
+        self.deal_ids = get_cache("deal_ids")
+        # Hashes of the properties last written to each deal
+        self.fingerprints = get_fingerprints("deals")
 
     def create_or_update_deal(self, data):
         """Create or update a deal in HubSpot."""
+        data = self._with_contact_id(data)
+
+        if Config.HUBSPOT_DEAL_UNIQUE_PROPERTY:
+            return self._upsert_deal(data)
+
+        # Concurrent requests for one deal name would each search, miss and create a duplicate
+        return self._single_flight(
+            f"deals:{self.index_key_for(data)}", data, lambda: self._create_or_update_deal(data))
+
+    def _create_or_update_deal(self, data):
         deal_name = data['properties']['dealname']
-        existing_deals = self.search_deals(deal_name)
+
+        # An indexed ID skips the search API
+        deal_id = self.deal_ids.get(self.index_key_for(data))
+        if deal_id:
+            try:
+                return self._update_deal(deal_id, data)
+            except ApiException as e:
+                if e.status != 404:
+                    raise
+                logger.info(f"Indexed deal {deal_id} for {deal_name} no longer exists.")
+
+        existing_deals = self.search_deals(deal_name, data['properties'].get('pipeline'))
 
         if existing_deals:
             # If deal exists, update
@@ -29,21 +56,101 @@ class DealService(HubSpotClient):
                 f"Deal with name {deal_name} does not exist. Creating a new deal.")
             return self._create_deal(data)
 
-    def _create_deal(self, data):
-        """Create a new deal in HubSpot."""
-        deal_data = {
+    @staticmethod
+    def index_key(deal_name, pipeline=None):
+        """Deal-name index key, scoped by pipeline when HUBSPOT_DEAL_INDEX_BY_PIPELINE is set."""
+        key = deal_name.strip().lower()
+        if Config.HUBSPOT_DEAL_INDEX_BY_PIPELINE:
+            return f"{pipeline or ''}:{key}"
+        return key
+
+    def index_key_for(self, data):
+        return self.index_key(data['properties']['dealname'], data['properties'].get('pipeline'))
+
+    def warm_deal_index(self, page_size=100):
+        """Fill the deal-name index from a paged scan of every deal."""
+        indexed = 0
+        for deals, _ in self.iter_deals(page_size, properties=["dealname", "pipeline"]):
+            page = {}
+            for deal in deals:
+                properties = deal.get("properties") or {}
+                if properties.get("dealname"):
+                    page[self.index_key(properties["dealname"], properties.get("pipeline"))] = deal["id"]
+
+            self.deal_ids.set_many(page)
+            indexed += len(page)
+
+        logger.info(f"Indexed {indexed} deals by name")
+        return indexed
+
+    def _upsert_deal(self, data):
+        """Create or update a deal keyed on HUBSPOT_DEAL_UNIQUE_PROPERTY, without a search."""
+        id_property = Config.HUBSPOT_DEAL_UNIQUE_PROPERTY
+        deal_data = self.deal_payload(data)
+        key = data['properties'].get(id_property) or data['properties']['dealname']
+        deal_data["properties"][id_property] = key
+
+        response = self._make_request(
+            "POST",
+            f"{self.base_url}/crm/v3/objects/deals/batch/upsert",
+            {"inputs": [{"idProperty": id_property, "id": key, **deal_data}]}
+        )
+
+        if response.status_code >= 400:
+            # Raised like the SDK would, so the blueprint's error handlers apply
+            error = ApiException(status=response.status_code, reason="Deal upsert failed")
+            error.body = response.text
+            raise error
+
+        deal = response.json()["results"][0]
+        logger.info(f"Successfully upserted deal with {id_property} {key}")
+        self.deal_ids.set(self.index_key_for(data), deal["id"])
+        self.fingerprints.remember(deal["id"], deal_data["properties"])
+        return deal
+
+    @staticmethod
+    def deal_payload(data):
+        """Build the HubSpot deal payload from a request body."""
+        return {
             "properties": {
                 "dealname": data['properties']['dealname'],
                 "amount": data['properties'].get('amount'),
                 "dealstage": data['properties'].get('dealstage'),
                 "contact_id": data['properties'].get('contact_id'),
+                "pipeline": data['properties'].get('pipeline'),
             }
         }
 
+    @staticmethod
+    def name_filter(deal_name, pipeline=None):
+        """Search filter that finds a deal by name, in its pipeline when the index is scoped by pipeline."""
+        filters = [
+            {
+                "propertyName": "dealname",
+                "operator": "EQ",
+                "value": deal_name
+            }
+        ]
+
+        if Config.HUBSPOT_DEAL_INDEX_BY_PIPELINE and pipeline:
+            filters.append({
+                "propertyName": "pipeline",
+                "operator": "EQ",
+                "value": pipeline
+            })
+
+        return {"filters": filters}
+
+    def _create_deal(self, data):
+        """Create a new deal in HubSpot."""
+        deal_data = self.deal_payload(data)
+
         try:
             response = self.client.crm.deals.basic_api.create(deal_data)
             logger.info(
                 f"Successfully created deal with name {data['properties']['dealname']}")
+            self.deal_ids.set(self.index_key_for(data), response.id)
+            self.fingerprints.remember(response.id, deal_data["properties"])
             return response.to_dict()
         except ApiException as e:
             logger.error(
@@ -51,44 +158,38 @@ class DealService(HubSpotClient):
             raise
 
     def _update_deal(self, deal_id, data):
-        print(
-            "\nAbout to update deal\n",
-            data
-        )
-
         """Update an existing deal in HubSpot."""
-        deal_data = {
-            "properties": {
-                "dealname": data['properties']['dealname'],
-                "amount": data['properties'].get('amount'),
-                "dealstage": data['properties'].get('dealstage'),
-                "contact_id": data['properties'].get('contact_id'),
-            }
-        }
+        deal_data = self.deal_payload(data)
+
+        # Only send the properties that changed since our last write
+        changed = self.fingerprints.changed(deal_id, deal_data["properties"])
+        if not changed:
+            logger.info(f"Deal with name {data['properties']['dealname']} is unchanged. Skipping update.")
+            self.deal_ids.set(self.index_key_for(data), deal_id)
+            return {"id": deal_id, "properties": deal_data["properties"], "unchanged": True}
+
         try:
             response = self.client.crm.deals.basic_api.update(
-                deal_id, deal_data)
+                deal_id, {"properties": changed})
             logger.info(
                 f"Successfully updated deal with name {data['properties']['dealname']}")
+            self.deal_ids.set(self.index_key_for(data), response.id)
+            self.fingerprints.remember(response.id, changed)
             return response.to_dict()
         except ApiException as e:
+            if e.status == 404:
+                # The deal was deleted or merged; forget any indexed ID pointing at it
+                self.deal_ids.pop(self.index_key_for(data))
+                self.fingerprints.forget(deal_id)
             logger.error(
                 f"Failed to update deal. Status code: {e.status}, Response: {e.body}")
             raise
 
-    def search_deals(self, deal_name):
-        """Search API to find an existing deal by name."""
+    def search_deals(self, deal_name, pipeline=None):
+        """Search API to find an existing deal by name (and pipeline, when the index is scoped)."""
         try:
-            filter = {
-                "filters": [
-                    {
-                        "propertyName": "dealname",
-                        "operator": "EQ",
-                        "value": deal_name
-                    }
-                ]
-            }
-            response = self.client.crm.deals.search_api.do_search(filter)
+            response = self.client.crm.deals.search_api.do_search(
+                self.name_filter(deal_name, pipeline))
             if response.results:
                 # Return the first result
                 deal = response.results[0]
@@ -99,13 +200,128 @@ class DealService(HubSpotClient):
                 f"Error fetching deal with name {deal_name}. Status code: {e.status}, Response: {e.body}")
             return None
 
-    def get_recent_deals(self, page, page_size):
-        """Retrieve recently created deals."""
+    @staticmethod
+    def batch_deal_properties(data):
+        """Deal properties for the batch APIs; the contact is linked by association instead."""
+        properties = DealService.deal_payload(data)["properties"]
+        properties.pop("contact_id")
+        return properties
+
+    def batch_create_or_update_deals(self, items):
+        """Create or update deals by name in batches and associate each with its contact."""
+        # The last input for a deal wins, as it would with one call per deal; deals are
+        # told apart by their index key, so by pipeline too when the index is scoped
+        deals = {}
+        for item in items:
+            deals[self.index_key_for(item)] = item
+
+        # Indexed deals skip the search
+        indexed = self.deal_ids.get_many(list(deals))
+        existing_ids = {key: indexed[key] for key in deals if key in indexed}
+
+        names = list(dict.fromkeys(
+            item['properties']['dealname'] for key, item in deals.items() if key not in existing_ids))
+        existing, lookup_failed = self._search_in(
+            "deals", "dealname", names, properties=["dealname", "pipeline"]) if names else ([], {})
+        for deal in existing:
+            properties = deal.get("properties") or {}
+            if properties.get("dealname"):
+                existing_ids.setdefault(
+                    self.index_key(properties["dealname"], properties.get("pipeline")), deal["id"])
+
+        outcome = {}
+        for key, item in deals.items():
+            if key not in existing_ids and item['properties']['dealname'] in lookup_failed:
+                # Creating a deal we could not look up might duplicate it
+                outcome[key] = {"status": "error", "error": lookup_failed[item['properties']['dealname']]}
+
+        creates = [
+            {"properties": self.batch_deal_properties(item)}
+            for key, item in deals.items() if key not in existing_ids and key not in outcome
+        ]
+        updates = [
+            {"id": existing_ids[key], "properties": self.batch_deal_properties(item)}
+            for key, item in deals.items() if key in existing_ids and key not in outcome
+        ]
+
+        for status, path, inputs in (
+            ("created", "/crm/v3/objects/deals/batch/create", creates),
+            ("updated", "/crm/v3/objects/deals/batch/update", updates),
+        ):
+            if not inputs:
+                continue
+
+            results, failures, errors = self._post_batch(path, inputs)
+            for deal in results:
+                properties = deal.get("properties") or {}
+                if properties.get("dealname"):
+                    key = self.index_key(properties["dealname"], properties.get("pipeline"))
+                    outcome[key] = {"status": status, "id": deal["id"]}
+            for item, message in failures:
+                key = self.index_key(item["properties"]["dealname"], item["properties"].get("pipeline"))
+                outcome[key] = {"status": "error", "error": message}
+            for item in inputs:
+                name = item["properties"]["dealname"]
+                outcome.setdefault(
+                    self.index_key(name, item["properties"].get("pipeline")),
+                    {"status": "error", "error": self._batch_error(name, errors)})
+
+        self.deal_ids.set_many({
+            key: outcome[key]["id"] for key in deals if outcome[key]["status"] != "error"
+        })
+        self.fingerprints.remember_many({
+            outcome[key]["id"]: self.batch_deal_properties(item)
+            for key, item in deals.items() if outcome[key]["status"] != "error"
+        })
+        self.fingerprints.forget_many(
+            existing_ids[key] for key in deals if key in existing_ids and outcome[key]["status"] == "error")
+
+        self._associate_contacts(deals, outcome)
+
+        logger.info(f"Batch processed {len(deals)} deals from {len(items)} inputs")
+        return [
+            {"dealname": item['properties']['dealname'], **outcome[self.index_key_for(item)]}
+            for item in items
+        ]
+
+    def _associate_contacts(self, deals, outcome):
+        """Link each saved deal to its contact with the v4 batch association API."""
+        inputs = [
+            {"from": {"id": outcome[key]["id"]}, "to": {"id": str(item['properties']['contact_id'])}}
+            for key, item in deals.items()
+            if outcome[key]["status"] != "error" and item['properties'].get('contact_id')
+        ]
+        if not inputs:
+            return
+
+        results, failures, errors = self._post_batch(
+            "/crm/v4/associations/deals/contacts/batch/associate/default", inputs)
+
+        associated = {str(result["from"]["id"]) for result in results if result.get("from")}
+        failed = {item["from"]["id"]: message for item, message in failures}
+
+        for key, item in deals.items():
+            result = outcome[key]
+            if result["status"] == "error" or not item['properties'].get('contact_id'):
+                continue
+
+            deal_id = str(result["id"])
+            if deal_id in associated:
+                result["associated"] = True
+            else:
+                result["associated"] = False
+                result["association_error"] = failed.get(deal_id) or self._batch_error(deal_id, errors)
+
+    def get_recent_deals(self, page_size, after=None):
+        """Retrieve a page of recently created deals and the cursor for the next page."""
         try:
-            response = self.client.crm.deals.basic_api.get_page(
-                limit=page_size, after=page * page_size)
-            return response.results
+            return self._get_page("deals", page_size, after)
         except ApiException as e:
             logger.error(
                 f"Error fetching recent deals. Status code: {e.status}, Response: {e.body}")
-            return []
+            # An empty page would be cached as a good response
+            raise
+
+    def iter_deals(self, page_size=100, after=None, properties=None, prefetch=1):
+        """Lazily walk every deal page by page, yielding (results, next_after)."""
+        return self._iter_pages("deals", page_size, after, properties, prefetch)
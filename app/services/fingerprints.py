@@ -0,0 +1,112 @@
+import os
+import hashlib
+import threading
+from app.config import Config
+from app.services.cache import get_cache
+
+
+# Process-wide fingerprint stores by object type, dropped after fork()
+_fingerprints = {}
+_fingerprints_lock = threading.Lock()
+
+
+class PropertyFingerprints:
+    """Hashes of the property values last written to each HubSpot object.
+
+    Updates are diffed against them so unchanged properties are not sent again.
+    Entries expire, and webhooks drop them, so edits made in HubSpot are not masked
+    for long.
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+        self.skipped = 0
+        self.partial = 0
+        self.full = 0
+
+    @staticmethod
+    def digest(value):
+        if value is None:
+            return None
+        return hashlib.blake2b(str(value).encode(), digest_size=8).hexdigest()
+
+    def changed(self, object_id, properties):
+        """The properties that differ from the last write; all of them if it is unknown."""
+        if not Config.HUBSPOT_SKIP_UNCHANGED:
+            self.full += 1
+            return dict(properties)
+
+        written = self.cache.get(str(object_id))
+        if written is None:
+            self.full += 1
+            return dict(properties)
+
+        changed = {
+            name: value for name, value in properties.items()
+            if name not in written or written[name] != self.digest(value)
+        }
+        if not changed:
+            self.skipped += 1
+        else:
+            self.partial += 1
+        return changed
+
+    def remember(self, object_id, properties):
+        written = dict(self.cache.get(str(object_id)) or {})
+        written.update({name: self.digest(value) for name, value in properties.items()})
+        self.cache.set(str(object_id), written)
+
+    def remember_many(self, writes):
+        """`remember` for several objects at once; `writes` maps object IDs to properties."""
+        if not writes:
+            return
+
+        stored = self.cache.get_many([str(object_id) for object_id in writes])
+        self.cache.set_many({
+            str(object_id): {
+                **(stored.get(str(object_id)) or {}),
+                **{name: self.digest(value) for name, value in properties.items()}
+            }
+            for object_id, properties in writes.items()
+        })
+
+    def forget(self, object_id):
+        self.cache.pop(str(object_id))
+
+    def forget_many(self, object_ids):
+        for object_id in object_ids:
+            self.forget(object_id)
+
+    def stats(self):
+        return {"skipped": self.skipped, "partial": self.partial, "full": self.full}
+
+
+def get_fingerprints(object_type):
+    """Return the process's fingerprint store for `object_type`."""
+    fingerprints = _fingerprints.get(object_type)
+    if fingerprints is not None:
+        return fingerprints
+
+    with _fingerprints_lock:
+        fingerprints = _fingerprints.get(object_type)
+        if fingerprints is None:
+            fingerprints = _fingerprints[object_type] = PropertyFingerprints(
+                get_cache(f"{object_type}_fingerprints", ttl=Config.HUBSPOT_FINGERPRINT_TTL))
+
+    return fingerprints
+
+
+def fingerprint_stats():
+    """Skipped, partial and full update counters by object type."""
+    return {object_type: fingerprints.stats() for object_type, fingerprints in list(_fingerprints.items())}
+
+
+def _reset_after_fork():
+    global _fingerprints, _fingerprints_lock
+
+    _fingerprints = {}
+    _fingerprints_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,287 @@
+import os
+import time
+import socket
+import threading
+import logging
+import requests
+import urllib3
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from importlib import metadata
+from hubspot import HubSpot
+from app.config import Config
+from app.services.rate_limit import get_governor
+from app.services.resilience import (
+    HubSpotUnavailableError,
+    RETRYABLE_STATUSES,
+    endpoint_key,
+    get_breaker,
+    get_retry_policy,
+    is_idempotent,
+)
+
+
+logger = logging.getLogger(__name__)
+
+# Process-wide transports, created on first use and dropped after fork()
+_lock = threading.Lock()
+_session = None
+_pool_manager = None
+_apis = {}
+_apis_lock = threading.Lock()
+
+# Errors raised before a request was sent, and every retryable transport error
+_CONNECT_ERRORS = (
+    urllib3.exceptions.ConnectTimeoutError,
+    urllib3.exceptions.NewConnectionError,
+    requests.exceptions.ConnectTimeout,
+)
+_TRANSPORT_ERRORS = (
+    urllib3.exceptions.HTTPError,
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+)
+
+
+def _socket_options():
+    """Socket options for pooled connections, with TCP keep-alive if enabled."""
+    options = list(HTTPConnection.default_socket_options)
+
+    if Config.HUBSPOT_TCP_KEEPALIVE:
+        options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+
+        # Probe idle connections before a load balancer silently drops them
+        if hasattr(socket, "TCP_KEEPIDLE"):
+            options.append(
+                (socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, Config.HUBSPOT_TCP_KEEPIDLE))
+            options.append(
+                (socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, Config.HUBSPOT_TCP_KEEPIDLE))
+
+    return options
+
+
+def request_timeout():
+    """Default (connect, read) timeout for outbound HubSpot calls."""
+    return (Config.HUBSPOT_CONNECT_TIMEOUT, Config.HUBSPOT_READ_TIMEOUT)
+
+
+def _never_sent(error):
+    """Whether a transport error happened before the request reached HubSpot."""
+    for _ in range(5):
+        if isinstance(error, _CONNECT_ERRORS):
+            return True
+
+        # requests and urllib3 wrap the underlying error in `reason` or args[0]
+        cause = getattr(error, "reason", None)
+        if cause is None and error.args and isinstance(error.args[0], Exception):
+            cause = error.args[0]
+        if not isinstance(cause, Exception):
+            return False
+        error = cause
+
+    return False
+
+
+def _reauthorize(url, headers):
+    """Swap a rejected bearer token for a fresh one; False if there is none to swap."""
+    authorization = headers.get("Authorization", "")
+    if not authorization.startswith("Bearer ") or urlsplit(url).path.startswith("/oauth/"):
+        return False
+
+    # Imported here because the token manager uses this module's session
+    from app.services.token_manager import get_token_manager
+
+    token = get_token_manager().invalidate(authorization[len("Bearer "):])
+    headers["Authorization"] = f"Bearer {token}"
+    return True
+
+
+def send_governed(method, url, headers, send, status_of, discard):
+    """Send a HubSpot call with pacing, bounded retries and a circuit breaker."""
+    governor = get_governor()
+    policy = get_retry_policy()
+    breaker = get_breaker(endpoint_key(method, url))
+    started = time.monotonic()
+    reauthorized = False
+    attempt = 0
+
+    while True:
+        # Paced first, so a refused call (daily limit) never takes the breaker's probe
+        governor.acquire(url)
+        breaker.before_call()
+
+        try:
+            response = send()
+        except _TRANSPORT_ERRORS as e:
+            breaker.record_failure()
+
+            # Writes are only repeated when they never reached HubSpot
+            delay = None
+            if _never_sent(e) or is_idempotent(method, url):
+                delay = policy.next_delay(attempt, started)
+            if delay is None:
+                raise HubSpotUnavailableError(f"HubSpot request failed: {str(e)}") from e
+
+            logger.warning(f"HubSpot request to {url} failed ({str(e)}). Retrying in {delay:.2f}s.")
+            time.sleep(delay)
+            attempt += 1
+            continue
+        except BaseException:
+            # Every call reports back, or a half-open breaker would wait on its probe
+            breaker.record_failure()
+            raise
+
+        status = status_of(response)
+        if status in RETRYABLE_STATUSES:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+
+        governor.observe(url, status, response.headers)
+
+        if status == 401 and not reauthorized and _reauthorize(url, headers):
+            # One refresh per call; a second 401 is returned to the caller
+            reauthorized = True
+            discard(response)
+            continue
+
+        delay = None
+        if status == 429:
+            # The governor has paused the bucket, so the next acquire() waits it out
+            delay = policy.next_delay(attempt, started, delay=0)
+        elif status in RETRYABLE_STATUSES and is_idempotent(method, url):
+            delay = policy.next_delay(attempt, started)
+
+        if delay is None:
+            return response
+
+        logger.warning(f"HubSpot returned {status} for {url}. Retrying in {delay:.2f}s.")
+        discard(response)
+        time.sleep(delay)
+        attempt += 1
+
+
+class PooledAdapter(HTTPAdapter):
+    """HTTPAdapter whose connection pools use our socket options."""
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        pool_kwargs.setdefault("socket_options", _socket_options())
+        super().init_poolmanager(connections, maxsize, block=block, **pool_kwargs)
+
+    def send(self, request, **kwargs):
+        return send_governed(
+            request.method,
+            request.url,
+            request.headers,
+            lambda: super(PooledAdapter, self).send(request, **kwargs),
+            lambda response: response.status_code,
+            lambda response: response.close()
+        )
+
+
+class GovernedPoolManager(urllib3.PoolManager):
+    """urllib3 pool for the SDK clients that paces calls like the session does."""
+
+    def urlopen(self, method, url, redirect=True, **kw):
+        kw.setdefault("headers", {})
+        # The SDK always passes timeout=None, which would override the pool default
+        if kw.get("timeout") is None:
+            kw["timeout"] = self.connection_pool_kw.get("timeout")
+        return send_governed(
+            method,
+            url,
+            kw["headers"],
+            lambda: super(GovernedPoolManager, self).urlopen(
+                method, url, redirect=redirect, **kw),
+            lambda response: response.status,
+            lambda response: response.drain_conn()
+        )
+
+
+def get_session():
+    """Return the process-wide keep-alive session used for raw HubSpot calls."""
+    global _session
+
+    if _session is None:
+        with _lock:
+            if _session is None:
+                adapter = PooledAdapter(
+                    pool_connections=Config.HUBSPOT_POOL_CONNECTIONS,
+                    pool_maxsize=Config.HUBSPOT_POOL_MAXSIZE,
+                    pool_block=Config.HUBSPOT_POOL_BLOCK,
+                    max_retries=0
+                )
+                session = requests.Session()
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+                logger.info(
+                    f"HubSpot session created (pool_maxsize={Config.HUBSPOT_POOL_MAXSIZE})")
+
+    return _session
+
+
+def get_pool_manager():
+    """Return the process-wide urllib3 pool shared by all HubSpot SDK clients."""
+    global _pool_manager
+
+    if _pool_manager is None:
+        with _lock:
+            if _pool_manager is None:
+                connect, read = request_timeout()
+                _pool_manager = GovernedPoolManager(
+                    num_pools=Config.HUBSPOT_POOL_CONNECTIONS,
+                    maxsize=Config.HUBSPOT_POOL_MAXSIZE,
+                    block=Config.HUBSPOT_POOL_BLOCK,
+                    socket_options=_socket_options(),
+                    timeout=urllib3.Timeout(connect=connect, read=read),
+                    # Retries and 429s are handled by send_governed, not urllib3
+                    retries=False
+                )
+                logger.info(
+                    f"HubSpot SDK pool created (pool_maxsize={Config.HUBSPOT_POOL_MAXSIZE})")
+
+    return _pool_manager
+
+
+def _pooled_api_factory(api_client_package, api_name, config):
+    """SDK `api_factory` that reuses one API object per class on the shared pool."""
+    key = (api_client_package.__name__, api_name)
+    api = _apis.get(key)
+
+    if api is None:
+        with _apis_lock:
+            api = _apis.get(key)
+            if api is None:
+                # The SDK default builds a Configuration, ApiClient and pool on every access
+                api_client = api_client_package.ApiClient(
+                    configuration=api_client_package.Configuration())
+                api_client.rest_client.pool_manager = get_pool_manager()
+                api_client.user_agent = "hubspot-api-client-python; {0}".format(
+                    metadata.version("hubspot-api-client"))
+                api = getattr(api_client_package, api_name)(api_client=api_client)
+                _apis[key] = api
+
+    api.api_client.configuration.access_token = config.get("access_token")
+    return api
+
+
+def build_hubspot_client(access_token):
+    """Build a HubSpot SDK client that sends its traffic through the shared pool."""
+    return HubSpot(access_token=access_token, api_factory=_pooled_api_factory)
+
+
+def _reset_after_fork():
+    """Drop pools inherited from the parent so workers never share sockets."""
+    global _lock, _session, _pool_manager, _apis, _apis_lock
+
+    _lock = threading.Lock()
+    _session = None
+    _pool_manager = None
+    _apis = {}
+    _apis_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
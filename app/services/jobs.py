@@ -0,0 +1,209 @@
+import os
+import json
+import uuid
+import logging
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy import and_, or_
+from hubspot.crm.contacts import ApiException as ContactApiException
+from hubspot.crm.deals import ApiException as DealApiException
+from hubspot.crm.tickets import ApiException as TicketApiException
+from app.config import Config
+from app.models import db, Job
+from app.services.rate_limit import RateLimitExceeded
+from app.services.registry import get_contact_service, get_deal_service, get_ticket_service
+from app.services.resilience import HubSpotUnavailableError
+
+
+logger = logging.getLogger(__name__)
+
+
+
+def _create_ticket(payload):
+    # create_ticket reports HubSpot errors in its result instead of raising them
+    result = get_ticket_service().create_ticket(payload)
+    if "error" in result:
+        error = TicketApiException(status=result.get("status_code"), reason=result["error"])
+        error.body = result.get("response")
+        raise error
+    return result
+
+
+JOB_HANDLERS = {
+    "contact": lambda payload: get_contact_service().create_or_update_contact(payload),
+    "deal": lambda payload: get_deal_service().create_or_update_deal(payload),
+    "ticket": _create_ticket,
+}
+
+API_EXCEPTIONS = (ContactApiException, DealApiException, TicketApiException)
+
+_workers = None
+_workers_lock = threading.Lock()
+
+
+def enqueue_job(kind, payload):
+    """Store a validated create request as a queued job."""
+    job = Job(id=str(uuid.uuid4()), kind=kind, payload=payload,
+              status="queued", attempts=0, run_after=datetime.utcnow())
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+
+def claim_jobs(limit=1):
+    """Mark up to `limit` runnable jobs as running for this worker and return them.
+
+    Jobs left running by a worker that died are claimed again once their lease expires.
+    """
+    now = datetime.utcnow()
+    lease_expired = now - timedelta(seconds=Config.HUBSPOT_JOB_LEASE)
+    candidates = Job.query.filter(or_(
+        and_(Job.status == "queued", Job.run_after <= now),
+        and_(Job.status == "running", Job.locked_at < lease_expired),
+    )).order_by(Job.run_after).limit(limit).all()
+
+    claimed = []
+    for job in candidates:
+        # Compare-and-set, so two workers never claim the same job
+        updated = Job.query.filter(
+            Job.id == job.id, Job.status == job.status, Job.attempts == job.attempts
+        ).update({
+            "status": "running", "locked_at": now, "attempts": job.attempts + 1, "updated_at": now
+        }, synchronize_session=False)
+        if updated:
+            claimed.append(job.id)
+
+    db.session.commit()
+    return [db.session.get(Job, job_id) for job_id in claimed]
+
+
+def _is_transient(e):
+    if isinstance(e, (RateLimitExceeded, HubSpotUnavailableError)):
+        return True
+    if isinstance(e, API_EXCEPTIONS):
+        return not e.status or e.status == 429 or e.status >= 500
+    return False
+
+
+def _jsonable(result):
+    return json.loads(json.dumps(
+        result, default=lambda value: value.isoformat() if hasattr(value, "isoformat") else str(value)))
+
+
+def run_job(job):
+    """Send a claimed job to HubSpot and record the outcome; transient failures are retried later."""
+    try:
+        result = JOB_HANDLERS[job.kind](job.payload)
+    except Exception as e:
+        error = f"HubSpot request failed with status {e.status}: {e.body}" \
+            if isinstance(e, API_EXCEPTIONS) else str(e)
+
+        if _is_transient(e) and job.attempts < Config.HUBSPOT_JOB_MAX_ATTEMPTS:
+            delay = min(Config.HUBSPOT_JOB_RETRY_DELAY * 2 ** (job.attempts - 1), 3600)
+            job.status = "queued"
+            job.run_after = datetime.utcnow() + timedelta(seconds=delay)
+            logger.warning(f"Job {job.id} attempt {job.attempts} failed, retrying in {delay}s: {error}")
+        else:
+            job.status = "failed"
+            logger.error(f"Job {job.id} failed: {error}")
+        job.error = error
+    else:
+        job.status = "succeeded"
+        job.result = _jsonable(result)
+        job.error = None
+
+    job.locked_at = None
+    db.session.commit()
+    return job
+
+
+def drain_jobs():
+    """Run queued jobs until none are runnable; returns how many ran."""
+    count = 0
+    while True:
+        jobs = claim_jobs(1)
+        if not jobs:
+            return count
+        for job in jobs:
+            run_job(job)
+            count += 1
+
+
+class JobWorkers:
+    """Threads that drain the job table; HubSpot calls are paced by the shared rate limiter."""
+
+    def __init__(self, app, count=2, poll_interval=1):
+        self.app = app
+        self.count = count
+        self.poll_interval = poll_interval
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        for number in range(self.count):
+            thread = threading.Thread(target=self._run, name=f"hubspot-jobs-{number}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def wake(self):
+        """Signal that a job was queued, instead of waiting for the next poll."""
+        self._wake.set()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def join(self):
+        for thread in self._threads:
+            thread.join()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                with self.app.app_context():
+                    ran = drain_jobs()
+            except Exception as e:
+                ran = 0
+                logger.error(f"Job worker failed: {str(e)}")
+
+            if not ran:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+
+def get_workers(app):
+    """Return this process's job worker threads, starting them on first use."""
+    global _workers
+
+    if _workers is None:
+        with _workers_lock:
+            if _workers is None:
+                _workers = JobWorkers(
+                    app, Config.HUBSPOT_JOB_WORKERS, Config.HUBSPOT_JOB_POLL_INTERVAL).start()
+
+    return _workers
+
+
+def start_workers(app):
+    """Start this process's job workers if HUBSPOT_JOB_WORKERS is set.
+
+    Called when a server process starts, so jobs left queued or backing off by a
+    restart are drained without waiting for the next async request.
+    """
+    if Config.HUBSPOT_JOB_WORKERS > 0:
+        return get_workers(app)
+    return None
+
+
+def _reset_after_fork():
+    global _workers, _workers_lock
+
+    # The parent's worker threads do not exist in the child
+    _workers = None
+    _workers_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
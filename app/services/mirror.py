@@ -0,0 +1,348 @@
+import logging
+from datetime import datetime, timezone
+from decimal import Decimal, InvalidOperation
+from sqlalchemy import and_, or_
+from app.models import (
+    db,
+    HubSpotAssociation,
+    HubSpotContact,
+    HubSpotDeal,
+    HubSpotTicket,
+    SyncCheckpoint,
+)
+from app.services.cache import get_cache
+from app.services.contact_service import ContactService
+from app.services.deal_service import DealService
+from app.services.fingerprints import get_fingerprints
+from app.services.registry import services
+
+
+logger = logging.getLogger(__name__)
+
+MIRRORS = {
+    "contacts": {
+        "model": HubSpotContact,
+        # Contacts expose their modification time as `lastmodifieddate`
+        "modified": "lastmodifieddate",
+        "columns": ["email", "firstname", "lastname", "phone"],
+        "associations": [],
+    },
+    "deals": {
+        "model": HubSpotDeal,
+        "modified": "hs_lastmodifieddate",
+        "columns": ["dealname", "amount", "dealstage", "pipeline"],
+        "associations": ["contacts"],
+    },
+    "tickets": {
+        "model": HubSpotTicket,
+        "modified": "hs_lastmodifieddate",
+        "columns": ["subject", "hs_pipeline", "hs_pipeline_stage", "hs_ticket_priority"],
+        "associations": ["contacts", "deals"],
+    },
+}
+
+
+class SyncError(Exception):
+    """Raised when HubSpot refuses a sync request."""
+
+
+def _parse_time(value):
+    """HubSpot timestamp (ISO 8601 or epoch milliseconds) as a naive UTC datetime."""
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        moment = value
+    elif str(value).isdigit():
+        moment = datetime.fromtimestamp(int(value) / 1000, tz=timezone.utc)
+    else:
+        moment = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+def _epoch_ms(moment):
+    return int(moment.replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+
+class MirrorSync:
+    """Pulls HubSpot objects into the local mirror tables: a resumable backfill, then
+    incremental pulls of everything modified since the stored checkpoint."""
+
+    # HubSpot's search API returns at most 10,000 results for one query
+    SEARCH_LIMIT = 10000
+
+    def __init__(self, page_size=100):
+        self.page_size = page_size
+
+    def sync(self, object_types=None, full=False):
+        """Bring the mirror of each object type up to date; returns objects synced per type."""
+        synced = {}
+        for object_type in object_types or MIRRORS:
+            checkpoint = self._checkpoint(object_type)
+            if full:
+                checkpoint.backfill_after = None
+                checkpoint.backfilled_at = None
+
+            count = 0
+            if checkpoint.backfilled_at is None:
+                count += self.backfill(object_type, checkpoint)
+            count += self.pull_changes(object_type, checkpoint)
+            synced[object_type] = count
+
+        return synced
+
+    def backfill(self, object_type, checkpoint):
+        """Page through every object, committing the paging cursor after each page."""
+        if checkpoint.backfill_after is None:
+            # Changes made while the backfill runs are picked up by the next incremental pull
+            checkpoint.last_modified = datetime.utcnow()
+            db.session.commit()
+        else:
+            logger.info(f"Resuming {object_type} backfill after {checkpoint.backfill_after}")
+
+        service = services.get(object_type)
+        pages = getattr(service, f"iter_{object_type}")(
+            page_size=self.page_size,
+            after=checkpoint.backfill_after,
+            properties=self._properties(object_type)
+        )
+
+        count = 0
+        for results, next_after in pages:
+            self._store(object_type, results)
+            checkpoint.backfill_after = next_after
+            db.session.commit()
+            count += len(results)
+
+        checkpoint.backfill_after = None
+        checkpoint.backfilled_at = datetime.utcnow()
+        db.session.commit()
+
+        logger.info(f"Backfilled {count} {object_type}")
+        return count
+
+    def pull_changes(self, object_type, checkpoint):
+        """Pull objects modified since the checkpoint through the search API."""
+        modified = MIRRORS[object_type]["modified"]
+        service = services.get(object_type)
+        url = f"{service.base_url}/crm/v3/objects/{object_type}/search"
+        watermark = checkpoint.last_modified or datetime(1970, 1, 1)
+
+        search_request = self._changes_request(object_type, watermark)
+        count = 0
+
+        while True:
+            response = service._make_request("POST", url, search_request)
+            if response.status_code != 200:
+                raise SyncError(
+                    f"Searching modified {object_type} failed with status {response.status_code}")
+
+            body = response.json()
+            results = body.get("results", [])
+            self._store(object_type, results)
+
+            for obj in results:
+                changed = _parse_time((obj.get("properties") or {}).get(modified))
+                if changed and changed > watermark:
+                    watermark = changed
+            checkpoint.last_modified = watermark
+            db.session.commit()
+            count += len(results)
+
+            after = ((body.get("paging") or {}).get("next") or {}).get("after")
+            if not after:
+                break
+
+            if int(after) + self.page_size > self.SEARCH_LIMIT:
+                # Start a new query from the newest timestamp seen; GTE re-reads its ties
+                next_request = self._changes_request(object_type, watermark)
+                if next_request == search_request:
+                    logger.warning(
+                        f"More than {self.SEARCH_LIMIT} {object_type} share one modification time")
+                    break
+                search_request = next_request
+            else:
+                search_request["after"] = after
+
+        logger.info(f"Pulled {count} changed {object_type}")
+        return count
+
+    def refresh(self, object_types_ids):
+        """Re-read specific objects from HubSpot into the mirror, e.g. after a webhook."""
+        count = 0
+        for object_type, ids in object_types_ids.items():
+            ids = sorted(set(map(str, ids)))
+            service = services.get(object_type)
+            previous = self._rows(object_type, ids)
+
+            for start in range(0, len(ids), self.page_size):
+                chunk = ids[start:start + self.page_size]
+                response = service._make_request(
+                    "POST",
+                    f"{service.base_url}/crm/v3/objects/{object_type}/batch/read",
+                    {"inputs": [{"id": object_id} for object_id in chunk],
+                     "properties": self._properties(object_type)}
+                )
+                if response.status_code >= 400:
+                    raise SyncError(
+                        f"Reading {object_type} failed with status {response.status_code}")
+
+                results = response.json().get("results", [])
+                self._store(object_type, results)
+                count += len(results)
+
+            self._forget_cached(object_type, previous, ids)
+            db.session.commit()
+
+        return count
+
+    def remove(self, object_types_ids):
+        """Delete objects HubSpot reports as deleted or merged away."""
+        for object_type, ids in object_types_ids.items():
+            ids = sorted(set(map(str, ids)))
+            model = MIRRORS[object_type]["model"]
+
+            self._forget_cached(object_type, self._rows(object_type, ids), ids)
+            model.query.filter(model.id.in_(ids)).delete(synchronize_session=False)
+            HubSpotAssociation.query.filter(or_(
+                and_(HubSpotAssociation.from_type == object_type, HubSpotAssociation.from_id.in_(ids)),
+                and_(HubSpotAssociation.to_type == object_type, HubSpotAssociation.to_id.in_(ids)),
+            )).delete(synchronize_session=False)
+
+        db.session.commit()
+
+    @staticmethod
+    def _rows(object_type, ids):
+        model = MIRRORS[object_type]["model"]
+        return model.query.filter(model.id.in_(ids)).all() if ids else []
+
+    @staticmethod
+    def _forget_cached(object_type, rows, ids):
+        """Drop cached IDs under the lookup keys these mirrored objects had before the change,
+        and the fingerprints of the objects, which were changed outside this app."""
+        if object_type in ("contacts", "deals"):
+            fingerprints = get_fingerprints(object_type)
+            for object_id in ids:
+                fingerprints.forget(object_id)
+
+        if object_type == "contacts":
+            cache = get_cache("contact_ids")
+            keys = [ContactService.normalize_email(row.email) for row in rows if row.email]
+        elif object_type == "deals":
+            cache = get_cache("deal_ids")
+            keys = [DealService.index_key(row.dealname, row.pipeline) for row in rows if row.dealname]
+        else:
+            return
+
+        for key in keys:
+            cache.pop(key)
+
+    def _changes_request(self, object_type, since):
+        modified = MIRRORS[object_type]["modified"]
+        return {
+            "filterGroups": [{"filters": [
+                {"propertyName": modified, "operator": "GTE", "value": str(_epoch_ms(since))}
+            ]}],
+            "sorts": [{"propertyName": modified, "direction": "ASCENDING"}],
+            "properties": self._properties(object_type),
+            "limit": self.page_size,
+        }
+
+    @staticmethod
+    def _properties(object_type):
+        mirror = MIRRORS[object_type]
+        return mirror["columns"] + ["createdate", mirror["modified"]]
+
+    @staticmethod
+    def _checkpoint(object_type):
+        checkpoint = db.session.get(SyncCheckpoint, object_type)
+        if checkpoint is None:
+            checkpoint = SyncCheckpoint(object_type=object_type)
+            db.session.add(checkpoint)
+        return checkpoint
+
+    def _store(self, object_type, results):
+        """Upsert a page of objects and refresh their associations."""
+        if not results:
+            return
+
+        mirror = MIRRORS[object_type]
+        model = mirror["model"]
+
+        for obj in results:
+            properties = obj.get("properties") or {}
+            columns = {column: properties.get(column) for column in mirror["columns"]}
+            if "amount" in columns:
+                columns["amount"] = self._decimal(columns["amount"])
+
+            db.session.merge(model(
+                id=str(obj["id"]),
+                properties=properties,
+                created_at=_parse_time(properties.get("createdate")),
+                updated_at=_parse_time(properties.get(mirror["modified"])),
+                **columns
+            ))
+
+        ids = [str(obj["id"]) for obj in results]
+        for to_type in mirror["associations"]:
+            self._store_associations(object_type, to_type, ids)
+
+    @staticmethod
+    def _decimal(value):
+        try:
+            return Decimal(value) if value not in (None, "") else None
+        except InvalidOperation:
+            return None
+
+    def _store_associations(self, object_type, to_type, ids):
+        """Replace the stored associations of `ids` with HubSpot's current ones."""
+        service = services.get(object_type)
+        response = service._make_request(
+            "POST",
+            f"{service.base_url}/crm/v4/associations/{object_type}/{to_type}/batch/read",
+            {"inputs": [{"id": object_id} for object_id in ids]}
+        )
+
+        # 207 lists the objects without associations as errors
+        if response.status_code >= 400:
+            raise SyncError(
+                f"Reading {object_type} to {to_type} associations failed with status {response.status_code}")
+
+        HubSpotAssociation.query.filter(
+            HubSpotAssociation.from_type == object_type,
+            HubSpotAssociation.from_id.in_(ids),
+            HubSpotAssociation.to_type == to_type
+        ).delete(synchronize_session=False)
+
+        for result in response.json().get("results", []):
+            from_id = str(result["from"]["id"])
+            for target in result.get("to", []):
+                db.session.merge(HubSpotAssociation(
+                    from_type=object_type, from_id=from_id,
+                    to_type=to_type, to_id=str(target["toObjectId"])))
+
+
+def recent_objects(object_type, page_size, after=None):
+    """Newest mirrored objects first; returns (objects, next `after` cursor or None)."""
+    model = MIRRORS[object_type]["model"]
+    query = model.query.filter(model.created_at.isnot(None))
+
+    if after:
+        # The cursor is the created_at and id of the last object on the previous page
+        created_at, _, last_id = after.partition("|")
+        created_at = datetime.fromisoformat(created_at)
+        query = query.filter(or_(
+            model.created_at < created_at,
+            and_(model.created_at == created_at, model.id < last_id)
+        ))
+
+    rows = query.order_by(model.created_at.desc(), model.id.desc()).limit(page_size + 1).all()
+
+    next_after = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_after = f"{rows[-1].created_at.isoformat()}|{rows[-1].id}"
+
+    return [row.to_dict() for row in rows], next_after
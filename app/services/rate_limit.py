@@ -0,0 +1,212 @@
+import os
+import time
+import threading
+import logging
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+from zoneinfo import ZoneInfo
+from app.config import Config
+
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitExceeded(Exception):
+    """Raised when HubSpot's daily API budget is used up."""
+
+    def __init__(self, message, retry_after=None):
+        self.retry_after = retry_after
+        super().__init__(message)
+
+
+class TokenBucket:
+    """Token bucket that paces calls to `limit` per `interval` seconds."""
+
+    def __init__(self, limit, interval, burst=0.2, headroom=0.9):
+        self.burst_fraction = burst
+        self.headroom = headroom
+        self._lock = threading.Lock()
+        self._configure(limit, interval)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0
+
+    def _configure(self, limit, interval):
+        self.limit = limit
+        self.interval = interval
+
+        # Allow a small burst, then refill so no window exceeds the limit
+        budget = max(limit * self.headroom, 1)
+        self.capacity = max(budget * self.burst_fraction, 1)
+        self.rate = max(budget - self.capacity, 1) / interval
+
+    def _refill(self, now):
+        elapsed = now - self.updated
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated = now
+
+    def reserve(self):
+        """Take one token and return how long the caller must wait for it."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+
+            # Reservations may go negative so waiting callers queue up fairly
+            self.tokens -= 1
+            wait = 0 if self.tokens >= 0 else -self.tokens / self.rate
+
+            return max(wait, self.paused_until - now)
+
+    def sync(self, limit, remaining, interval):
+        """Adopt the limit and remaining budget HubSpot reports."""
+        with self._lock:
+            if limit != self.limit or interval != self.interval:
+                self._configure(limit, interval)
+
+            self._refill(time.monotonic())
+            self.tokens = min(self.tokens, remaining * self.headroom)
+
+    def pause(self, seconds):
+        """Hold every caller back for `seconds` (after a 429)."""
+        with self._lock:
+            now = time.monotonic()
+            self.paused_until = max(self.paused_until, now + seconds)
+            self.tokens = min(self.tokens, 0)
+            self.updated = now
+
+
+class RateLimitGovernor:
+    """Client-side pacing for HubSpot, driven by X-HubSpot-RateLimit-* headers."""
+
+    def __init__(self, window_limit, window_seconds, search_limit, search_seconds, burst=0.2):
+        self.window = TokenBucket(window_limit, window_seconds, burst=burst)
+        self.search = TokenBucket(search_limit, search_seconds, burst=burst)
+        self.daily_remaining = None
+        # Wall-clock time at which an exhausted daily budget is assumed to be renewed
+        self.daily_reset_at = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def is_governed(url):
+        # OAuth token exchange is not part of the API rate limits
+        return not urlsplit(url).path.startswith("/oauth/")
+
+    @staticmethod
+    def is_search(url):
+        return urlsplit(url).path.endswith("/search")
+
+    def reserve(self, url):
+        """Return the seconds to wait before calling `url`."""
+        if not self.is_governed(url):
+            return 0
+
+        if self.daily_remaining is not None and self.daily_remaining <= 0:
+            retry_after = self._daily_retry_after()
+            if retry_after > 0:
+                raise RateLimitExceeded("HubSpot daily API limit reached", retry_after=retry_after)
+
+        wait = self.window.reserve()
+        if self.is_search(url):
+            wait = max(wait, self.search.reserve())
+
+        return wait
+
+    def _daily_retry_after(self):
+        """Seconds until the daily budget renews; once it has, forget the exhausted count."""
+        with self._lock:
+            if self.daily_remaining is None or self.daily_remaining > 0:
+                return 0
+
+            retry_after = (self.daily_reset_at or 0) - time.time()
+            if retry_after <= 0:
+                # No request has been sent since, so no header can report the new budget
+                logger.info("HubSpot daily API limit window has reset. Resuming calls.")
+                self.daily_remaining = None
+                self.daily_reset_at = None
+                return 0
+            return retry_after
+
+    @staticmethod
+    def next_daily_reset(now):
+        """The next midnight in HubSpot's timezone, as a Unix timestamp."""
+        today = datetime.fromtimestamp(now, ZoneInfo(Config.HUBSPOT_TIMEZONE)).date()
+        midnight = datetime.combine(today + timedelta(days=1), datetime.min.time(),
+                                    tzinfo=ZoneInfo(Config.HUBSPOT_TIMEZONE))
+        return midnight.timestamp()
+
+    def acquire(self, url):
+        """Block until a call to `url` fits within the rate limits."""
+        wait = self.reserve(url)
+        if wait > 0:
+            logger.debug(f"Pacing HubSpot call to {url} for {wait:.2f}s")
+            time.sleep(wait)
+
+    def observe(self, url, status, headers):
+        """Update budgets from a HubSpot response."""
+        if not self.is_governed(url):
+            return
+
+        limit = headers.get("X-HubSpot-RateLimit-Max")
+        remaining = headers.get("X-HubSpot-RateLimit-Remaining")
+        interval = headers.get("X-HubSpot-RateLimit-Interval-Milliseconds")
+        if limit and remaining and interval:
+            self.window.sync(int(limit), int(remaining), int(interval) / 1000)
+
+        daily_remaining = headers.get("X-HubSpot-RateLimit-Daily-Remaining")
+        if daily_remaining is not None:
+            with self._lock:
+                self.daily_remaining = int(daily_remaining)
+                if self.daily_remaining > 0:
+                    self.daily_reset_at = None
+                elif status == 429 and headers.get("Retry-After"):
+                    self.daily_reset_at = time.time() + float(headers["Retry-After"])
+                else:
+                    self.daily_reset_at = self.next_daily_reset(time.time())
+
+        if status == 429:
+            retry_after = float(headers.get("Retry-After", 1))
+            bucket = self.search if self.is_search(url) else self.window
+            bucket.pause(retry_after)
+            logger.warning(
+                f"Rate limit exceeded for {url}. Pausing HubSpot calls for {retry_after} seconds.")
+
+    def stats(self):
+        return {
+            "window_tokens": round(self.window.tokens, 2),
+            "search_tokens": round(self.search.tokens, 2),
+            "daily_remaining": self.daily_remaining,
+            "daily_reset_at": self.daily_reset_at,
+        }
+
+
+_governor = None
+_governor_lock = threading.Lock()
+
+
+def get_governor():
+    """Return the rate-limit governor shared by all HubSpot traffic in this process."""
+    global _governor
+
+    if _governor is None:
+        with _governor_lock:
+            if _governor is None:
+                _governor = RateLimitGovernor(
+                    Config.HUBSPOT_RATE_LIMIT_MAX,
+                    Config.HUBSPOT_RATE_LIMIT_INTERVAL,
+                    Config.HUBSPOT_SEARCH_RATE_LIMIT_MAX,
+                    Config.HUBSPOT_SEARCH_RATE_LIMIT_INTERVAL,
+                    burst=Config.HUBSPOT_RATE_LIMIT_BURST
+                )
+
+    return _governor
+
+
+def _reset_after_fork():
+    global _governor, _governor_lock
+
+    _governor_lock = threading.Lock()
+    _governor = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
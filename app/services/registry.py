@@ -0,0 +1,68 @@
+import os
+import threading
+import logging
+from app.services.contact_service import ContactService
+from app.services.deal_service import DealService
+from app.services.support_ticket_service import SupportTicketService
+
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceRegistry:
+    """Per-process registry that builds HubSpot services on first use."""
+
+    def __init__(self):
+        self._factories = {}
+        self._instances = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, factory):
+        self._factories[name] = factory
+
+    def get(self, name):
+        """Return the service for this process, building it if needed."""
+        service = self._instances.get(name)
+        if service is not None:
+            return service
+
+        with self._lock:
+            service = self._instances.get(name)
+            if service is None:
+                logger.info(f"Building HubSpot service: {name}")
+                service = self._factories[name]()
+                self._instances[name] = service
+
+        return service
+
+    def warm(self):
+        """Build every registered service, e.g. from a post-fork hook."""
+        for name in self._factories:
+            self.get(name)
+
+    def reset(self):
+        """Forget services inherited from a parent process."""
+        self._lock = threading.Lock()
+        self._instances = {}
+
+
+services = ServiceRegistry()
+services.register("contacts", ContactService)
+services.register("deals", DealService)
+services.register("tickets", SupportTicketService)
+
+
+def get_contact_service():
+    return services.get("contacts")
+
+
+def get_deal_service():
+    return services.get("deals")
+
+
+def get_ticket_service():
+    return services.get("tickets")
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=services.reset)
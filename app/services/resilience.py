@@ -0,0 +1,177 @@
+import os
+import re
+import time
+import random
+import threading
+import logging
+from urllib.parse import urlsplit
+from app.config import Config
+
+
+logger = logging.getLogger(__name__)
+
+# Object IDs in a path are collapsed so one breaker covers an endpoint
+_ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+# POST endpoints that only read (or upsert by a unique key) and can be repeated
+_IDEMPOTENT_POST_SUFFIXES = ("/search", "/batch/read", "/batch/upsert")
+_IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "PATCH", "DELETE"}
+
+RETRYABLE_STATUSES = {500, 502, 503, 504}
+
+
+class HubSpotUnavailableError(Exception):
+    """Raised when HubSpot cannot be reached or is failing."""
+
+
+class CircuitOpenError(HubSpotUnavailableError):
+    """Raised instead of calling an endpoint whose circuit is open."""
+
+    def __init__(self, endpoint, retry_after):
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+        super().__init__(
+            f"HubSpot endpoint {endpoint} is unavailable. Retry in {retry_after:.0f} seconds.")
+
+
+def endpoint_key(method, url):
+    """Group calls by method and path template, e.g. `PATCH /crm/v3/objects/contacts/{id}`."""
+    path = _ID_SEGMENT.sub("/{id}", urlsplit(url).path)
+    return f"{method.upper()} {path}"
+
+
+def is_idempotent(method, url):
+    """Whether repeating a call that may have reached HubSpot is safe."""
+    method = method.upper()
+    if method in _IDEMPOTENT_METHODS:
+        return True
+
+    return method == "POST" and urlsplit(url).path.endswith(_IDEMPOTENT_POST_SUFFIXES)
+
+
+class RetryPolicy:
+    """Capped, deadline-bound retries with full-jitter exponential backoff."""
+
+    def __init__(self, max_attempts=4, base_delay=0.25, max_delay=5, deadline=20):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+
+    def backoff(self, attempt):
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def next_delay(self, attempt, started, delay=None):
+        """Delay before the next attempt, or None when retries are used up."""
+        if attempt + 1 >= self.max_attempts:
+            return None
+
+        delay = self.backoff(attempt) if delay is None else delay
+        if time.monotonic() + delay - started > self.deadline:
+            return None
+
+        return delay
+
+
+class CircuitBreaker:
+    """Per-endpoint breaker: opens after repeated failures, then lets one probe through."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, endpoint, failure_threshold=5, reset_timeout=30):
+        self.endpoint = endpoint
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """Raise CircuitOpenError unless the call may go ahead."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+
+            # opened_at is also when the last probe went out, so a probe that never
+            # reported back is replaced after another reset_timeout
+            elapsed = time.monotonic() - self.opened_at
+            if elapsed >= self.reset_timeout:
+                # Let a single probe through to test whether HubSpot has recovered
+                self.state = self.HALF_OPEN
+                self.opened_at = time.monotonic()
+                return
+
+            raise CircuitOpenError(self.endpoint, max(self.reset_timeout - elapsed, 1))
+
+    def record_success(self):
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info(f"Circuit for {self.endpoint} closed")
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.error(
+                        f"Circuit for {self.endpoint} opened after {self.failures} failures")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+_retry_policy = None
+
+
+def get_breaker(endpoint):
+    """Return the circuit breaker for an endpoint key."""
+    breaker = _breakers.get(endpoint)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.setdefault(endpoint, CircuitBreaker(
+                endpoint,
+                failure_threshold=Config.HUBSPOT_CIRCUIT_FAILURE_THRESHOLD,
+                reset_timeout=Config.HUBSPOT_CIRCUIT_RESET_TIMEOUT
+            ))
+    return breaker
+
+
+def get_retry_policy():
+    global _retry_policy
+
+    if _retry_policy is None:
+        _retry_policy = RetryPolicy(
+            max_attempts=Config.HUBSPOT_RETRY_MAX_ATTEMPTS,
+            base_delay=Config.HUBSPOT_RETRY_BASE_DELAY,
+            max_delay=Config.HUBSPOT_RETRY_MAX_DELAY,
+            deadline=Config.HUBSPOT_RETRY_DEADLINE
+        )
+    return _retry_policy
+
+
+def breaker_states():
+    """Snapshot of every breaker that is not closed."""
+    return {
+        endpoint: breaker.state
+        for endpoint, breaker in list(_breakers.items())
+        if breaker.state != CircuitBreaker.CLOSED
+    }
+
+
+def _reset_after_fork():
+    global _breakers, _breakers_lock
+
+    _breakers = {}
+    _breakers_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -1,4 +1,3 @@
-from hubspot import HubSpot
 from hubspot.crm.tickets import ApiException
 from app.services import HubSpotClient
 from app.config import Config
@@ -11,10 +10,11 @@ class SupportTicketService(HubSpotClient):
     def __init__(self):
         # Initialize HubSpot client with OAuth access token
         super().__init__()
-        self.client = HubSpot(access_token=self.access_token)
+        self.client = self._build_sdk_client()
 
-    def create_ticket(self, data):
-        """Create a new support ticket in HubSpot."""
+    @staticmethod
+    def ticket_payload(data):
+        """Build the HubSpot ticket payload, with associations, from a request body."""
         ticket_data = {
             "properties": {
                 "subject": data['properties'].get("subject"),
@@ -61,7 +61,11 @@ class SupportTicketService(HubSpotClient):
                     ]
                 })
 
+        return ticket_data
 
+    def create_ticket(self, data):
+        """Create a new support ticket in HubSpot."""
+        ticket_data = self.ticket_payload(self._with_contact_id(data))
         try:
             response = self.client.crm.tickets.basic_api.create(ticket_data)
             logger.info(f"Ticket created successfully: {response}")
@@ -71,14 +75,53 @@ class SupportTicketService(HubSpotClient):
                 f"Failed to create ticket: {e.status}, Response: {e.body}")
             return {"error": "Ticket creation failed", "status_code": e.status, "response": e.body}
 
+    def batch_create_tickets(self, items):
+        """Create tickets, with their associations, in batches; returns one result per item."""
+        items, unresolved = self._with_contact_ids(items)
+
+        # The trace ID ties each created ticket or error back to its input
+        inputs = [
+            {**self.ticket_payload(item), "objectWriteTraceId": str(index)}
+            for index, item in enumerate(items) if index not in unresolved
+        ]
+
+        results, failures, errors = self._post_batch("/crm/v3/objects/tickets/batch/create", inputs)
 
-    def get_recent_tickets(self, page, page_size):
-        """Retrieve recently created tickets."""
+        created = {
+            ticket["objectWriteTraceId"]: ticket["id"]
+            for ticket in results if ticket.get("objectWriteTraceId")
+        }
+        failed = {item["objectWriteTraceId"]: message for item, message in failures}
+
+        outcome = []
+        for index in range(len(items)):
+            trace_id = str(index)
+            if index in unresolved:
+                outcome.append({"status": "error", "error": unresolved[index]})
+            elif trace_id in created:
+                outcome.append({"status": "created", "id": created[trace_id]})
+            elif trace_id in failed:
+                outcome.append({"status": "error", "error": failed[trace_id]})
+            elif not errors:
+                # Accepted in a batch with no errors, but HubSpot did not echo the trace ID
+                outcome.append({"status": "created", "id": None})
+            else:
+                outcome.append({"status": "error", "error": self._batch_error(trace_id, errors)})
+
+        logger.info(
+            f"Batch created {sum(r['status'] == 'created' for r in outcome)} of {len(items)} tickets")
+        return outcome
+
+    def get_recent_tickets(self, page_size, after=None):
+        """Retrieve a page of recently created tickets and the cursor for the next page."""
         try:
-            response = self.client.crm.tickets.basic_api.get_page(
-                limit=page_size, after=page * page_size)
-            return response.results
+            return self._get_page("tickets", page_size, after)
         except ApiException as e:
             logger.error(
                 f"Error fetching recent tickets. Status code: {e.status}, Response: {e.body}")
-            return []
+            # An empty page would be cached as a good response
+            raise
+
+    def iter_tickets(self, page_size=100, after=None, properties=None, prefetch=1):
+        """Lazily walk every ticket page by page, yielding (results, next_after)."""
+        return self._iter_pages("tickets", page_size, after, properties, prefetch)
@@ -0,0 +1,176 @@
+import os
+import time
+import threading
+import weakref
+import logging
+from app.config import Config
+from app.services.http import get_session, request_timeout
+
+
+logger = logging.getLogger(__name__)
+
+TOKEN_URL = "https://api.hubapi.com/oauth/v1/token"
+
+
+class TokenManager:
+    """Process-wide HubSpot OAuth access token with early, single-flight refresh."""
+
+    def __init__(self, client_id, client_secret, refresh_token, refresh_margin=300):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.refresh_token = refresh_token
+        self.refresh_margin = refresh_margin
+
+        self._access_token = None
+        self._expires_at = 0
+        self._lock = threading.Lock()
+        self._state_lock = threading.Lock()
+        self._refreshing = False
+        self._clients = weakref.WeakSet()
+
+    def current_token(self):
+        """Return the cached token if it is still valid, without blocking; else None."""
+        now = time.monotonic()
+        token = self._access_token
+
+        if token and now < self._expires_at - self.refresh_margin:
+            return token
+
+        if token and now < self._expires_at:
+            # Still valid, so keep serving it while one thread refreshes early
+            self._refresh_in_background()
+            return token
+
+        return None
+
+    def get_token(self):
+        """Return a valid access token, refreshing it only when needed."""
+        return self.current_token() or self.refresh(stale_token=self._access_token)
+
+    def refresh(self, stale_token=None):
+        """Refresh the token; concurrent callers wait for a single refresh."""
+        with self._lock:
+            # Someone else refreshed while we were waiting for the lock
+            if self._access_token and self._access_token != stale_token \
+                    and time.monotonic() < self._expires_at:
+                return self._access_token
+
+            return self._fetch_token()
+
+    def invalidate(self, token):
+        """Mark a token rejected by HubSpot (401) and return a fresh one."""
+        logger.warning("Access token rejected by HubSpot. Refreshing token.")
+        return self.refresh(stale_token=token)
+
+    def bind(self, client):
+        """Keep an SDK client's access token in step with future refreshes."""
+        client.config["access_token"] = self.get_token()
+        self._clients.add(client)
+        return client
+
+    def _refresh_in_background(self):
+        with self._state_lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        stale_token = self._access_token
+        thread = threading.Thread(
+            target=self._background_refresh, args=(stale_token,), daemon=True)
+        thread.start()
+
+    def _background_refresh(self, stale_token):
+        try:
+            self.refresh(stale_token=stale_token)
+        except Exception as e:
+            logger.error(f"Background token refresh failed: {str(e)}")
+        finally:
+            self._refreshing = False
+
+    def token_request(self):
+        """URL and form payload that exchange the refresh token for an access token."""
+        payload = {
+            "grant_type": "refresh_token",
+            "client_id": self.client_id,
+            "client_secret": self.client_secret,
+            "refresh_token": self.refresh_token
+        }
+        return TOKEN_URL, payload
+
+    def store(self, data):
+        """Record a token response from HubSpot and hand it to bound clients."""
+        self._access_token = data.get('access_token')
+        self._expires_at = time.monotonic() + int(data.get('expires_in', 1800))
+        logger.info(
+            f"Access token obtained successfully: {self._access_token[:10]}... "
+            f"(expires in {data.get('expires_in')}s)")
+
+        # Hand the new token to SDK clients that were already built
+        for client in list(self._clients):
+            client.config["access_token"] = self._access_token
+
+        return self._access_token
+
+    def expire(self, token):
+        """Forget a rejected token so the next caller fetches a new one."""
+        if token == self._access_token:
+            self._expires_at = 0
+
+    def _fetch_token(self):
+        """Exchange the refresh token for a new access token. Caller holds the lock."""
+        url, payload = self.token_request()
+        response = get_session().post(url, data=payload, timeout=request_timeout())
+
+        if response.status_code != 200:
+            logger.error(
+                f"Failed to get access token. Status code: {response.status_code}, Response: {response.text}")
+            raise Exception("Unable to get access token")
+
+        return self.store(response.json())
+
+    def _reset_after_fork(self):
+        """Re-create locks in a forked child; the token itself stays usable."""
+        self._lock = threading.Lock()
+        self._state_lock = threading.Lock()
+        self._refreshing = False
+
+
+_token_manager = None
+_token_manager_lock = threading.Lock()
+
+
+def get_token_manager():
+    """Return the token manager shared by every HubSpot client in this process."""
+    global _token_manager
+
+    if _token_manager is None:
+        with _token_manager_lock:
+            if _token_manager is None:
+                _token_manager = TokenManager(
+                    Config.HUBSPOT_CLIENT_ID,
+                    Config.HUBSPOT_CLIENT_SECRET,
+                    Config.HUBSPOT_REFRESH_TOKEN,
+                    refresh_margin=Config.HUBSPOT_TOKEN_REFRESH_MARGIN
+                )
+
+    return _token_manager
+
+
+def reset_token_manager():
+    """Forget the process's token manager so the next caller fetches a new token."""
+    global _token_manager
+
+    with _token_manager_lock:
+        _token_manager = None
+
+
+def _reset_after_fork():
+    global _token_manager_lock
+
+    _token_manager_lock = threading.Lock()
+    if _token_manager is not None:
+        _token_manager._reset_after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
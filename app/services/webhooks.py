@@ -0,0 +1,207 @@
+import os
+import hmac
+import time
+import queue
+import base64
+import hashlib
+import logging
+import threading
+from app.config import Config
+from app.services.mirror import MirrorSync
+from app.utils.cache import TTLCache
+
+
+logger = logging.getLogger(__name__)
+
+# Subscription type prefixes (e.g. "contact.propertyChange") and their mirrored object types
+OBJECT_TYPES = {
+    "contact": "contacts",
+    "deal": "deals",
+    "ticket": "tickets",
+}
+
+_processor = None
+_processor_lock = threading.Lock()
+
+
+def verify_signature(secret, method, url, body, signature, timestamp, max_age=300):
+    """Check a HubSpot v3 signature: base64 HMAC-SHA256 of method, URL, body and timestamp."""
+    if not secret or not signature or not timestamp:
+        return False
+
+    try:
+        # The timestamp is in milliseconds; old requests are rejected to prevent replays
+        if abs(time.time() - int(timestamp) / 1000) > max_age:
+            return False
+    except ValueError:
+        return False
+
+    if isinstance(body, bytes):
+        body = body.decode("utf-8")
+
+    message = f"{method}{url}{body}{timestamp}".encode("utf-8")
+    expected = base64.b64encode(
+        hmac.new(secret.encode("utf-8"), message, hashlib.sha256).digest()).decode()
+    return hmac.compare_digest(expected, signature)
+
+
+def plan_changes(events):
+    """Reduce events to the objects to refresh and to delete, by object type.
+
+    The latest event for an object decides what happens to it, so a batch that
+    creates and then deletes an object only deletes it.
+    """
+    latest = {}
+
+    def note(object_type, object_id, action, occurred_at):
+        if object_type is None or object_id is None:
+            return
+        key = (object_type, str(object_id))
+        if key not in latest or latest[key][1] <= occurred_at:
+            latest[key] = (action, occurred_at)
+
+    for event in events:
+        prefix, _, change = (event.get("subscriptionType") or "").partition(".")
+        object_type = OBJECT_TYPES.get(prefix)
+        occurred_at = event.get("occurredAt") or 0
+
+        if change in ("deletion", "privacyDeletion"):
+            note(object_type, event.get("objectId"), "remove", occurred_at)
+        elif change == "merge":
+            # Merged-away objects are gone; the surviving object is re-read
+            for merged_id in event.get("mergedObjectIds") or []:
+                if str(merged_id) != str(event.get("primaryObjectId")):
+                    note(object_type, merged_id, "remove", occurred_at)
+            note(object_type, event.get("primaryObjectId") or event.get("objectId"), "refresh", occurred_at)
+        elif change == "associationChange":
+            # e.g. "CONTACT_TO_DEAL": both sides hold the association
+            to_prefix = (event.get("associationType") or "").partition("_TO_")[2].lower()
+            note(object_type, event.get("fromObjectId"), "refresh", occurred_at)
+            note(OBJECT_TYPES.get(to_prefix), event.get("toObjectId"), "refresh", occurred_at)
+        elif object_type is not None:
+            note(object_type, event.get("objectId"), "refresh", occurred_at)
+        else:
+            logger.warning(f"Ignoring webhook event of type {event.get('subscriptionType')}")
+
+    refresh, remove = {}, {}
+    for (object_type, object_id), (action, _) in latest.items():
+        target = refresh if action == "refresh" else remove
+        target.setdefault(object_type, []).append(object_id)
+
+    return refresh, remove
+
+
+class WebhookProcessor:
+    """Bounded queue of webhook events, applied to the mirror by one background thread."""
+
+    def __init__(self, app, maxsize=10000, batch_size=100, dedupe_ttl=86400):
+        self.app = app
+        self.batch_size = batch_size
+        self.events = queue.Queue(maxsize)
+        self.seen = TTLCache(maxsize=maxsize * 10, ttl=dedupe_ttl)
+        self.processed = 0
+        self.duplicates = 0
+        self.failed = 0
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, events):
+        """Queue events for processing; returns False if the queue is full."""
+        self._start()
+        try:
+            for event in events:
+                self.events.put_nowait(event)
+        except queue.Full:
+            # HubSpot retries the whole batch; already-queued events are deduplicated
+            return False
+        return True
+
+    def _start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="hubspot-webhooks", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self.events.get()]
+            try:
+                while len(batch) < self.batch_size:
+                    batch.append(self.events.get_nowait())
+            except queue.Empty:
+                pass
+
+            try:
+                with self.app.app_context():
+                    self.apply(batch)
+            except Exception as e:
+                # Missed changes are picked up by the next `flask sync-hubspot`
+                self.failed += len(batch)
+                logger.error(f"Applying {len(batch)} webhook events failed: {str(e)}")
+            finally:
+                for _ in batch:
+                    self.events.task_done()
+
+    def apply(self, events):
+        """Apply events to the mirror and ID caches, skipping ones already applied."""
+        fresh = []
+        for event in events:
+            event_id = event.get("eventId")
+            if event_id is not None and self.seen.get(event_id) is not None:
+                self.duplicates += 1
+                continue
+            fresh.append(event)
+
+        refresh, remove = plan_changes(fresh)
+        sync = MirrorSync()
+        if refresh:
+            sync.refresh(refresh)
+        if remove:
+            sync.remove(remove)
+
+        self.seen.set_many({event["eventId"]: True for event in fresh if event.get("eventId") is not None})
+        self.processed += len(fresh)
+
+    def stats(self):
+        return {
+            "queued": self.events.qsize(),
+            "processed": self.processed,
+            "duplicates": self.duplicates,
+            "failed": self.failed,
+        }
+
+
+def get_processor(app):
+    """Return the process's webhook processor, creating it on first use."""
+    global _processor
+
+    if _processor is None:
+        with _processor_lock:
+            if _processor is None:
+                _processor = WebhookProcessor(
+                    app,
+                    maxsize=Config.HUBSPOT_WEBHOOK_QUEUE_SIZE,
+                    batch_size=Config.HUBSPOT_WEBHOOK_BATCH_SIZE,
+                    dedupe_ttl=Config.HUBSPOT_WEBHOOK_DEDUPE_TTL)
+
+    return _processor
+
+
+def webhook_stats():
+    return _processor.stats() if _processor is not None else None
+
+
+def _reset_after_fork():
+    global _processor, _processor_lock
+
+    # The consumer thread and its queue stay with the parent
+    _processor = None
+    _processor_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,157 @@
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire `ttl` seconds after they are set."""
+
+    def __init__(self, maxsize=10000, ttl=3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def get_many(self, keys):
+        """Cached values for the keys that are present, as a dict."""
+        found = {}
+        for key in keys:
+            value = self.get(key)
+            if value is not None:
+                found[key] = value
+        return found
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + (self.ttl if ttl is None else ttl))
+            self._entries.move_to_end(key)
+
+            # Evict the least recently used entries
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def set_many(self, mapping, ttl=None):
+        for key, value in mapping.items():
+            self.set(key, value, ttl)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            return default if entry is None else entry[0]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        return {"size": len(self), "hits": self.hits, "misses": self.misses}
+
+
+class ResponseCache:
+    """Serialized responses by key, with an ETag, served stale while one background refresh runs.
+
+    Entries younger than `fresh_for` seconds are served as they are. Until `stale_for`
+    they are served while a single thread recomputes them; after that they are
+    recomputed inline, and the last good entry is served for up to `stale_if_error`
+    seconds while recomputing fails.
+    """
+
+    def __init__(self, maxsize=256, fresh_for=5, stale_for=60, stale_if_error=86400):
+        self.fresh_for = fresh_for
+        self.stale_for = stale_for
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self._entries = TTLCache(maxsize, ttl=max(stale_for, stale_if_error))
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def etag(body):
+        return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+    def get(self, key, compute):
+        """Return (body, etag, state) for `key`; state is "hit", "stale" or "miss".
+
+        `compute` returns (body, ok); bodies that are not ok (e.g. partial results)
+        are never cached and give way to the last good entry if there is one.
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            body, etag, stored_at = entry
+            age = time.monotonic() - stored_at
+            if age < self.fresh_for:
+                return body, etag, "hit"
+            if age < self.stale_for:
+                self._refresh_in_background(key, compute)
+                return body, etag, "stale"
+
+        try:
+            fresh, ok = compute()
+        except Exception:
+            if entry is None:
+                raise
+            logger.warning(f"Recomputing {key} failed, serving the last good response")
+            return entry[0], entry[1], "stale"
+
+        if ok:
+            etag = self.etag(fresh)
+            self._entries.set(key, (fresh, etag, time.monotonic()))
+            return fresh, etag, "miss"
+        if entry is not None:
+            return entry[0], entry[1], "stale"
+        return fresh, self.etag(fresh), "miss"
+
+    def _refresh_in_background(self, key, compute):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        threading.Thread(target=self._refresh, args=(key, compute), daemon=True).start()
+
+    def _refresh(self, key, compute):
+        try:
+            body, ok = compute()
+            if ok:
+                self._entries.set(key, (body, self.etag(body), time.monotonic()))
+                self.refreshes += 1
+            else:
+                self.refresh_errors += 1
+        except Exception as e:
+            # Keep serving the last good entry until it expires
+            self.refresh_errors += 1
+            logger.warning(f"Background refresh of {key} failed: {str(e)}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        stats = self._entries.stats()
+        stats.update(refreshes=self.refreshes, refresh_errors=self.refresh_errors)
+        return stats
@@ -0,0 +1,236 @@
+import os
+import time
+import queue
+import threading
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from app.config import Config
+
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Return the bounded thread pool used for concurrent HubSpot calls."""
+    global _executor
+
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=Config.HUBSPOT_FANOUT_WORKERS,
+                    thread_name_prefix="hubspot-fanout"
+                )
+
+    return _executor
+
+
+def fan_out(calls, timeout):
+    """Run named calls concurrently; failed or timed-out calls are reported in `errors`."""
+    executor = get_executor()
+    futures = {name: executor.submit(call) for name, call in calls.items()}
+    deadline = time.monotonic() + timeout
+
+    results = {}
+    errors = {}
+    for name, future in futures.items():
+        try:
+            results[name] = future.result(timeout=max(deadline - time.monotonic(), 0))
+        except FutureTimeoutError:
+            future.cancel()
+            logger.error(f"Timed out after {timeout}s waiting for {name}")
+            errors[name] = f"Timed out after {timeout} seconds"
+        except Exception as e:
+            logger.error(f"Error fetching {name}: {str(e)}")
+            errors[name] = str(e)
+
+    return results, errors
+
+
+_DONE = object()
+
+
+def _put(pages, item, stop):
+    """Put onto a bounded queue unless the consumer has gone away."""
+    while not stop.is_set():
+        try:
+            pages.put(item, timeout=0.1)
+            return
+        except queue.Full:
+            continue
+
+
+def iter_pages(fetch_page, after=None, prefetch=1):
+    """Lazily yield (results, next_after) pages, fetching up to `prefetch` pages ahead.
+
+    `fetch_page(after)` returns one page and the cursor for the next one
+    (None on the last page). Closing the generator stops the prefetcher.
+    """
+    pages = queue.Queue(maxsize=max(prefetch, 1))
+    stop = threading.Event()
+
+    def produce():
+        cursor = after
+        try:
+            while not stop.is_set():
+                results, cursor = fetch_page(cursor)
+                _put(pages, (results, cursor), stop)
+                if not cursor:
+                    break
+        except Exception as e:
+            _put(pages, e, stop)
+        finally:
+            _put(pages, _DONE, stop)
+
+    threading.Thread(target=produce, name="hubspot-prefetch", daemon=True).start()
+
+    try:
+        while True:
+            page = pages.get()
+            if page is _DONE:
+                return
+            if isinstance(page, Exception):
+                raise page
+            yield page
+    finally:
+        stop.set()
+
+
+class _Flight:
+    def __init__(self, token):
+        self.token = token
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key.
+
+    Callers whose `token` matches the in-flight call wait for it and share its
+    result or exception. Callers with a different token (e.g. another payload
+    for the same email) wait for it to finish, then run their own call.
+    """
+
+    def __init__(self):
+        self.shared = 0
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, token=None):
+        while True:
+            with self._lock:
+                flight = self._flights.get(key)
+                if flight is None:
+                    flight = self._flights[key] = _Flight(token)
+                    break
+                if flight.token == token:
+                    self.shared += 1
+                    joined = True
+                else:
+                    joined = False
+
+            flight.done.wait()
+            if joined:
+                if flight.error is not None:
+                    raise flight.error
+                return flight.result
+
+        try:
+            flight.result = fn()
+            return flight.result
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def reset(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+
+
+class MicroBatcher:
+    """Collects the keys concurrent callers ask for over `window` seconds and looks them
+    all up with one `fetch(keys)` call.
+
+    `fetch` returns a dict of values by key; missing keys resolve to None, and an
+    exception stored as a value is raised to the callers of that key.
+    """
+
+    def __init__(self, fetch, window=0.01, max_size=100):
+        self.fetch = fetch
+        self.window = window
+        self.max_size = max_size
+        self.requests = 0
+        self.batches = 0
+        self._pending = {}
+        self._scheduled = False
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            self.requests += 1
+            future = self._pending.get(key)
+            if future is None:
+                future = self._pending[key] = Future()
+            # The first caller of a window waits it out, then looks up everything collected
+            lead = not self._scheduled
+            self._scheduled = True
+            full = len(self._pending) >= self.max_size
+
+        if full:
+            self._flush()
+        elif lead:
+            time.sleep(self.window)
+            self._flush()
+
+        return future.result()
+
+    def _flush(self):
+        with self._lock:
+            batch, self._pending = self._pending, {}
+            self._scheduled = False
+
+        if not batch:
+            return
+
+        self.batches += 1
+        try:
+            found = self.fetch(list(batch))
+        except Exception as e:
+            for future in batch.values():
+                future.set_exception(e)
+            return
+
+        for key, future in batch.items():
+            value = found.get(key)
+            if isinstance(value, Exception):
+                future.set_exception(value)
+            else:
+                future.set_result(value)
+
+    def stats(self):
+        return {"requests": self.requests, "batches": self.batches}
+
+
+# Create-or-update operations in flight in this process, keyed by lookup key
+upserts = SingleFlight()
+
+
+def _reset_after_fork():
+    global _executor, _executor_lock
+
+    # The parent's worker threads do not exist in the child
+    _executor = None
+    _executor_lock = threading.Lock()
+    upserts.reset()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,152 @@
+import re
+import json
+import zlib
+import codecs
+from datetime import date, datetime
+from werkzeug.exceptions import RequestEntityTooLarge
+
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_NUMBER_CONTINUATION = frozenset("0123456789.eE+-")
+
+
+class JSONStreamError(ValueError):
+    """The request body stopped being valid JSON part way through."""
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def ndjson_line(record):
+    """Encode one record as a newline-terminated JSON line."""
+    return (json.dumps(record, separators=(",", ":"), default=_json_default) + "\n").encode()
+
+
+def gzip_chunks(chunks, level=6):
+    """Gzip a stream of byte chunks, flushing after each so clients see data as it is sent."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+
+    yield compressor.flush()
+
+
+class CappedStream:
+    """Wrap a request stream so reading more than `limit` bytes raises 413."""
+
+    def __init__(self, stream, limit):
+        self.stream = stream
+        self.remaining = limit
+
+    def read(self, size=-1):
+        data = self.stream.read(size if size >= 0 and size <= self.remaining else self.remaining + 1)
+        self.remaining -= len(data)
+        if self.remaining < 0:
+            raise RequestEntityTooLarge()
+        return data
+
+
+class _Reader:
+    """UTF-8 text read from a byte stream on demand, keeping only the unparsed tail."""
+
+    def __init__(self, stream, chunk_size):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        self.decode = json.JSONDecoder().raw_decode
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        chunk = self.stream.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+        try:
+            text = self.decoder.decode(chunk, final=self.eof)
+        except UnicodeDecodeError as e:
+            raise JSONStreamError(f"Request body is not valid UTF-8: {e}") from e
+        self.buffer = self.buffer[self.pos:] + text
+        self.pos = 0
+        return not self.eof
+
+    def peek(self):
+        """The next non-whitespace character, or '' at the end of the body."""
+        while True:
+            self.pos = _WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise JSONStreamError(f"Expected '{char}' but found {found!r}" if found else f"Expected '{char}'")
+        self.pos += 1
+
+    def value(self):
+        """Decode the next JSON value, reading until it is complete."""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decode(self.buffer, self.pos)
+            except json.JSONDecodeError as e:
+                # Truncated by the end of the buffer unless the body has ended
+                if self.eof:
+                    raise JSONStreamError(str(e)) from e
+            else:
+                # A number cut off by the end of the buffer ("1." of "1.5e3") decodes early
+                if self.eof or type(value) not in (int, float) or \
+                        (end < len(self.buffer) and self.buffer[end] not in _NUMBER_CONTINUATION):
+                    self.pos = end
+                    return value
+            self.fill()
+
+
+def iter_json_array(stream, key=None, chunk_size=64 * 1024):
+    """Yield the items of a JSON array as they are read from `stream`.
+
+    With `key`, the body is an object whose `key` field, which must come first,
+    holds the array; other fields after it are read and ignored. Only the item
+    being decoded and one chunk of the body are held in memory. A body that is
+    not valid JSON raises JSONStreamError once parsing reaches the fault.
+    """
+    reader = _Reader(stream, chunk_size)
+
+    if key is not None:
+        reader.expect("{")
+        if reader.peek() != '"' or reader.value() != key:
+            raise JSONStreamError(f"'{key}' must be the first field")
+        reader.expect(":")
+
+    reader.expect("[")
+    if reader.peek() == "]":
+        reader.pos += 1
+    else:
+        while True:
+            yield reader.value()
+            if reader.peek() == ",":
+                reader.pos += 1
+                continue
+            reader.expect("]")
+            break
+
+    if key is not None:
+        while reader.peek() == ",":
+            reader.pos += 1
+            if reader.peek() != '"':
+                raise JSONStreamError("Expected a field name")
+            reader.value()
+            reader.expect(":")
+            reader.value()
+        reader.expect("}")
+
+    if reader.peek():
+        raise JSONStreamError("Unexpected data after the JSON document")
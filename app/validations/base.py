@@ -1,7 +1,13 @@
 from functools import wraps
-from flask import request, jsonify
+import inspect
+from flask import current_app, g, request, jsonify
+from werkzeug.exceptions import RequestEntityTooLarge
 import re
 import logging
+from app.config import Config
+from app.utils.streaming import CappedStream, iter_json_array
+
+EMAIL_PATTERN = re.compile(r"(^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$)")
 
 
 class ValidationError(Exception):
@@ -85,10 +91,19 @@ class Validator:
     def validate_email(data, field_name):
         """Basic email format check."""
         email = data.get(field_name)
-        if email:
-            email_regex = r"(^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$)"
-            if not re.match(email_regex, email):
-                raise ValidationError({field_name: "Invalid email format."})
+        if email and not EMAIL_PATTERN.match(email):
+            raise ValidationError({field_name: "Invalid email format."})
+
+    @staticmethod
+    def validate_custom(data, field, validator_func, message):
+        """Validate a field with a predicate; `message` may use {field_name}"""
+        if field not in data:
+            return
+
+        if not validator_func(data[field]):
+            raise ValidationError({field: message.format(field_name=field)})
+
+        return True
 
     @staticmethod
     def validate_range(data, field_name, min_value=None, max_value=None):
@@ -112,40 +127,113 @@ class Validator:
 
         return True
 
+    @staticmethod
+    def validate_inputs(data, max_items):
+        """Validate a batch body: a non-empty `inputs` list of at most max_items entries"""
+        inputs = data.get('inputs')
 
-def validate_request(validator_method):
+        if not isinstance(inputs, list) or not inputs:
+            raise ValidationError({'inputs': "inputs must be a non-empty list"})
+
+        if len(inputs) > max_items:
+            raise ValidationError(
+                {'inputs': f"inputs must contain no more than {max_items} items"})
+
+        return True
+
+
+def _limit_body():
+    """Raise 413 for a body over MAX_CONTENT_LENGTH, including one of unknown length."""
+    limit = current_app.config.get('MAX_CONTENT_LENGTH')
+    if not limit:
+        return
+
+    if request.content_length is not None:
+        if request.content_length > limit:
+            raise RequestEntityTooLarge()
+    else:
+        # Chunked uploads are cut off once they pass the limit
+        request.stream = CappedStream(request.stream, limit)
+
+
+def _streams(stream):
+    """Whether this body should be parsed item by item instead of all at once."""
+    if stream is None or not request.is_json:
+        return False
+    return request.content_length is None or request.content_length >= Config.HUBSPOT_STREAM_MIN_BYTES
+
+
+def _check_request(validator_method, stream=None):
+    """Validate the JSON body and store it in `g.payload`; return an error response, or None if it is valid."""
+    logger = logging.getLogger(__name__)
+    try:
+        _limit_body()
+
+        if _streams(stream):
+            # The view validates the `stream` items as they are parsed
+            g.payload = {stream: iter_json_array(request.stream, key=stream)}
+            return None
+
+        data = g.payload = request.get_json()
+        if not data:
+            logger.warning(
+                "Request validation failed: No JSON data provided")
+            return jsonify({
+                'error': 'Invalid request format',
+                'details': 'Request must contain valid JSON data'
+            }), 422
+
+        # Apply the validator
+        validator_method(data)
+
+    except ValidationError as e:
+        logger.warning(f"Request validation failed: {e.errors}")
+        return jsonify({
+            'error': 'Validation error',
+            'details': e.errors
+        }), 422
+
+    except RequestEntityTooLarge:
+        logger.warning(f"Request rejected: body larger than {current_app.config['MAX_CONTENT_LENGTH']} bytes")
+        return jsonify({
+            'error': 'Payload too large',
+            'details': f"Request body must be no more than {current_app.config['MAX_CONTENT_LENGTH']} bytes"
+        }), 413
+
+    except Exception as e:
+        logger.error(f"Unexpected error during validation: {str(e)}")
+        return jsonify({
+            'error': 'Invalid request',
+            'details': str(e)
+        }), 400
+
+    return None
+
+
+def validate_request(validator_method, stream=None):
+    """Validate the JSON body before the view runs; the view reads it from `g.payload`.
+
+    With `stream`, a large body is not parsed up front: `g.payload[stream]` is an
+    iterator over that field's array, parsed as it is read.
+    """
     def decorator(f):
+        # Errors raised by the view itself are left to the blueprint's error handlers
+        if inspect.iscoroutinefunction(f):
+            @wraps(f)
+            async def decorated_coroutine(*args, **kwargs):
+                error = _check_request(validator_method, stream)
+                if error is not None:
+                    return error
+                return await f(*args, **kwargs)
+
+            return decorated_coroutine
+
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            logger = logging.getLogger(__name__)
-            try:
-                data = request.get_json()
-                if not data:
-                    logger.warning(
-                        "Request validation failed: No JSON data provided")
-                    return jsonify({
-                        'error': 'Invalid request format',
-                        'details': 'Request must contain valid JSON data'
-                    }), 422
-
-                # Apply the validator
-                validator_method(data)
-
-                return f(*args, **kwargs)
-
-            except ValidationError as e:
-                logger.warning(f"Request validation failed: {e.errors}")
-                return jsonify({
-                    'error': 'Validation error',
-                    'details': e.errors
-                }), 422
-
-            except Exception as e:
-                logger.error(f"Unexpected error during validation: {str(e)}")
-                return jsonify({
-                    'error': 'Invalid request',
-                    'details': str(e)
-                }), 400
+            error = _check_request(validator_method, stream)
+            if error is not None:
+                return error
+            return f(*args, **kwargs)
 
         return decorated_function
     return decorator
@@ -1,41 +1,35 @@
-from .base import Validator, ValidationError
+from app.config import Config
+from .base import Validator
+from .schema import Schema
 
 
 class ContactValidator(Validator):
     # Validator for contact operations
 
+    registration_schema = Schema({
+        "properties": {
+            "required": True,
+            "type": dict,
+            "message": "Missing 'properties' in payload",
+            "fields": {
+                "email": {"required": True, "min_length": 3, "max_length": 80},
+                "firstname": {"required": True, "min_length": 2, "max_length": 80},
+                "lastname": {"required": True, "min_length": 2, "max_length": 80},
+                "phone": {"required": True, "label": "Phone", "min_length": 8, "max_length": 13},
+            },
+        },
+    })
+
+    # The email is the upsert key, so it must be well formed
+    batch_item_schema = registration_schema.extend({
+        "properties": {"fields": {"email": {"label": "Email", "email": True}}},
+    })
+
     @classmethod
     def validate_registration(cls, data):
+        return cls.registration_schema.validate(data)
 
-        # Ensure the 'properties' key exists
-        if 'properties' not in data:
-            raise ValidationError("Missing 'properties' in payload")
-
-        properties = data['properties']
-
-        # Check required fields inside 'properties'
-        cls.validate_required(
-            properties, ["email", "firstname", "lastname", "phone"])
-
-        # Validate email
-        cls.validate_length(
-            data, "email", min_length=3, max_length=80
-        )
-
-        # Validate firstname
-        cls.validate_length(
-            data, "firstname", min_length=2, max_length=80
-        )
-
-        # Validate lastname
-        cls.validate_length(
-            data, "lastname", min_length=2, max_length=80
-        )
-
-        # Validate phone
-        cls.validate_length(
-            data, "phone", min_length=8, max_length=13
-        )
-        cls.validate_type(data, "phone", str, field_name="Phone")
-
-        return True
+    @classmethod
+    def validate_batch(cls, data):
+        # Each contact is validated separately so one bad record does not fail the batch
+        return cls.validate_inputs(data, Config.HUBSPOT_BATCH_MAX_ITEMS)
@@ -1,37 +1,43 @@
-from .base import Validator, ValidationError
+from app.config import Config
+from .base import Validator
+from .schema import Schema
 
 
 class DealValidator(Validator):
     # Validator for deal operations
 
+    create_deal_schema = Schema({
+        "properties": {
+            "required": True,
+            "type": dict,
+            "message": "Missing 'properties' in payload",
+            "fields": {
+                "dealname": {"required": True, "min_length": 3, "max_length": 5000},
+                # Amount must be a number and not negative
+                "amount": {"required": True, "min_value": 0},
+                "dealstage": {"required": True, "min_length": 3, "max_length": 5000},
+                # The contact may be given by email instead of ID
+                "contact_id": {"required": True, "required_unless": "contact_email",
+                               "min_length": 3, "max_length": 5000},
+                "contact_email": {"email": True},
+                "pipeline": {"required": True, "min_length": 3, "max_length": 5000},
+            },
+        },
+    })
+
+    # Batch deals are associated by contact ID, and the deal name is the lookup key
+    batch_item_schema = create_deal_schema.extend({
+        "properties": {"fields": {
+            "dealname": {"label": "Deal name"},
+            "contact_id": {"required_unless": None},
+        }},
+    })
+
     @classmethod
     def validate_create_deal(cls, data):
-        # Ensure the 'properties' key exists
-        if 'properties' not in data:
-            raise ValidationError("Missing 'properties' in payload")
-
-        properties = data['properties']
-
-        # Check required fields inside 'properties'
-        cls.validate_required(
-            properties, ["dealname", "amount", "dealstage", "contact_id", "pipeline"])
-
-        # Validate dealname
-        cls.validate_length(data, "dealname", min_length=3, max_length=5000)
-
-        # Validate amount (should be a valid number)
-        cls.validate_is_number(data, "amount")
+        return cls.create_deal_schema.validate(data)
 
-        # Optional: Ensure amount is not negative
-        cls.validate_range(data, "amount", min_value=0)
-
-        # Validate dealstage
-        cls.validate_length(data, "dealstage", min_length=3, max_length=5000)
-
-        # Validate contact_id
-        cls.validate_length(data, "contact_id", min_length=3, max_length=5000)
-
-        # Validate pipeline
-        cls.validate_length(data, "pipeline", min_length=3, max_length=5000)
-
-        return True
+    @classmethod
+    def validate_batch(cls, data):
+        # Each deal is validated separately so one bad record does not fail the batch
+        return cls.validate_inputs(data, Config.HUBSPOT_BATCH_MAX_ITEMS)
@@ -1,50 +1,34 @@
-from .base import Validator, ValidationError
+from app.config import Config
+from .base import Validator
+from .schema import Schema
 
 
 class SupportTicketValidator(Validator):
     # Validator for support-ticket operations
 
+    create_ticket_schema = Schema({
+        "properties": {
+            "required": True,
+            "type": dict,
+            "message": "Missing 'properties' in payload",
+            "fields": {
+                "subject": {"required": True, "min_length": 3, "max_length": 500},
+                "description": {"required": True, "min_length": 3, "max_length": 5000},
+                "category": {"required": True, "min_length": 3, "max_length": 100},
+                "pipeline": {"required": True, "min_length": 1, "max_length": 50},
+                "hs_ticket_priority": {"required": True, "min_length": 1, "max_length": 50},
+                "hs_pipeline_stage": {"required": True, "min_length": 1, "max_length": 50},
+                # The contact may be given by email instead of ID
+                "contact_email": {"email": True},
+            },
+        },
+    })
+
     @classmethod
     def validate_create_support_ticket(cls, data):
-        # Ensure the 'properties' key exists
-        if 'properties' not in data:
-            raise ValidationError("Missing 'properties' in payload")
-
-        properties = data['properties']
-
-        # Check required fields inside 'properties'
-        cls.validate_required(properties,
-                              [
-                                  "subject",
-                                  "description",
-                                  "category",
-                                  "pipeline",
-                                  "hs_ticket_priority",
-                                  "hs_pipeline_stage",
-                              ])
-
-        # Validate subject
-        cls.validate_length(properties, "subject",
-                            min_length=3, max_length=500)
-
-        # Validate description
-        cls.validate_length(properties, "description",
-                            min_length=3, max_length=5000)
+        return cls.create_ticket_schema.validate(data)
 
-        # Validate category
-        cls.validate_length(properties, "category",
-                            min_length=3, max_length=100)
-
-        # Validate pipeline
-        cls.validate_length(properties, "pipeline",
-                            min_length=1, max_length=50)
-
-        # Validate hs_ticket_priority
-        cls.validate_length(properties, "hs_ticket_priority",
-                            min_length=1, max_length=50)
-
-        # Validate hs_pipeline_stagec
-        cls.validate_length(properties, "hs_pipeline_stage",
-                            min_length=1, max_length=50)
-
-        return True
+    @classmethod
+    def validate_batch(cls, data):
+        # Each ticket is validated separately so one bad record does not fail the batch
+        return cls.validate_inputs(data, Config.HUBSPOT_BATCH_MAX_ITEMS)
@@ -1,44 +1,41 @@
-import re
-from .base import Validator, ValidationError
+from .base import Validator
+from .schema import Schema
 
 
 class UserValidator(Validator):
     # Validator for user operations
 
+    registration_schema = Schema({
+        "username": {
+            "required": True,
+            "label": "Username",
+            "min_length": 3,
+            "max_length": 80,
+            "pattern": r"^[A-Za-z0-9_.-]+$",
+            "pattern_message": "Username may only contain letters, digits, '_', '.' and '-'",
+        },
+        "password": {
+            "required": True,
+            "label": "Password",
+            "min_length": 8,
+            # Password complexity: at least one uppercase, one lowercase, and one digit
+            "pattern": r"^(?=.*[A-Z])(?=.*[a-z])(?=.*[0-9])",
+            "pattern_message": "Password must contain at least one uppercase letter, one lowercase letter, and one digit",
+        },
+    })
+
+    login_schema = Schema({
+        "username": {"required": True},
+        "password": {"required": True},
+    })
+
     @classmethod
     def validate_user_registration(cls, data):
+        return cls.registration_schema.validate(data)
 
-        # Check required fields
-        cls.validate_required(data, ["username", "password"])
-
-        # Validate username
-        cls.validate_length(
-            data, "username", min_length=3, max_length=80, field_name="Username"
-        )
-
-        # Validate password
-        cls.validate_length(data, "password", min_length=8, field_name="Password")
-
-        # Password complexity
-        if "password" in data and data["password"]:
-            password = data["password"]
-
-            # Check for at least one uppercase, one lowercase, and one digit
-            if not (
-                re.search(r"[A-Z]", password)
-                and re.search(r"[a-z]", password)
-                and re.search(r"[0-9]", password)
-            ):
-                raise ValidationError(
-                    {
-                        "password": "Password must contain at least one uppercase letter, one lowercase letter, and one digit"
-                    }
-                )
-
-        return True
+    # Same name as ContactValidator.validate_registration
+    validate_registration = validate_user_registration
 
     @classmethod
     def validate_login(cls, data):
-
-        cls.validate_required(data, ["username", "password"])
-        return True
+        return cls.login_schema.validate(data)
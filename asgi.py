@@ -0,0 +1,48 @@
+"""ASGI entry point for the application.
+
+    uvicorn asgi:application --workers 2
+
+Each request runs the Flask app in its own thread, and the async views in
+`/api/async` are scheduled on the server's event loop, so their HubSpot
+calls overlap and share one pooled client per worker. The client is kept
+between requests once the lifespan startup event has run on that loop and
+is closed on shutdown. The startup event also starts the job workers.
+"""
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+from app import create_app
+from app.routes.integration_async import hubspot
+from app.services.jobs import start_workers
+
+
+class ConcurrentWsgiToAsgiInstance(WsgiToAsgiInstance):
+    # asgiref runs every request through one shared thread by default
+    run_wsgi_app = sync_to_async(
+        WsgiToAsgiInstance.__dict__["run_wsgi_app"].func, thread_sensitive=False)
+
+
+class Application(WsgiToAsgi):
+    """WsgiToAsgi that serves requests concurrently and handles lifespan events."""
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self.lifespan(receive, send)
+            return
+
+        await ConcurrentWsgiToAsgiInstance(self.wsgi_application)(scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                hubspot.share_loop()
+                start_workers(self.wsgi_application)
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await hubspot.aclose()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+app = create_app()
+application = Application(app)
@@ -0,0 +1,47 @@
+"""Measure worker cold start and first-request latency.
+
+Run from the repository root with a populated .env:
+
+    python benchmarks/startup.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+
+def timed(label, fn):
+    start = time.perf_counter()
+    result = fn()
+    print(f"{label:<45} {(time.perf_counter() - start) * 1000:8.1f} ms")
+    return result
+
+
+def main():
+    from app import create_app
+    from app.services.registry import services
+    from app.services.token_manager import get_token_manager, reset_token_manager
+
+    app = timed("create_app() (no outbound calls)", create_app)
+    client = app.test_client()
+
+    timed("first GET /health", lambda: client.get('/health'))
+
+    # This is the cost that used to be paid at import time, before the app existed
+    timed("service warm-up (token + SDK clients)", services.warm)
+
+    # Cold start again: no services and no token
+    services.reset()
+    reset_token_manager()
+    timed("token fetch alone", lambda: get_token_manager().get_token())
+    reset_token_manager()
+
+    timed("first GET /api/new_crm_objects (lazy build + token)",
+          lambda: client.get('/api/new_crm_objects?page_size=1'))
+    timed("second GET /api/new_crm_objects (warm)",
+          lambda: client.get('/api/new_crm_objects?page_size=1'))
+
+
+if __name__ == '__main__':
+    main()
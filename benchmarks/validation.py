@@ -0,0 +1,102 @@
+"""Measure the per-request cost of payload validation.
+
+Compares the compiled schemas behind the validators with the equivalent chain of
+Validator helper calls they replaced, and bulk batch validation with validating
+each item in turn. Run from the repository root:
+
+    python benchmarks/validation.py [iterations]
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.validations.base import Validator, ValidationError  # noqa: E402
+from app.validations.contact_validator import ContactValidator  # noqa: E402
+from app.validations.deal_validator import DealValidator  # noqa: E402
+
+CONTACT = {"properties": {
+    "email": "superjones@gmail.com", "firstname": "Jones", "lastname": "Moore", "phone": "+1234567890"}}
+BAD_CONTACT = {"properties": {"email": "x", "firstname": "J", "phone": 1234}}
+DEAL = {"properties": {
+    "dealname": "Acme Corporation - Subscription Renewal", "amount": 1500, "dealstage": "appointmentscheduled",
+    "contact_id": "12345", "pipeline": "default"}}
+
+
+def helper_contact(data):
+    """The helper chain the contact batch item schema replaced."""
+    properties = data['properties']
+    Validator.validate_required(properties, ["email", "firstname", "lastname", "phone"])
+    for field, min_length, max_length in (("email", 3, 80), ("firstname", 2, 80),
+                                          ("lastname", 2, 80), ("phone", 8, 13)):
+        Validator.validate_length(properties, field, min_length=min_length, max_length=max_length)
+    Validator.validate_type(properties, "email", str, field_name="Email")
+    Validator.validate_email(properties, "email")
+    return True
+
+
+def helper_deal(data):
+    """The helper chain DealValidator.validate_create_deal used to run."""
+    properties = data['properties']
+    Validator.validate_required(properties, ["dealname", "amount", "dealstage", "contact_id", "pipeline"])
+    for field in ("dealname", "dealstage", "contact_id", "pipeline"):
+        Validator.validate_length(properties, field, min_length=3, max_length=5000)
+    Validator.validate_is_number(properties, "amount")
+    Validator.validate_range(properties, "amount", min_value=0)
+    return True
+
+
+def rejected(validate, data):
+    def run():
+        try:
+            validate(data)
+        except ValidationError:
+            pass
+    return run
+
+
+def report(label, fn, iterations, items=1):
+    seconds = min(timeit.repeat(fn, number=iterations, repeat=5))
+    print(f"{label:<45} {seconds / iterations / items * 1e6:8.2f} us")
+
+
+def item_by_item(schema, items):
+    """Validate a batch one schema.validate call at a time."""
+    errors = {}
+    for index, item in enumerate(items):
+        try:
+            schema.validate(item)
+        except ValidationError as e:
+            errors[index] = e.errors
+    return errors
+
+
+def batch(size):
+    """A batch of contacts in which every tenth one is invalid."""
+    return [BAD_CONTACT if index % 10 == 0 else CONTACT for index in range(size)]
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+    report("contact, helper chain", lambda: helper_contact(CONTACT), iterations)
+    contact_schema = ContactValidator.batch_item_schema
+    report("contact, compiled schema", lambda: contact_schema.validate(CONTACT), iterations)
+    report("invalid contact, helper chain (first error)", rejected(helper_contact, BAD_CONTACT), iterations)
+    report("invalid contact, compiled schema (all errors)",
+           rejected(contact_schema.validate, BAD_CONTACT), iterations)
+    report("deal, helper chain", lambda: helper_deal(DEAL), iterations)
+    report("deal, compiled schema", lambda: DealValidator.validate_create_deal(DEAL), iterations)
+
+    contacts = batch(10000)
+    report("10k contacts, item by item (per item)",
+           lambda: item_by_item(contact_schema, contacts),
+           iterations // 1000, len(contacts))
+    report("10k contacts, bulk (per item)",
+           lambda: contact_schema.validate_many(contacts),
+           iterations // 1000, len(contacts))
+
+
+if __name__ == '__main__':
+    main()
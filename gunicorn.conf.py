@@ -0,0 +1,38 @@
+"""Gunicorn settings for the API workers."""
+import os
+import threading
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.getenv("GUNICORN_WORKERS", 2))
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() == "true"
+
+
+def post_fork(server, worker):
+    """Start the job workers and optionally build HubSpot services in the worker, never in the master."""
+    from app.config import Config
+    from app.services.jobs import start_workers
+    from app.services.registry import services
+
+    if Config.HUBSPOT_WARM_ON_FORK:
+        try:
+            services.warm()
+        except Exception as e:
+            # Services are still built lazily on the first request
+            worker.log.warning(f"HubSpot service warm-up failed: {str(e)}")
+
+    # Drain jobs queued before a restart; loads the app here unless preload_app already did
+    start_workers(worker.app.wsgi())
+
+    if Config.HUBSPOT_DEAL_INDEX_WARM:
+        # The scan pages through every deal, so it runs beside the worker rather than before it
+        threading.Thread(
+            target=_warm_deal_index, args=(worker,), name="deal-index-warm", daemon=True).start()
+
+
+def _warm_deal_index(worker):
+    from app.services.registry import get_deal_service
+
+    try:
+        get_deal_service().warm_deal_index()
+    except Exception as e:
+        worker.log.warning(f"Deal index warm-up failed: {str(e)}")
@@ -0,0 +1,100 @@
+"""Add local mirror tables for HubSpot contacts, deals and tickets
+
+Revision ID: 7c3e1a9f2b64
+Revises:
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c3e1a9f2b64'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _object_columns():
+    return [
+        sa.Column('id', sa.String(length=32), nullable=False),
+        sa.Column('properties', sa.JSON(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('synced_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    ]
+
+
+def upgrade() -> None:
+    op.create_table(
+        'hubspot_contacts',
+        *_object_columns(),
+        sa.Column('email', sa.String(length=255), nullable=True),
+        sa.Column('firstname', sa.String(length=255), nullable=True),
+        sa.Column('lastname', sa.String(length=255), nullable=True),
+        sa.Column('phone', sa.String(length=64), nullable=True),
+    )
+    op.create_index('ix_hubspot_contacts_email', 'hubspot_contacts', ['email'])
+
+    op.create_table(
+        'hubspot_deals',
+        *_object_columns(),
+        sa.Column('dealname', sa.String(length=255), nullable=True),
+        sa.Column('amount', sa.Numeric(precision=18, scale=2), nullable=True),
+        sa.Column('dealstage', sa.String(length=100), nullable=True),
+        sa.Column('pipeline', sa.String(length=100), nullable=True),
+    )
+    op.create_index('ix_hubspot_deals_dealname', 'hubspot_deals', ['dealname'])
+
+    op.create_table(
+        'hubspot_tickets',
+        *_object_columns(),
+        sa.Column('subject', sa.String(length=500), nullable=True),
+        sa.Column('hs_pipeline', sa.String(length=100), nullable=True),
+        sa.Column('hs_pipeline_stage', sa.String(length=100), nullable=True),
+        sa.Column('hs_ticket_priority', sa.String(length=50), nullable=True),
+    )
+
+    for table in ('hubspot_contacts', 'hubspot_deals', 'hubspot_tickets'):
+        op.create_index(f'ix_{table}_created_at', table, ['created_at'])
+        op.create_index(f'ix_{table}_updated_at', table, ['updated_at'])
+
+    op.create_table(
+        'hubspot_associations',
+        sa.Column('from_type', sa.String(length=20), nullable=False),
+        sa.Column('from_id', sa.String(length=32), nullable=False),
+        sa.Column('to_type', sa.String(length=20), nullable=False),
+        sa.Column('to_id', sa.String(length=32), nullable=False),
+        sa.PrimaryKeyConstraint('from_type', 'from_id', 'to_type', 'to_id'),
+    )
+    op.create_index('ix_hubspot_associations_to', 'hubspot_associations', ['to_type', 'to_id'])
+
+    op.create_table(
+        'hubspot_sync_checkpoints',
+        sa.Column('object_type', sa.String(length=20), nullable=False),
+        sa.Column('last_modified', sa.DateTime(), nullable=True),
+        sa.Column('backfill_after', sa.String(length=64), nullable=True),
+        sa.Column('backfilled_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('object_type'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('hubspot_sync_checkpoints')
+    op.drop_index('ix_hubspot_associations_to', table_name='hubspot_associations')
+    op.drop_table('hubspot_associations')
+
+    for table in ('hubspot_tickets', 'hubspot_deals', 'hubspot_contacts'):
+        op.drop_index(f'ix_{table}_updated_at', table_name=table)
+        op.drop_index(f'ix_{table}_created_at', table_name=table)
+
+    op.drop_index('ix_hubspot_deals_dealname', table_name='hubspot_deals')
+    op.drop_index('ix_hubspot_contacts_email', table_name='hubspot_contacts')
+    op.drop_table('hubspot_tickets')
+    op.drop_table('hubspot_deals')
+    op.drop_table('hubspot_contacts')
@@ -1,6 +1,8 @@
 from app import create_app
+from app.services.jobs import start_workers
 
 app = create_app()
 
 if __name__ == '__main__':
+    start_workers(app)
     app.run(host='0.0.0.0', port=5000)
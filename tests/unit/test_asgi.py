@@ -0,0 +1,113 @@
+import asyncio
+import time
+import pytest
+from flask import Flask
+from asgi import Application
+from app.services.async_client import AsyncHubSpotClient
+
+
+async def asgi_get(application, path):
+    """Send one GET through an ASGI app and return the response body."""
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": path, "query_string": b"",
+             "http_version": "1.1", "headers": []}
+    await application(scope, receive, send)
+    return b"".join(message.get("body", b"") for message in messages[1:])
+
+
+class TestAsgiApplication:
+    """Test the ASGI entry point"""
+
+    def test_async_views_run_concurrently_on_the_server_loop(self):
+        """Test that concurrent async views overlap and run on the server's event loop"""
+        flask_app = Flask(__name__)
+
+        @flask_app.route("/slow")
+        async def slow():
+            await asyncio.sleep(0.3)
+            return str(id(asyncio.get_running_loop()))
+
+        async def serve():
+            started = time.monotonic()
+            bodies = await asyncio.gather(*(asgi_get(Application(flask_app), "/slow") for _ in range(4)))
+            return time.monotonic() - started, bodies, str(id(asyncio.get_running_loop())).encode()
+
+        elapsed, bodies, server_loop = asyncio.run(serve())
+
+        assert elapsed < 0.9
+        assert set(bodies) == {server_loop}
+
+
+class TestAsyncClientLifetime:
+    """Test when the async HubSpot client is closed"""
+
+    def test_client_closed_unless_loop_is_shared(self):
+        """Test that a per-request loop's client is closed and a shared loop's client is kept"""
+        hubspot = AsyncHubSpotClient()
+
+        async def request(share):
+            if share:
+                hubspot.share_loop()
+            client = hubspot._client()
+            await hubspot.release_loop()
+            closed = client.is_closed
+            await hubspot.aclose()
+            return closed
+
+        assert asyncio.run(request(share=False)) is True
+        assert asyncio.run(request(share=True)) is False
+
+
+def fake_hubspot(contacts):
+    """Async client that records created objects and finds contacts by email."""
+    hubspot = AsyncHubSpotClient()
+    hubspot.created = []
+
+    async def search(object_type, search_request):
+        value = search_request["filters"][0]["value"]
+        found = contacts.get(value) if object_type == "contacts" else None
+        return {"results": [{"id": found}] if found else []}
+
+    async def create(object_type, payload):
+        hubspot.created.append((object_type, payload))
+        return {"id": "900", **payload}
+
+    hubspot.search = search
+    hubspot.create = create
+    return hubspot
+
+
+class TestAsyncContactEmail:
+    """Test that the async client resolves contact_email like the synchronous services"""
+
+    def test_deal_and_ticket_contact_email_is_resolved(self):
+        """Test that a deal gets the contact's ID and a ticket is associated with the contact"""
+        hubspot = fake_hubspot({"ada@example.com": "101"})
+        deal = {"properties": {"dealname": "Renewal", "amount": 100, "dealstage": "appointmentscheduled",
+                               "pipeline": "default", "contact_email": "ada@example.com"}}
+        ticket = {"properties": {"subject": "Printer on fire", "hs_pipeline_stage": "1",
+                                 "contact_email": "ada@example.com"}}
+
+        asyncio.run(hubspot.create_or_update_deal(deal))
+        asyncio.run(hubspot.create_ticket(ticket))
+
+        (_, deal_payload), (_, ticket_payload) = hubspot.created
+        assert deal_payload["properties"]["contact_id"] == "101"
+        assert ticket_payload["associations"][0]["to"]["id"] == "101"
+
+    def test_unknown_contact_email_is_rejected(self):
+        """Test that an email with no contact raises ValueError instead of creating the deal"""
+        hubspot = fake_hubspot({})
+        deal = {"properties": {"dealname": "Renewal", "amount": 100, "dealstage": "appointmentscheduled",
+                               "pipeline": "default", "contact_email": "grace@example.com"}}
+
+        with pytest.raises(ValueError):
+            asyncio.run(hubspot.create_or_update_deal(deal))
+        assert hubspot.created == []
@@ -0,0 +1,300 @@
+import json
+from app.config import Config
+from app.routes import integration
+from app.services.contact_service import ContactService
+from app.services.deal_service import DealService
+from app.services.fingerprints import PropertyFingerprints
+from app.services.support_ticket_service import SupportTicketService
+from app.utils.cache import TTLCache
+from app.validations.contact_validator import ContactValidator
+
+
+class FakeResponse:
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self.body = body
+        self.text = str(body)
+
+    def json(self):
+        return self.body
+
+
+def contact(email, firstname="Ada"):
+    return {"properties": {"email": email, "firstname": firstname, "lastname": "Lovelace",
+                           "phone": "0123456789"}}
+
+
+def deal(name, contact_id="101"):
+    return {"properties": {"dealname": name, "amount": 100, "dealstage": "appointmentscheduled",
+                           "contact_id": contact_id, "pipeline": "default"}}
+
+
+def make_service(handler, service_class=ContactService):
+    """Service whose HubSpot calls go to `handler(url, body)`."""
+    service = service_class.__new__(service_class)
+    service.base_url = "https://api.hubapi.com"
+    service.contact_ids = TTLCache()
+    service.deal_ids = TTLCache()
+    service.fingerprints = PropertyFingerprints(TTLCache())
+    service.calls = []
+
+    def make_request(method, url, data=None):
+        service.calls.append(data.get("inputs"))
+        return handler(url, data)
+
+    service._make_request = make_request
+    return service
+
+
+def upserted(inputs, new=True):
+    return [{"id": str(i), "new": new, "properties": {"email": item["id"]}}
+            for i, item in enumerate(inputs)]
+
+
+class TestBatchUpsertContacts:
+    """Test batch contact upserts"""
+
+    def test_chunks_of_one_hundred(self):
+        """Test that contacts are sent 100 per HubSpot call"""
+        service = make_service(
+            lambda url, data: FakeResponse(200, {"results": upserted(data["inputs"])}))
+
+        results = service.batch_upsert_contacts(
+            [contact(f"user{i}@example.com") for i in range(250)])
+
+        assert [len(call) for call in service.calls] == [100, 100, 50]
+        assert all(result["status"] == "created" for result in results)
+        assert service.calls[0][0]["idProperty"] == "email"
+
+    def test_bad_record_is_isolated(self):
+        """Test that a rejected batch is split until only the bad contact fails"""
+        def handler(url, data):
+            if any(item["id"] == "bad@example.com" for item in data["inputs"]):
+                return FakeResponse(400, {"message": "Property values were not valid"})
+            return FakeResponse(200, {"results": upserted(data["inputs"], new=False)})
+
+        service = make_service(handler)
+        items = [contact(f"user{i}@example.com") for i in range(7)] + [contact("bad@example.com")]
+
+        results = service.batch_upsert_contacts(items)
+
+        assert [result["status"] for result in results] == ["updated"] * 7 + ["error"]
+        assert results[-1]["error"] == "Property values were not valid"
+
+    def test_batch_wide_rejection_is_not_split(self):
+        """Test that a 403 fails the whole chunk in one call instead of bisecting it"""
+        service = make_service(lambda url, data: FakeResponse(403, {"message": "Missing scopes"}))
+
+        results = service.batch_upsert_contacts([contact(f"user{i}@example.com") for i in range(100)])
+
+        assert len(service.calls) == 1
+        assert {result["error"] for result in results} == {"Missing scopes"}
+
+    def test_duplicate_emails_are_sent_once(self):
+        """Test that the same email twice in a batch is upserted once with the last values"""
+        service = make_service(
+            lambda url, data: FakeResponse(200, {"results": upserted(data["inputs"])}))
+
+        results = service.batch_upsert_contacts(
+            [contact("ada@example.com", "First"), contact("ADA@example.com", "Second")])
+
+        assert len(service.calls[0]) == 1
+        assert service.calls[0][0]["properties"]["firstname"] == "Second"
+        assert [result["status"] for result in results] == ["created", "created"]
+
+
+class TestBatchDeals:
+    """Test batch deal create/update with contact associations"""
+
+    def handler(self, url, data):
+        if url.endswith("/search"):
+            return FakeResponse(200, {"results": [
+                {"id": "900", "properties": {"dealname": "Existing deal"}}]})
+        if url.endswith("/batch/create"):
+            return FakeResponse(201, {"results": [
+                {"id": str(500 + i), "properties": item["properties"]}
+                for i, item in enumerate(data["inputs"])]})
+        if url.endswith("/batch/update"):
+            return FakeResponse(200, {"results": [
+                {"id": item["id"], "properties": item["properties"]} for item in data["inputs"]]})
+        if "/associations/" in url:
+            return FakeResponse(200, {"results": [
+                {"from": item["from"], "to": item["to"]} for item in data["inputs"]]})
+
+    def test_creates_updates_and_associates(self):
+        """Test that a deal load costs one call per kind and links real associations"""
+        service = make_service(self.handler, DealService)
+
+        results = service.batch_create_or_update_deals(
+            [deal("New deal"), deal("Existing deal", "102")])
+
+        assert [result["status"] for result in results] == ["created", "updated"]
+        assert all(result["associated"] for result in results)
+        assert len(service.calls) == 4
+        assert service.calls[-1] == [
+            {"from": {"id": "500"}, "to": {"id": "101"}},
+            {"from": {"id": "900"}, "to": {"id": "102"}},
+        ]
+        assert "contact_id" not in service.calls[1][0]["properties"]
+
+    def test_same_name_in_other_pipelines_is_not_merged(self, monkeypatch):
+        """Test that deals are deduplicated by the pipeline-scoped index key when it is enabled"""
+        monkeypatch.setattr(Config, "HUBSPOT_DEAL_INDEX_BY_PIPELINE", True)
+        service = make_service(self.handler, DealService)
+        sales, renewals = deal("New deal"), deal("New deal")
+        renewals["properties"]["pipeline"] = "renewals"
+
+        results = service.batch_create_or_update_deals([sales, renewals])
+
+        assert [result["status"] for result in results] == ["created", "created"]
+        assert results[0]["id"] != results[1]["id"]
+        assert len(service.calls[1]) == 2
+
+    def test_failed_lookup_is_not_created(self):
+        """Test that deals whose lookup failed are reported instead of duplicated"""
+        service = make_service(lambda url, data: FakeResponse(500, {}), DealService)
+
+        results = service.batch_create_or_update_deals([deal("New deal")])
+
+        assert results[0]["status"] == "error"
+        assert len(service.calls) == 1
+
+
+def ticket(subject, contact_id="101"):
+    return {"properties": {"subject": subject, "description": "Printer on fire", "category": "hardware",
+                           "pipeline": "0", "hs_ticket_priority": "HIGH", "hs_pipeline_stage": "1",
+                           "contact_id": contact_id, "deal_ids": ["900"]}}
+
+
+class TestBatchTickets:
+    """Test batch ticket creation"""
+
+    def test_creates_with_inline_associations(self):
+        """Test that tickets are created in one call with their associations"""
+        service = make_service(lambda url, data: FakeResponse(201, {"results": [
+            {"id": str(700 + i), "objectWriteTraceId": item["objectWriteTraceId"]}
+            for i, item in enumerate(data["inputs"])]}), SupportTicketService)
+
+        results = service.batch_create_tickets([ticket("One"), ticket("Two")])
+
+        assert results == [{"status": "created", "id": "700"}, {"status": "created", "id": "701"}]
+        assert len(service.calls) == 1
+        type_ids = [a["types"][0]["associationTypeId"] for a in service.calls[0][0]["associations"]]
+        assert type_ids == [16, 26]
+
+    def test_reports_failed_items(self):
+        """Test that failed tickets are reported so a replay can resend only those"""
+        def handler(url, data):
+            return FakeResponse(207, {
+                "results": [{"id": "700", "objectWriteTraceId": "0"}],
+                "errors": [{"message": "Invalid pipeline stage",
+                            "context": {"objectWriteTraceId": ["1"]}}]
+            })
+
+        service = make_service(handler, SupportTicketService)
+
+        results = service.batch_create_tickets([ticket("One"), ticket("Two")])
+
+        assert results[0]["status"] == "created"
+        assert results[1] == {"status": "error", "error": "Invalid pipeline stage"}
+
+    def test_contact_emails_resolved_in_one_search(self, monkeypatch):
+        """Test that contact emails are resolved together and unknown ones are reported"""
+        searches = []
+
+        def contacts_handler(url, data):
+            emails = data["filterGroups"][0]["filters"][0]["values"]
+            searches.append(emails)
+            return FakeResponse(200, {"results": [
+                {"id": "101", "properties": {"email": email}} for email in emails if email == "ada@example.com"]})
+
+        monkeypatch.setattr("app.services.registry.get_contact_service", lambda: make_service(contacts_handler))
+        service = make_service(lambda url, data: FakeResponse(201, {"results": [
+            {"id": str(700 + i), "objectWriteTraceId": item["objectWriteTraceId"]}
+            for i, item in enumerate(data["inputs"])]}), SupportTicketService)
+        known, unknown = ticket("One"), ticket("Two")
+        for item, email in ((known, "Ada@example.com"), (unknown, "grace@example.com")):
+            del item["properties"]["contact_id"]
+            item["properties"]["contact_email"] = email
+
+        results = service.batch_create_tickets([known, unknown, ticket("Three")])
+
+        assert len(searches) == 1
+        assert results[0] == {"status": "created", "id": "700"}
+        assert results[1] == {"status": "error", "error": "No contact found with email grace@example.com"}
+        assert results[2] == {"status": "created", "id": "701"}
+        assert service.calls[0][0]["associations"][0]["to"]["id"] == "101"
+        assert len(service.calls[0]) == 2
+
+
+class TestValidateMany:
+    """Test per-item batch validation"""
+
+    def test_invalid_items_are_reported_by_index(self):
+        """Test that invalid items are reported without failing valid ones"""
+        valid, errors = ContactValidator.batch_item_schema.validate_many(
+            [contact("ada@example.com"), contact("not-an-email"), "oops"])
+
+        assert valid == [0]
+        assert set(errors) == {1, 2}
+
+
+class FakeBatchService:
+    def __init__(self):
+        self.windows = []
+
+    def batch_upsert_contacts(self, items):
+        self.windows.append(len(items))
+        return [{"email": item["properties"]["email"], "status": "created", "id": "1"} for item in items]
+
+
+class TestStreamedBatch:
+    """Test batch bodies parsed and sent as they are read"""
+
+    def post(self, client, monkeypatch, body, **settings):
+        service = FakeBatchService()
+        monkeypatch.setattr(integration, "get_contact_service", lambda: service)
+        monkeypatch.setattr(Config, "HUBSPOT_STREAM_MIN_BYTES", 0)
+        for name, value in settings.items():
+            monkeypatch.setattr(Config, name, value)
+        response = client.post('/api/contacts/batch', data=body, content_type="application/json")
+        return response, service
+
+    def test_inputs_are_sent_a_window_at_a_time(self, client, monkeypatch):
+        """Test that a streamed body is validated and sent in windows and reported in order"""
+        body = json.dumps({"inputs": [contact(f"user{i}@example.com") for i in range(5)] + [contact("bad")]})
+
+        response, service = self.post(client, monkeypatch, body, HUBSPOT_STREAM_WINDOW=2)
+
+        assert response.status_code == 207
+        assert service.windows == [2, 2, 1]
+        assert [result["index"] for result in response.json["results"]] == list(range(6))
+        assert response.json["summary"] == {"created": 5, "updated": 0, "invalid": 1, "error": 0}
+
+    def test_inputs_past_the_limit_are_not_sent(self, client, monkeypatch):
+        """Test that a streamed body over the item limit only sends the inputs within it"""
+        body = json.dumps({"inputs": [contact(f"user{i}@example.com") for i in range(3)]})
+
+        response, service = self.post(client, monkeypatch, body, HUBSPOT_BATCH_MAX_ITEMS=2)
+
+        assert service.windows == [2]
+        assert response.json["results"][2]["status"] == "invalid"
+
+    def test_broken_body_reports_processed_inputs(self, client, monkeypatch):
+        """Test that a body that breaks off returns 400 with the inputs already sent"""
+        body = json.dumps({"inputs": [contact("ada@example.com"), contact("bob@example.com")]})[:-20]
+
+        response, service = self.post(client, monkeypatch, body, HUBSPOT_STREAM_WINDOW=1)
+
+        assert response.status_code == 400
+        assert service.windows == [1]
+        assert response.json["summary"]["created"] == 1
+
+    def test_body_over_the_size_cap_is_rejected(self, client, monkeypatch):
+        """Test that a body over MAX_CONTENT_LENGTH gets 413 before anything is parsed"""
+        monkeypatch.setitem(client.application.config, "MAX_CONTENT_LENGTH", 10)
+
+        response, service = self.post(client, monkeypatch, json.dumps({"inputs": [contact("ada@example.com")]}))
+
+        assert response.status_code == 413
+        assert service.windows == []
@@ -0,0 +1,431 @@
+import time
+import threading
+import pytest
+import sqlalchemy as sa
+from types import SimpleNamespace
+from hubspot.crm.contacts import ApiException
+from app.config import Config
+from app.services.cache import DatabaseCache, TieredCache, _create_table
+from app.services.contact_service import ContactService
+from app.services.deal_service import DealService
+from app.services.support_ticket_service import SupportTicketService
+from app.services.fingerprints import PropertyFingerprints
+from app.routes import integration
+from app.utils.cache import ResponseCache, TTLCache
+from app.utils.concurrency import MicroBatcher
+
+
+class TestTTLCache:
+    """Test the TTL+LRU cache"""
+
+    def test_least_recently_used_is_evicted(self):
+        """Test that the cache stays bounded by evicting the least recently used key"""
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert len(cache) == 2
+
+    def test_entries_expire(self):
+        """Test that entries are dropped after the TTL"""
+        cache = TTLCache(maxsize=10, ttl=0.05)
+        cache.set("a", 1)
+        time.sleep(0.1)
+
+        assert cache.get("a") is None
+        assert cache.stats()["misses"] == 1
+
+
+class TestResponseCache:
+    """Test the stale-while-revalidate response cache"""
+
+    def test_stale_entry_refreshed_once_in_background(self):
+        """Test that stale entries are served while a single refresh runs"""
+        cache = ResponseCache(fresh_for=0, stale_for=60)
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.05)
+            return f"body {len(calls)}".encode(), True
+
+        assert cache.get("k", compute)[::2] == (b"body 1", "miss")
+        assert cache.get("k", compute)[::2] == (b"body 1", "stale")
+        assert cache.get("k", compute)[::2] == (b"body 1", "stale")
+
+        time.sleep(0.2)
+        assert len(calls) == 2
+        assert cache.get("k", compute)[0] == b"body 2"
+
+    def test_last_good_response_survives_failures(self):
+        """Test that partial or failed recomputes keep serving the last good body"""
+        cache = ResponseCache(fresh_for=0, stale_for=0)
+        cache.get("k", lambda: (b"good", True))
+
+        def down():
+            raise ConnectionError("HubSpot is down")
+
+        assert cache.get("k", lambda: (b"partial", False))[::2] == (b"good", "stale")
+        assert cache.get("k", down)[::2] == (b"good", "stale")
+
+    def test_new_crm_objects_answers_304(self, client, monkeypatch):
+        """Test that a matching If-None-Match is answered with 304 from the cache"""
+        monkeypatch.setattr(integration, "new_objects_cache", ResponseCache(fresh_for=60))
+        monkeypatch.setattr(integration, "recent_objects", lambda section, page_size, after: ([], None))
+
+        first = client.get("/api/new_crm_objects?source=local")
+        second = client.get("/api/new_crm_objects?source=local",
+                            headers={"If-None-Match": first.headers["ETag"]})
+
+        assert first.status_code == 200
+        assert first.headers["X-Cache"] == "MISS"
+        assert second.status_code == 304
+        assert second.headers["X-Cache"] == "HIT"
+
+    def test_hubspot_outage_keeps_serving_cached_objects(self, client, monkeypatch):
+        """Test that a refresh failing with a HubSpot 5xx serves the last good response"""
+        monkeypatch.setattr(integration, "new_objects_cache", ResponseCache(fresh_for=0, stale_for=0))
+        outage = []
+
+        def get_contacts_page(limit, after=None, properties=None):
+            if outage:
+                raise ApiException(status=503, reason="Service Unavailable")
+            return SimpleNamespace(results=[SimpleNamespace(to_dict=lambda: {"id": "101"})], paging=None)
+
+        contacts = SimpleNamespace(basic_api=SimpleNamespace(get_page=get_contacts_page))
+        empty = SimpleNamespace(basic_api=SimpleNamespace(
+            get_page=lambda limit, after=None, properties=None: SimpleNamespace(results=[], paging=None)))
+        hubspot = SimpleNamespace(crm=SimpleNamespace(contacts=contacts, deals=empty, tickets=empty))
+        for name, cls in (("contact", ContactService), ("deal", DealService), ("ticket", SupportTicketService)):
+            service = cls.__new__(cls)
+            service.client = hubspot
+            monkeypatch.setattr(integration, f"get_{name}_service", lambda service=service: service)
+
+        first = client.get("/api/new_crm_objects")
+        outage.append(True)
+        second = client.get("/api/new_crm_objects")
+
+        assert first.headers["X-Cache"] == "MISS"
+        assert second.headers["X-Cache"] == "STALE"
+        assert second.json["contacts"] == [{"id": "101"}]
+        assert "errors" not in second.json
+
+    def test_new_crm_objects_rejects_page(self, client):
+        """Test that the removed page parameter gets 400 instead of the first page again"""
+        response = client.get("/api/new_crm_objects?page=2")
+
+        assert response.status_code == 400
+        assert "contacts_after" in response.json["details"]
+
+
+class FakeContactsApi:
+    def __init__(self):
+        self.searches = 0
+        self.created = 0
+        self.deleted = set()
+        self.existing = {}
+
+    def search_in(self, search_request):
+        self.searches += 1
+        self.emails = search_request["filterGroups"][0]["filters"][0]["values"]
+        return SimpleNamespace(status_code=200, json=lambda: {"results": [
+            {"id": contact_id, "properties": {"email": email}}
+            for email, contact_id in self.existing.items() if email in self.emails]})
+
+    def create(self, data):
+        self.created += 1
+        return SimpleNamespace(id=str(self.created), to_dict=lambda: {"id": str(self.created)})
+
+    def update(self, contact_id, data):
+        if contact_id in self.deleted:
+            raise ApiException(status=404)
+        return SimpleNamespace(id=contact_id, to_dict=lambda: {"id": contact_id})
+
+
+def make_contact_service():
+    api = FakeContactsApi()
+    service = ContactService.__new__(ContactService)
+    service.contact_ids = TTLCache()
+    service.fingerprints = PropertyFingerprints(TTLCache())
+    service.email_resolver = MicroBatcher(service._resolve_pending, window=0.01)
+    service.client = SimpleNamespace(crm=SimpleNamespace(
+        contacts=SimpleNamespace(search_api=api, basic_api=api)))
+    service.base_url = "https://api.hubapi.com"
+    service._make_request = lambda method, url, data=None: api.search_in(data)
+    return service, api
+
+
+def contact(email):
+    return {"properties": {"email": email, "firstname": "Ada", "lastname": "Lovelace",
+                           "phone": "0123456789"}}
+
+
+class TestContactIdCache:
+    """Test the email to contact ID cache in ContactService"""
+
+    def test_repeat_upsert_skips_search(self):
+        """Test that upserting a just-created contact updates it without searching"""
+        service, api = make_contact_service()
+
+        service.create_or_update_contact(contact("ada@example.com"))
+        result = service.create_or_update_contact(contact(" ADA@example.com"))
+
+        assert result == {"id": "1"}
+        assert api.searches == 1
+        assert api.created == 1
+
+    def test_concurrent_upserts_create_once(self):
+        """Test that parallel upserts of one email share a single search and create"""
+        service, api = make_contact_service()
+        create = api.create
+        api.create = lambda data: (time.sleep(0.1), create(data))[1]
+        threads = [threading.Thread(target=service.create_or_update_contact,
+                                    args=(contact("ada@example.com"),)) for _ in range(4)]
+
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert api.searches == 1
+        assert api.created == 1
+
+    def test_stale_id_is_dropped_on_404(self):
+        """Test that a cached ID for a deleted contact falls back to search and create"""
+        service, api = make_contact_service()
+        service.create_or_update_contact(contact("ada@example.com"))
+        api.deleted.add("1")
+        changed = contact("ada@example.com")
+        changed["properties"]["phone"] = "0987654321"
+
+        result = service.create_or_update_contact(changed)
+
+        assert result == {"id": "2"}
+        assert api.searches == 2
+        assert service.contact_ids.get("ada@example.com") == "2"
+
+
+class TestEmailResolver:
+    """Test batched contact lookups by email"""
+
+    def test_concurrent_lookups_use_one_search(self):
+        """Test that emails looked up together go out as a single IN-filter search"""
+        service, api = make_contact_service()
+        api.existing = {"ada@example.com": "1", "alan@example.com": "2"}
+        found = {}
+        emails = ["Ada@example.com", "alan@example.com", "grace@example.com"]
+        threads = [threading.Thread(target=lambda email=email: found.update(
+            {email: service.find_contact_id(email)})) for email in emails]
+
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert api.searches == 1
+        assert sorted(api.emails) == ["ada@example.com", "alan@example.com", "grace@example.com"]
+        assert found == {"Ada@example.com": "1", "alan@example.com": "2", "grace@example.com": None}
+        assert service.find_contact_id("ada@example.com") == "1"
+        assert api.searches == 1
+
+    def test_deal_contact_email_is_resolved(self, monkeypatch):
+        """Test that a deal's contact_email becomes its contact_id, and an unknown one is rejected"""
+        contacts, api = make_contact_service()
+        api.existing = {"ada@example.com": "101"}
+        monkeypatch.setattr("app.services.registry.get_contact_service", lambda: contacts)
+        data = deal("Renewal 2026")
+        del data["properties"]["contact_id"]
+        data["properties"]["contact_email"] = "ada@example.com"
+
+        assert DealService._with_contact_id(data)["properties"]["contact_id"] == "101"
+
+        data["properties"]["contact_email"] = "grace@example.com"
+        with pytest.raises(ValueError):
+            DealService._with_contact_id(data)
+
+
+class TestUnchangedUpdates:
+    """Test no-op update suppression by property fingerprints"""
+
+    def test_unchanged_upsert_skips_hubspot(self):
+        """Test that resending the same contact makes no HubSpot call"""
+        service, api = make_contact_service()
+        api.update = lambda contact_id, data: pytest.fail("unchanged contact was updated")
+
+        service.create_or_update_contact(contact("ada@example.com"))
+        result = service.create_or_update_contact(contact("ada@example.com"))
+
+        assert result["unchanged"] is True
+        assert result["id"] == "1"
+        assert api.searches == 1
+        assert service.fingerprints.stats()["skipped"] == 1
+
+    def test_only_changed_properties_are_sent(self):
+        """Test that an update sends just the properties that differ from the last write"""
+        service, api = make_contact_service()
+        sent = []
+        api.update = lambda contact_id, data: (sent.append(data), SimpleNamespace(
+            id=contact_id, to_dict=lambda: {"id": contact_id}))[1]
+        service.create_or_update_contact(contact("ada@example.com"))
+        changed = contact("ada@example.com")
+        changed["properties"]["lastname"] = "King"
+
+        service.create_or_update_contact(changed)
+        service.create_or_update_contact(changed)
+
+        assert sent == [{"properties": {"lastname": "King"}}]
+        assert service.fingerprints.stats() == {"skipped": 1, "partial": 1, "full": 0}
+
+    def test_batch_write_is_not_masked(self):
+        """Test that a batch upsert updates the fingerprints a later single upsert diffs against"""
+        service, api = make_contact_service()
+        sent = []
+        api.update = lambda contact_id, data: (sent.append(data), SimpleNamespace(
+            id=contact_id, to_dict=lambda: {"id": contact_id}))[1]
+        service.create_or_update_contact(contact("ada@example.com"))
+        renamed = contact("ada@example.com")
+        renamed["properties"]["firstname"] = "Bob"
+
+        search = service._make_request
+        service._make_request = lambda method, url, data=None: SimpleNamespace(status_code=200, json=lambda: {
+            "results": [{"id": "1", "new": False, "properties": {"email": "ada@example.com"}}]})
+        service.batch_upsert_contacts([renamed])
+        service._make_request = search
+        result = service.create_or_update_contact(contact("ada@example.com"))
+
+        assert "unchanged" not in result
+        assert sent == [{"properties": {"firstname": "Ada"}}]
+
+
+class FakeDealsApi:
+    def __init__(self):
+        self.searches = 0
+
+    def do_search(self, search_request):
+        self.searches += 1
+        return SimpleNamespace(results=[])
+
+    def update(self, deal_id, data):
+        return SimpleNamespace(id=deal_id, to_dict=lambda: {"id": deal_id})
+
+
+def make_deal_service():
+    api = FakeDealsApi()
+    service = DealService.__new__(DealService)
+    service.base_url = "https://api.hubapi.com"
+    service.deal_ids = TTLCache()
+    service.fingerprints = PropertyFingerprints(TTLCache())
+    service.client = SimpleNamespace(crm=SimpleNamespace(
+        deals=SimpleNamespace(search_api=api, basic_api=api)))
+    return service, api
+
+
+def deal(name, pipeline="default"):
+    return {"properties": {"dealname": name, "amount": 100, "dealstage": "appointmentscheduled",
+                           "contact_id": "101", "pipeline": pipeline}}
+
+
+class TestDealIndex:
+    """Test the deal-name index in DealService"""
+
+    def test_warmed_index_skips_search(self):
+        """Test that a deal found by the warm-up scan is updated without a search"""
+        service, api = make_deal_service()
+        service.iter_deals = lambda page_size, properties=None: iter([
+            ([{"id": "900", "properties": {"dealname": "Renewal 2026", "pipeline": "default"}}], None)])
+
+        assert service.warm_deal_index() == 1
+        result = service.create_or_update_deal(deal("renewal 2026"))
+
+        assert result == {"id": "900"}
+        assert api.searches == 0
+
+    def test_index_scoped_by_pipeline(self, monkeypatch):
+        """Test that the same name in another pipeline is a different deal"""
+        monkeypatch.setattr(Config, "HUBSPOT_DEAL_INDEX_BY_PIPELINE", True)
+        service, api = make_deal_service()
+        service.deal_ids.set(DealService.index_key("Renewal", "sales"), "900")
+
+        assert service.deal_ids.get(service.index_key_for(deal("Renewal", "sales"))) == "900"
+        assert service.deal_ids.get(service.index_key_for(deal("Renewal", "support"))) is None
+
+    def test_scoped_search_and_create_use_the_pipeline(self, monkeypatch):
+        """Test that an index miss searches within the pipeline and creates the deal in it"""
+        monkeypatch.setattr(Config, "HUBSPOT_DEAL_INDEX_BY_PIPELINE", True)
+        service, api = make_deal_service()
+        searches, created = [], []
+        api.do_search = lambda search_request: (searches.append(search_request), SimpleNamespace(results=[]))[1]
+        api.create = lambda data: (created.append(data), SimpleNamespace(
+            id="901", to_dict=lambda: {"id": "901"}))[1]
+
+        service.create_or_update_deal(deal("Renewal", "support"))
+
+        assert {"propertyName": "pipeline", "operator": "EQ", "value": "support"} in searches[0]["filters"]
+        assert created[0]["properties"]["pipeline"] == "support"
+        assert service.deal_ids.get(service.index_key_for(deal("Renewal", "support"))) == "901"
+
+    def test_unique_property_upsert(self, monkeypatch):
+        """Test that a unique deal property upserts in one call with no search"""
+        monkeypatch.setattr(Config, "HUBSPOT_DEAL_UNIQUE_PROPERTY", "deal_key")
+        service, api = make_deal_service()
+        calls = []
+
+        def make_request(method, url, data=None):
+            calls.append((url, data))
+            return SimpleNamespace(status_code=200, json=lambda: {"results": [{"id": "901"}]})
+
+        service._make_request = make_request
+
+        result = service.create_or_update_deal(deal("Renewal"))
+
+        assert result == {"id": "901"}
+        assert api.searches == 0
+        assert calls[0][0].endswith("/crm/v3/objects/deals/batch/upsert")
+        assert calls[0][1]["inputs"][0]["idProperty"] == "deal_key"
+
+
+class TestSharedCache:
+    """Test the database-backed shared cache tier"""
+
+    def make_caches(self, tmp_path):
+        engine = sa.create_engine(f"sqlite:///{tmp_path}/cache.db")
+        _create_table(engine)
+        worker_a = TieredCache(TTLCache(), DatabaseCache("contact_ids", engine=engine), local_ttl=60)
+        worker_b = TieredCache(TTLCache(), DatabaseCache("contact_ids", engine=engine), local_ttl=60)
+        return worker_a, worker_b
+
+    def test_workers_share_entries(self, tmp_path):
+        """Test that a value cached by one worker is a hit in another"""
+        worker_a, worker_b = self.make_caches(tmp_path)
+        worker_a.set_many({"ada@example.com": "1", "bob@example.com": "2"})
+
+        assert worker_b.get_many(["ada@example.com", "bob@example.com", "eve@example.com"]) == {
+            "ada@example.com": "1", "bob@example.com": "2"}
+        assert worker_b.stats()["shared"] == {"hits": 2, "misses": 1, "errors": 0}
+        assert worker_b.get("ada@example.com") == "1"
+        assert worker_b.stats()["local"]["hits"] == 1
+
+    def test_per_key_ttl_and_invalidation(self, tmp_path):
+        """Test that per-key TTLs expire and invalidations reach the shared tier"""
+        worker_a, worker_b = self.make_caches(tmp_path)
+        worker_a.set("short", "1", ttl=0.05)
+        worker_a.set("long", "2")
+        worker_a.pop("long")
+        time.sleep(0.1)
+
+        assert worker_b.get("short") is None
+        assert worker_b.get("long") is None
+
+    def test_outage_is_a_miss(self):
+        """Test that an unreachable shared tier degrades to a miss"""
+        engine = sa.create_engine("sqlite:////nonexistent/dir/cache.db")
+        cache = DatabaseCache("contact_ids", engine=engine)
+
+        cache.set("ada@example.com", "1")
+
+        assert cache.get("ada@example.com") is None
+        assert cache.stats()["errors"] == 2
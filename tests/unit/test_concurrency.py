@@ -0,0 +1,177 @@
+import time
+import threading
+import pytest
+from app.utils.concurrency import MicroBatcher, SingleFlight, fan_out, iter_pages
+
+
+class TestFanOut:
+    """Test concurrent fan-out of HubSpot calls"""
+
+    def test_calls_run_concurrently(self):
+        """Test that total latency is close to the slowest call"""
+        def slow(value):
+            time.sleep(0.2)
+            return value
+
+        start = time.monotonic()
+        results, errors = fan_out({
+            "a": lambda: slow(1),
+            "b": lambda: slow(2),
+            "c": lambda: slow(3),
+        }, timeout=5)
+
+        assert results == {"a": 1, "b": 2, "c": 3}
+        assert errors == {}
+        assert time.monotonic() - start < 0.5
+
+    def test_partial_results(self):
+        """Test that a failing or slow call does not fail the others"""
+        def fail():
+            raise ValueError("boom")
+
+        results, errors = fan_out({
+            "ok": lambda: "fine",
+            "failed": fail,
+            "slow": lambda: time.sleep(1),
+        }, timeout=0.2)
+
+        assert results == {"ok": "fine"}
+        assert errors["failed"] == "boom"
+        assert "Timed out" in errors["slow"]
+
+
+class TestIterPages:
+    """Test lazy cursor pagination"""
+
+    PAGES = {None: ([1, 2], "b"), "b": ([3, 4], "c"), "c": ([5], None)}
+
+    def test_follows_cursors(self):
+        """Test that pages are yielded in order until the cursor runs out"""
+        pages = list(iter_pages(lambda after: self.PAGES[after]))
+
+        assert pages == [([1, 2], "b"), ([3, 4], "c"), ([5], None)]
+
+    def test_resumes_from_cursor(self):
+        """Test that iteration can start from a cursor"""
+        pages = list(iter_pages(lambda after: self.PAGES[after], after="c"))
+
+        assert pages == [([5], None)]
+
+    def test_stops_fetching_when_closed(self):
+        """Test that abandoning the iterator stops the prefetcher"""
+        fetched = []
+
+        def fetch(after):
+            fetched.append(after)
+            return [after], (after or 0) + 1
+
+        pages = iter_pages(fetch, prefetch=1)
+        next(pages)
+        pages.close()
+        time.sleep(0.1)
+
+        assert len(fetched) <= 3
+
+
+def run_together(count, target):
+    threads = [threading.Thread(target=target) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+class TestSingleFlight:
+    """Test coalescing of concurrent calls by key"""
+
+    def test_identical_calls_share_one_result(self):
+        """Test that concurrent calls with the same key and token run once"""
+        flight = SingleFlight()
+        calls = []
+        results = []
+
+        def create():
+            calls.append(1)
+            time.sleep(0.1)
+            return "contact-1"
+
+        run_together(5, lambda: results.append(flight.do("a@example.com", create, token="same")))
+
+        assert len(calls) == 1
+        assert results == ["contact-1"] * 5
+        assert flight.shared == 4
+
+    def test_different_payloads_run_in_turn(self):
+        """Test that calls with another token wait for the in-flight call, then run"""
+        flight = SingleFlight()
+        running = []
+        overlaps = []
+
+        def make_call(token):
+            def call():
+                overlaps.append(len(running))
+                running.append(token)
+                time.sleep(0.05)
+                running.remove(token)
+                return token
+            return call
+
+        threads = [threading.Thread(target=flight.do, args=("key", make_call(token), token))
+                   for token in ("a", "b", "c")]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert overlaps == [0, 0, 0]
+
+    def test_exception_is_shared(self):
+        """Test that callers joining a failing call get its exception"""
+        flight = SingleFlight()
+        errors = []
+
+        def fail():
+            time.sleep(0.1)
+            raise ValueError("HubSpot rejected the contact")
+
+        def call():
+            with pytest.raises(ValueError):
+                flight.do("key", fail)
+            errors.append(1)
+
+        run_together(3, call)
+
+        assert len(errors) == 3
+
+
+class TestMicroBatcher:
+    """Test collecting concurrent lookups into one call"""
+
+    def test_concurrent_lookups_share_one_fetch(self):
+        """Test that keys requested within the window are fetched together"""
+        fetches = []
+
+        def fetch(keys):
+            fetches.append(sorted(keys))
+            return {key: key.upper() for key in keys if key != "missing"}
+
+        batcher = MicroBatcher(fetch, window=0.05)
+        results = {}
+        keys = ["a", "b", "c", "missing", "a"]
+        threads = [threading.Thread(target=lambda key=key: results.update({key: batcher.get(key)}))
+                   for key in keys]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert fetches == [["a", "b", "c", "missing"]]
+        assert results == {"a": "A", "b": "B", "c": "C", "missing": None}
+
+    def test_stored_exception_is_raised_to_its_caller(self):
+        """Test that a per-key failure is raised only for that key"""
+        batcher = MicroBatcher(lambda keys: {"bad": ValueError("lookup failed"), "good": 1}, window=0)
+
+        with pytest.raises(ValueError):
+            batcher.get("bad")
+        assert batcher.get("good") == 1
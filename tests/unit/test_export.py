@@ -0,0 +1,92 @@
+import io
+import gzip
+import json
+import pytest
+from app.routes import export
+from app.utils.concurrency import iter_pages
+from app.utils.streaming import JSONStreamError, iter_json_array, ndjson_line, gzip_chunks
+
+
+class FakeContactService:
+    PAGES = {
+        None: ([{"id": "1", "properties": {"email": "a@example.com", "firstname": "A"}}], "2"),
+        "2": ([{"id": "2", "properties": {"email": "b@example.com", "firstname": "B"}}], None),
+    }
+
+    def iter_contacts(self, page_size=100, after=None, properties=None, prefetch=1):
+        return iter_pages(lambda cursor: self.PAGES[cursor], after=after, prefetch=prefetch)
+
+
+@pytest.fixture
+def client(app, monkeypatch):
+    monkeypatch.setattr(export.services, "get", lambda name: FakeContactService())
+    return app.test_client()
+
+
+class TestStreaming:
+    """Test NDJSON and gzip stream encoding"""
+
+    def test_gzip_round_trip(self):
+        """Test that gzipped chunks decompress to the original lines"""
+        lines = [ndjson_line({"id": str(i)}) for i in range(3)]
+
+        compressed = b"".join(gzip_chunks(iter(lines)))
+
+        assert gzip.decompress(compressed) == b"".join(lines)
+
+    def test_json_array_parsed_across_chunks(self):
+        """Test that array items split across reads are decoded whole, numbers included"""
+        items = [{"email": "ada@example.com", "tags": ["a", "é"]}, 1234567, None, "x"]
+        body = json.dumps({"inputs": items, "dry_run": False}).encode()
+
+        assert list(iter_json_array(io.BytesIO(body), key="inputs", chunk_size=3)) == items
+
+    def test_numbers_parsed_one_byte_at_a_time(self):
+        """Test that a number cut off at a chunk boundary is not decoded early"""
+        body = json.dumps({"inputs": [None, 1.5e3, -12, 7e-2, {"amount": 2.25}], "limit": 1000}).encode()
+
+        assert list(iter_json_array(io.BytesIO(b'[null,  1.5e3]'), chunk_size=1)) == [None, 1500.0]
+        assert list(iter_json_array(io.BytesIO(body), key="inputs", chunk_size=1)) == \
+            [None, 1500.0, -12, 0.07, {"amount": 2.25}]
+
+    def test_json_array_errors(self):
+        """Test that a truncated or misplaced array raises JSONStreamError"""
+        with pytest.raises(JSONStreamError):
+            list(iter_json_array(io.BytesIO(b'[{"a": 1}, {"b"'), chunk_size=4))
+        with pytest.raises(JSONStreamError):
+            list(iter_json_array(io.BytesIO(b'{"other": 1, "inputs": []}'), key="inputs"))
+
+
+class TestExportRoute:
+    """Test the streaming export endpoint"""
+
+    def test_streams_all_pages(self, client):
+        """Test that every object is exported with a resume cursor between pages"""
+        response = client.get('/api/export/contacts', headers={"Accept-Encoding": "identity"})
+        lines = [json.loads(line) for line in response.data.splitlines()]
+
+        assert response.status_code == 200
+        assert response.mimetype == "application/x-ndjson"
+        assert [line.get("id") for line in lines] == ["1", None, "2"]
+        assert lines[1] == {"paging": {"next": {"after": "2"}}}
+
+    def test_projection_and_resume(self, client):
+        """Test that properties are projected and export resumes from the cursor"""
+        response = client.get('/api/export/contacts?properties=email&after=2',
+                              headers={"Accept-Encoding": "identity"})
+        lines = [json.loads(line) for line in response.data.splitlines()]
+
+        assert lines == [{"id": "2", "properties": {"email": "b@example.com"}}]
+
+    def test_gzip(self, client):
+        """Test that the export is gzipped when the client accepts it"""
+        response = client.get('/api/export/contacts', headers={"Accept-Encoding": "gzip"})
+
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert len(gzip.decompress(response.data).splitlines()) == 3
+
+    def test_unknown_object_type(self, client):
+        """Test that unknown object types return 404"""
+        response = client.get('/api/export/companies')
+
+        assert response.status_code == 404
@@ -0,0 +1,30 @@
+import socket
+import time
+import pytest
+import urllib3
+from app.services.http import GovernedPoolManager
+from app.services.resilience import HubSpotUnavailableError
+
+
+@pytest.fixture
+def silent_server():
+    """A listening socket that accepts connections and never answers."""
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(("127.0.0.1", 0))
+    server.listen(8)
+    yield f"http://127.0.0.1:{server.getsockname()[1]}"
+    server.close()
+
+
+class TestGovernedPoolManager:
+    """Test the pool shared by the SDK clients"""
+
+    def test_pool_timeout_applies_when_sdk_passes_none(self, silent_server):
+        """Test that a call made with timeout=None, as the SDK does, still times out"""
+        pool = GovernedPoolManager(timeout=urllib3.Timeout(connect=1, read=0.2), retries=False)
+        started = time.monotonic()
+
+        with pytest.raises(HubSpotUnavailableError):
+            pool.request("POST", f"{silent_server}/crm/v3/objects/contacts", body=b"{}", timeout=None)
+
+        assert time.monotonic() - started < 5
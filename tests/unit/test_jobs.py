@@ -0,0 +1,119 @@
+import time
+import pytest
+from types import SimpleNamespace
+from hubspot.crm.contacts import ApiException
+from hubspot.crm.tickets import ApiException as TicketApiException
+from app.config import Config
+from app.models import Job
+from app.services import jobs
+from app.services.jobs import claim_jobs, drain_jobs, enqueue_job
+from app.services.resilience import HubSpotUnavailableError
+from app.services.support_ticket_service import SupportTicketService
+
+CONTACT = {"properties": {
+    "email": "jones@example.com", "firstname": "Jones", "lastname": "Moore", "phone": "+1234567890"}}
+
+
+@pytest.fixture
+def jobs_db(db, monkeypatch):
+    monkeypatch.setattr(Config, "HUBSPOT_JOB_WORKERS", 0)
+    yield db
+    db.session.rollback()
+    Job.query.delete()
+    db.session.commit()
+
+
+def use_handler(monkeypatch, handler):
+    monkeypatch.setitem(jobs.JOB_HANDLERS, "contact", handler)
+
+
+class TestJobs:
+    """Test asynchronous create jobs"""
+
+    def test_respond_async_returns_202_and_job(self, client, jobs_db, monkeypatch):
+        """Test that Prefer: respond-async queues the request and the job reports its outcome"""
+        use_handler(monkeypatch, lambda payload: {"id": "42", "properties": payload["properties"]})
+
+        response = client.post("/api/create_contact", json=CONTACT, headers={"Prefer": "respond-async"})
+        assert response.status_code == 202
+        assert response.get_json()["status"] == "queued"
+
+        assert drain_jobs() == 1
+        job = client.get(response.headers["Location"]).get_json()
+        assert job["status"] == "succeeded"
+        assert job["result"]["id"] == "42"
+
+    def test_transient_failure_is_retried_later(self, jobs_db, monkeypatch):
+        """Test that HubSpot outages requeue the job with a delay"""
+        def unavailable(payload):
+            raise HubSpotUnavailableError("HubSpot unavailable")
+
+        use_handler(monkeypatch, unavailable)
+        job_id = enqueue_job("contact", CONTACT).id
+
+        assert drain_jobs() == 1
+        job = jobs_db.session.get(Job, job_id)
+        assert job.status == "queued"
+        assert job.attempts == 1
+        assert claim_jobs() == []
+
+    def test_rejected_payload_fails(self, jobs_db, monkeypatch):
+        """Test that a HubSpot 4xx fails the job without a retry"""
+        def rejected(payload):
+            raise ApiException(status=400, reason="Bad Request")
+
+        use_handler(monkeypatch, rejected)
+        job_id = enqueue_job("contact", CONTACT).id
+        drain_jobs()
+
+        job = jobs_db.session.get(Job, job_id)
+        assert job.status == "failed"
+        assert "status 400" in job.error
+
+    def test_ticket_server_error_is_retried(self, jobs_db, monkeypatch):
+        """Test that a HubSpot 5xx creating a ticket requeues the job instead of succeeding"""
+        def unavailable(ticket_data):
+            raise TicketApiException(status=503, reason="Service Unavailable")
+
+        service = SupportTicketService.__new__(SupportTicketService)
+        service.client = SimpleNamespace(crm=SimpleNamespace(tickets=SimpleNamespace(
+            basic_api=SimpleNamespace(create=unavailable))))
+        monkeypatch.setattr(jobs, "get_ticket_service", lambda: service)
+        job_id = enqueue_job("ticket", {"properties": {"subject": "Broken", "hs_pipeline_stage": "1"}}).id
+
+        assert drain_jobs() == 1
+        job = jobs_db.session.get(Job, job_id)
+        assert job.status == "queued"
+        assert "status 503" in job.error
+
+    def test_unknown_job_is_404(self, client, jobs_db):
+        """Test that polling an unknown job returns 404"""
+        assert client.get("/api/jobs/missing").status_code == 404
+
+
+class TestJobWorkers:
+    """Test the in-process job workers"""
+
+    def test_started_workers_drain_queued_jobs(self, app, jobs_db, monkeypatch):
+        """Test that workers started with the process run jobs queued before it, with no new request"""
+        use_handler(monkeypatch, lambda payload: {"id": "42"})
+        job_id = enqueue_job("contact", CONTACT).id
+        monkeypatch.setattr(Config, "HUBSPOT_JOB_WORKERS", 1)
+        monkeypatch.setattr(Config, "HUBSPOT_JOB_POLL_INTERVAL", 0.05)
+        monkeypatch.setattr(jobs, "_workers", None)
+
+        workers = jobs.start_workers(app)
+        try:
+            deadline = time.monotonic() + 5
+            while jobs_db.session.get(Job, job_id).status != "succeeded" and time.monotonic() < deadline:
+                jobs_db.session.expire_all()
+                time.sleep(0.05)
+        finally:
+            workers.stop()
+            workers.join()
+
+        assert jobs_db.session.get(Job, job_id).status == "succeeded"
+
+    def test_no_workers_when_disabled(self, app, jobs_db):
+        """Test that HUBSPOT_JOB_WORKERS=0 leaves the jobs to `flask process-jobs`"""
+        assert jobs.start_workers(app) is None
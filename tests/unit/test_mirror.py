@@ -0,0 +1,120 @@
+import pytest
+from types import SimpleNamespace
+from app.models import HubSpotAssociation, HubSpotDeal, SyncCheckpoint
+from app.services import mirror
+from app.services.mirror import MirrorSync, recent_objects
+from app.utils.concurrency import iter_pages
+
+
+def hubspot_deal(deal_id, name, modified):
+    return {"id": deal_id, "properties": {
+        "dealname": name, "amount": "250.50", "dealstage": "closedwon", "pipeline": "default",
+        "createdate": f"2026-01-0{deal_id[-1]}T10:00:00Z", "hs_lastmodifieddate": modified}}
+
+
+class FakeDealService:
+    base_url = "https://api.hubapi.com"
+
+    def __init__(self, pages, changes):
+        self.pages = pages
+        self.changes = changes
+        self.searches = []
+
+    def iter_deals(self, page_size=100, after=None, properties=None, prefetch=1):
+        return iter_pages(lambda cursor: self.pages[cursor], after=after, prefetch=prefetch)
+
+    def _make_request(self, method, url, data=None):
+        if url.endswith("/search"):
+            self.searches.append(data)
+            return SimpleNamespace(status_code=200, json=lambda: {"results": self.changes})
+        return SimpleNamespace(status_code=200, json=lambda: {"results": [
+            {"from": {"id": item["id"]}, "to": [{"toObjectId": 101}]} for item in data["inputs"]]})
+
+
+@pytest.fixture
+def mirror_db(db):
+    yield db
+    db.session.rollback()
+    for model in (HubSpotDeal, HubSpotAssociation, SyncCheckpoint):
+        model.query.delete()
+    db.session.commit()
+
+
+def use_service(monkeypatch, service):
+    monkeypatch.setattr(mirror.services, "get", lambda name: service)
+
+
+class TestMirrorSync:
+    """Test the HubSpot mirror sync engine"""
+
+    def test_backfill_then_incremental(self, mirror_db, monkeypatch):
+        """Test that a first sync backfills every page and later syncs pull only changes"""
+        service = FakeDealService(
+            pages={None: ([hubspot_deal("1", "First", "2026-01-01T10:00:00Z")], "2"),
+                   "2": ([hubspot_deal("2", "Second", "2026-01-02T10:00:00Z")], None)},
+            changes=[])
+        use_service(monkeypatch, service)
+
+        assert MirrorSync().sync(["deals"]) == {"deals": 2}
+
+        deal = mirror_db.session.get(HubSpotDeal, "1")
+        assert deal.dealname == "First"
+        assert str(deal.amount) == "250.50"
+        assert HubSpotAssociation.query.filter_by(from_id="1", to_type="contacts").count() == 1
+
+        checkpoint = mirror_db.session.get(SyncCheckpoint, "deals")
+        assert checkpoint.backfilled_at is not None
+        assert checkpoint.backfill_after is None
+
+        service.changes = [hubspot_deal("1", "First renamed", "2099-01-01T10:00:00Z")]
+        assert MirrorSync().sync(["deals"]) == {"deals": 1}
+
+        assert mirror_db.session.get(HubSpotDeal, "1").dealname == "First renamed"
+        filters = service.searches[-1]["filterGroups"][0]["filters"][0]
+        assert filters["propertyName"] == "hs_lastmodifieddate"
+        assert filters["operator"] == "GTE"
+        assert mirror_db.session.get(SyncCheckpoint, "deals").last_modified.year == 2099
+
+    def test_backfill_resumes_from_checkpoint(self, mirror_db, monkeypatch):
+        """Test that an interrupted backfill continues from its stored cursor"""
+        service = FakeDealService(
+            pages={"2": ([hubspot_deal("2", "Second", "2026-01-02T10:00:00Z")], None)},
+            changes=[])
+        use_service(monkeypatch, service)
+        mirror_db.session.add(SyncCheckpoint(object_type="deals", backfill_after="2"))
+        mirror_db.session.commit()
+
+        assert MirrorSync().sync(["deals"]) == {"deals": 1}
+        assert mirror_db.session.get(HubSpotDeal, "1") is None
+
+    def test_recent_objects_pages_newest_first(self, mirror_db, monkeypatch):
+        """Test that local reads page newest first with a keyset cursor"""
+        service = FakeDealService(
+            pages={None: ([hubspot_deal(str(i), f"Deal {i}", "2026-01-01T10:00:00Z")
+                           for i in range(1, 4)], None)},
+            changes=[])
+        use_service(monkeypatch, service)
+        MirrorSync().sync(["deals"])
+
+        first, after = recent_objects("deals", 2)
+        second, last = recent_objects("deals", 2, after)
+
+        assert [deal["id"] for deal in first] == ["3", "2"]
+        assert [deal["id"] for deal in second] == ["1"]
+        assert last is None
+
+    def test_remove_drops_rows_and_cached_ids(self, mirror_db, monkeypatch):
+        """Test that removing a deal deletes its row, associations and cached ID"""
+        service = FakeDealService(
+            pages={None: ([hubspot_deal("1", "First", "2026-01-01T10:00:00Z")], None)},
+            changes=[])
+        use_service(monkeypatch, service)
+        MirrorSync().sync(["deals"])
+        cache = mirror.get_cache("deal_ids")
+        cache.set(mirror.DealService.index_key("First", "default"), "1")
+
+        MirrorSync().remove({"deals": [1]})
+
+        assert mirror_db.session.get(HubSpotDeal, "1") is None
+        assert HubSpotAssociation.query.filter_by(from_id="1").count() == 0
+        assert cache.get(mirror.DealService.index_key("First", "default")) is None
@@ -0,0 +1,96 @@
+import pytest
+from unittest.mock import patch
+from app.services.rate_limit import TokenBucket, RateLimitGovernor, RateLimitExceeded
+
+
+class TestTokenBucket:
+    """Test the token bucket used to pace HubSpot calls"""
+
+    def test_burst_then_pacing(self):
+        """Test that calls beyond the burst are asked to wait"""
+        bucket = TokenBucket(limit=100, interval=10, burst=0.2, headroom=1)
+
+        waits = [bucket.reserve() for _ in range(20)]
+        assert all(wait == 0 for wait in waits)
+
+        # The next call has to wait for a refill at 8 calls per second
+        assert bucket.reserve() == pytest.approx(1 / 8, rel=0.1)
+
+    def test_pause(self):
+        """Test that a 429 pause holds callers back"""
+        bucket = TokenBucket(limit=100, interval=10)
+        bucket.pause(2)
+
+        assert bucket.reserve() >= 1.9
+
+
+class TestRateLimitGovernor:
+    """Test the HubSpot rate-limit governor"""
+
+    def make_governor(self):
+        return RateLimitGovernor(100, 10, 5, 1)
+
+    def test_oauth_is_not_governed(self):
+        """Test that token refreshes bypass the API budget"""
+        governor = self.make_governor()
+        governor.daily_remaining = 0
+
+        assert governor.reserve("https://api.hubapi.com/oauth/v1/token") == 0
+
+    def test_headers_update_budget(self):
+        """Test that rate-limit headers drive the window bucket"""
+        governor = self.make_governor()
+        governor.observe(
+            "https://api.hubapi.com/crm/v3/objects/contacts",
+            200,
+            {
+                "X-HubSpot-RateLimit-Max": "190",
+                "X-HubSpot-RateLimit-Remaining": "0",
+                "X-HubSpot-RateLimit-Interval-Milliseconds": "10000",
+                "X-HubSpot-RateLimit-Daily-Remaining": "5000",
+            }
+        )
+
+        assert governor.window.limit == 190
+        assert governor.daily_remaining == 5000
+        assert governor.reserve("https://api.hubapi.com/crm/v3/objects/contacts") > 0
+
+    def test_daily_limit_exhausted(self):
+        """Test that an exhausted daily budget fails fast"""
+        governor = self.make_governor()
+        governor.observe(
+            "https://api.hubapi.com/crm/v3/objects/deals",
+            200,
+            {"X-HubSpot-RateLimit-Daily-Remaining": "0"}
+        )
+
+        with pytest.raises(RateLimitExceeded):
+            governor.reserve("https://api.hubapi.com/crm/v3/objects/deals")
+
+    def test_daily_limit_resets_at_midnight(self):
+        """Test that an exhausted daily budget is released once the next day starts"""
+        governor = self.make_governor()
+        url = "https://api.hubapi.com/crm/v3/objects/deals"
+        evening = 1767300000  # 2026-01-01 20:40 UTC
+
+        with patch('app.services.rate_limit.time.time', return_value=evening):
+            governor.observe(url, 200, {"X-HubSpot-RateLimit-Daily-Remaining": "0"})
+            with pytest.raises(RateLimitExceeded) as excinfo:
+                governor.reserve(url)
+        assert excinfo.value.retry_after == 1767312000 - evening
+
+        with patch('app.services.rate_limit.time.time', return_value=1767312001):
+            assert governor.reserve(url) == 0
+        assert governor.daily_remaining is None
+
+    def test_search_uses_search_bucket(self):
+        """Test that a 429 on search pauses only search calls"""
+        governor = self.make_governor()
+        governor.observe(
+            "https://api.hubapi.com/crm/v3/objects/contacts/search",
+            429,
+            {"Retry-After": "1"}
+        )
+
+        assert governor.reserve("https://api.hubapi.com/crm/v3/objects/contacts/search") > 0
+        assert governor.reserve("https://api.hubapi.com/crm/v3/objects/contacts") == 0
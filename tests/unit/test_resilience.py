@@ -0,0 +1,104 @@
+import pytest
+from unittest.mock import patch
+from app.services import http
+from app.services.rate_limit import RateLimitGovernor
+from app.services.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    RetryPolicy,
+    endpoint_key,
+    is_idempotent,
+)
+
+
+class TestRetryPolicy:
+    """Test the jittered retry policy"""
+
+    def test_backoff_is_capped(self):
+        """Test that backoff never exceeds the maximum delay"""
+        policy = RetryPolicy(base_delay=1, max_delay=2)
+        assert all(policy.backoff(attempt) <= 2 for attempt in range(10))
+
+    def test_attempts_are_capped(self):
+        """Test that no delay is returned once attempts are used up"""
+        policy = RetryPolicy(max_attempts=3, deadline=60)
+        with patch('app.services.resilience.time.monotonic', return_value=100):
+            assert policy.next_delay(1, started=100, delay=0) == 0
+            assert policy.next_delay(2, started=100, delay=0) is None
+
+    def test_deadline(self):
+        """Test that retries stop at the deadline"""
+        policy = RetryPolicy(max_attempts=10, deadline=1)
+        with patch('app.services.resilience.time.monotonic', return_value=100):
+            assert policy.next_delay(0, started=99.5, delay=0.1) == 0.1
+            assert policy.next_delay(0, started=99.5, delay=1) is None
+
+    def test_idempotency(self):
+        """Test which calls are safe to repeat"""
+        base = "https://api.hubapi.com/crm/v3/objects/contacts"
+        assert is_idempotent("GET", base) is True
+        assert is_idempotent("PATCH", f"{base}/123") is True
+        assert is_idempotent("POST", f"{base}/search") is True
+        assert is_idempotent("POST", base) is False
+
+    def test_endpoint_key(self):
+        """Test that object IDs are collapsed in endpoint keys"""
+        key = endpoint_key("patch", "https://api.hubapi.com/crm/v3/objects/deals/42?x=1")
+        assert key == "PATCH /crm/v3/objects/deals/{id}"
+
+
+class TestCircuitBreaker:
+    """Test the per-endpoint circuit breaker"""
+
+    def test_opens_after_failures(self):
+        """Test that the breaker fails fast after repeated failures"""
+        breaker = CircuitBreaker("GET /x", failure_threshold=2, reset_timeout=30)
+        breaker.record_failure()
+        breaker.before_call()
+        breaker.record_failure()
+
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+
+    def test_half_open_probe(self):
+        """Test that one probe is let through after the reset timeout"""
+        breaker = CircuitBreaker("GET /x", failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+
+        breaker.before_call()
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_probe_that_raises_reports_failure(self, monkeypatch):
+        """Test that a probe failing with a non-transport error reopens the breaker instead of wedging it"""
+        breaker = CircuitBreaker("POST /crm/v3/objects/contacts", failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+        monkeypatch.setattr(http, "get_breaker", lambda endpoint: breaker)
+        monkeypatch.setattr(http, "get_governor", lambda: RateLimitGovernor(100, 10, 5, 1))
+
+        def send():
+            raise ValueError("bad response")
+
+        with pytest.raises(ValueError):
+            http.send_governed("POST", "https://api.hubapi.com/crm/v3/objects/contacts", {},
+                               send, lambda response: 200, lambda response: None)
+
+        assert breaker.state == CircuitBreaker.OPEN
+        breaker.before_call()
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+
+    def test_lost_probe_is_replaced(self):
+        """Test that a probe that never reports back is replaced after the reset timeout"""
+        breaker = CircuitBreaker("GET /x", failure_threshold=1, reset_timeout=30)
+        with patch('app.services.resilience.time.monotonic', return_value=100):
+            breaker.record_failure()
+        with patch('app.services.resilience.time.monotonic', return_value=131):
+            breaker.before_call()
+            with pytest.raises(CircuitOpenError):
+                breaker.before_call()
+        with patch('app.services.resilience.time.monotonic', return_value=162):
+            breaker.before_call()
+
+        assert breaker.state == CircuitBreaker.HALF_OPEN
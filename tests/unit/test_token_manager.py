@@ -0,0 +1,60 @@
+import threading
+import time
+from unittest.mock import MagicMock, patch
+from app.services.token_manager import TokenManager
+
+
+def token_response(token, expires_in=1800):
+    response = MagicMock()
+    response.status_code = 200
+    response.json.return_value = {"access_token": token, "expires_in": expires_in}
+    return response
+
+
+class TestTokenManager:
+    """Test the shared OAuth token manager"""
+
+    @patch('app.services.token_manager.get_session')
+    def test_token_is_cached(self, mock_get_session):
+        """Test that a valid token is reused without another refresh"""
+        mock_get_session.return_value.post.return_value = token_response("token-1234567890")
+        manager = TokenManager("id", "secret", "refresh")
+
+        assert manager.get_token() == "token-1234567890"
+        assert manager.get_token() == "token-1234567890"
+        assert mock_get_session.return_value.post.call_count == 1
+
+    @patch('app.services.token_manager.get_session')
+    def test_single_flight_refresh(self, mock_get_session):
+        """Test that concurrent callers share a single refresh"""
+        def slow_post(*args, **kwargs):
+            time.sleep(0.05)
+            return token_response("token-1234567890")
+
+        mock_get_session.return_value.post.side_effect = slow_post
+        manager = TokenManager("id", "secret", "refresh")
+
+        threads = [threading.Thread(target=manager.get_token) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert mock_get_session.return_value.post.call_count == 1
+
+    @patch('app.services.token_manager.get_session')
+    def test_refresh_updates_bound_clients(self, mock_get_session):
+        """Test that bound SDK clients receive refreshed tokens"""
+        mock_get_session.return_value.post.side_effect = [
+            token_response("token-aaaaaaaaaa"),
+            token_response("token-bbbbbbbbbb"),
+        ]
+        manager = TokenManager("id", "secret", "refresh")
+
+        client = MagicMock()
+        client.config = {}
+        manager.bind(client)
+        assert client.config["access_token"] == "token-aaaaaaaaaa"
+
+        manager.invalidate("token-aaaaaaaaaa")
+        assert client.config["access_token"] == "token-bbbbbbbbbb"
@@ -1,5 +1,8 @@
 import pytest
 from app.validations.base import Validator, ValidationError
+from app.validations.contact_validator import ContactValidator
+from app.validations.deal_validator import DealValidator
+from app.validations.schema import Schema
 from app.validations.user_validator import UserValidator
 
 
@@ -193,3 +196,60 @@ class TestUserValidator:
             UserValidator.validate_login(data)
         
         assert 'password' in excinfo.value.errors
+
+
+class TestSchema:
+    """Test compiled schema validation"""
+
+    def test_all_errors_are_collected(self):
+        """Test that one pass reports the first failure of every field"""
+        data = {"properties": {"email": "a", "firstname": "A", "phone": 12345678}}
+
+        with pytest.raises(ValidationError) as excinfo:
+            ContactValidator.validate_registration(data)
+
+        assert set(excinfo.value.errors) == {"email", "firstname", "lastname", "phone"}
+        assert excinfo.value.errors["phone"] == "Phone must be a string"
+
+    def test_nested_fields_skipped_without_their_object(self):
+        """Test that a missing object is reported once, not once per nested field"""
+        with pytest.raises(ValidationError) as excinfo:
+            DealValidator.validate_create_deal({})
+
+        assert excinfo.value.errors == {"properties": "Missing 'properties' in payload"}
+
+    def test_rules_apply_to_properties(self):
+        """Test that deal rules check the fields inside 'properties'"""
+        data = {"properties": {"dealname": "AB", "amount": -5, "dealstage": "appointmentscheduled",
+                               "contact_email": "ada@example.com", "pipeline": "default"}}
+
+        with pytest.raises(ValidationError) as excinfo:
+            DealValidator.validate_create_deal(data)
+
+        assert set(excinfo.value.errors) == {"dealname", "amount"}
+
+    def test_required_unless_and_extend(self):
+        """Test that a sibling can stand in for a required field, and extended schemas override rules"""
+        schema = Schema({"contact_id": {"required": True, "required_unless": "contact_email"},
+                         "contact_email": {"email": True}})
+        strict = schema.extend({"contact_id": {"required_unless": None}})
+
+        assert schema.validate({"contact_email": "ada@example.com"}) is True
+        assert strict.errors({"contact_email": "ada@example.com"}) == {"contact_id": "contact_id is required"}
+        assert schema.errors({}) == {"contact_id": "contact_id is required"}
+
+    def test_validate_many_matches_item_by_item(self):
+        """Test that bulk validation reports the same errors as validating each item, by index"""
+        items = [
+            {"properties": {"email": "ada@example.com", "firstname": "Ada", "lastname": "Lovelace",
+                            "phone": "+1234567890"}},
+            {"properties": {"email": "not-an-email", "firstname": "A", "phone": 12345678}},
+            "oops",
+            {},
+        ]
+        schema = ContactValidator.batch_item_schema
+
+        valid, errors = schema.validate_many(items)
+
+        assert valid == [0]
+        assert errors == {1: schema.errors(items[1]), 2: "Each input must be an object", 3: schema.errors({})}
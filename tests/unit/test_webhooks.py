@@ -0,0 +1,125 @@
+import json
+import time
+import base64
+import hashlib
+import hmac
+from app.config import Config
+from app.routes import webhooks as webhook_routes
+from app.services import webhooks
+from app.services.webhooks import WebhookProcessor, plan_changes, verify_signature
+
+SECRET = "client-secret"
+URL = "http://localhost/api/webhooks/hubspot"
+
+
+def sign(body, timestamp, url=URL, secret=SECRET):
+    message = f"POST{url}{body}{timestamp}".encode()
+    return base64.b64encode(hmac.new(secret.encode(), message, hashlib.sha256).digest()).decode()
+
+
+def signed_headers(body, timestamp=None):
+    timestamp = str(timestamp or int(time.time() * 1000))
+    return {"X-HubSpot-Signature-v3": sign(body, timestamp), "X-HubSpot-Request-Timestamp": timestamp}
+
+
+class FakeSync:
+    def __init__(self):
+        self.refreshed = []
+        self.removed = []
+
+    def refresh(self, object_types_ids):
+        self.refreshed.append(object_types_ids)
+
+    def remove(self, object_types_ids):
+        self.removed.append(object_types_ids)
+
+
+class TestWebhookSignature:
+    """Test HubSpot v3 webhook signature checks"""
+
+    def test_valid_signature(self):
+        """Test that a correctly signed, recent request is accepted"""
+        timestamp = str(int(time.time() * 1000))
+        assert verify_signature(SECRET, "POST", URL, b"[]", sign("[]", timestamp), timestamp)
+
+    def test_tampered_body_rejected(self):
+        """Test that a signature over a different body is rejected"""
+        timestamp = str(int(time.time() * 1000))
+        assert not verify_signature(SECRET, "POST", URL, b"[{}]", sign("[]", timestamp), timestamp)
+
+    def test_stale_timestamp_rejected(self):
+        """Test that requests older than the allowed age are rejected"""
+        timestamp = str(int((time.time() - 600) * 1000))
+        assert not verify_signature(SECRET, "POST", URL, b"[]", sign("[]", timestamp), timestamp)
+
+
+class TestPlanChanges:
+    """Test how webhook events map to mirror changes"""
+
+    def test_latest_event_wins(self):
+        """Test that an object created then deleted in one batch is only deleted"""
+        refresh, remove = plan_changes([
+            {"subscriptionType": "deal.creation", "objectId": 7, "occurredAt": 1},
+            {"subscriptionType": "deal.deletion", "objectId": 7, "occurredAt": 2},
+            {"subscriptionType": "contact.propertyChange", "objectId": 3, "occurredAt": 1},
+        ])
+
+        assert refresh == {"contacts": ["3"]}
+        assert remove == {"deals": ["7"]}
+
+    def test_merge_and_association_change(self):
+        """Test that merges delete the merged objects and association changes refresh both sides"""
+        refresh, remove = plan_changes([
+            {"subscriptionType": "contact.merge", "primaryObjectId": 1,
+             "mergedObjectIds": [1, 2], "occurredAt": 1},
+            {"subscriptionType": "deal.associationChange", "fromObjectId": 5,
+             "toObjectId": 9, "associationType": "DEAL_TO_TICKET", "occurredAt": 1},
+        ])
+
+        assert refresh == {"contacts": ["1"], "deals": ["5"], "tickets": ["9"]}
+        assert remove == {"contacts": ["2"]}
+
+
+class TestWebhookProcessor:
+    """Test the webhook event queue"""
+
+    def test_duplicate_events_applied_once(self, monkeypatch):
+        """Test that redelivered events are skipped by event ID"""
+        sync = FakeSync()
+        monkeypatch.setattr(webhooks, "MirrorSync", lambda: sync)
+        processor = WebhookProcessor(app=None)
+        event = {"eventId": 1, "subscriptionType": "contact.creation", "objectId": 3}
+
+        processor.apply([event])
+        processor.apply([event])
+
+        assert sync.refreshed == [{"contacts": ["3"]}]
+        assert processor.stats()["duplicates"] == 1
+
+    def test_route_queues_signed_events(self, client, monkeypatch):
+        """Test that signed events are queued and answered with 200"""
+        processor = WebhookProcessor(app=None, maxsize=10)
+        monkeypatch.setattr(processor, "_start", lambda: None)
+        monkeypatch.setattr(webhook_routes, "get_processor", lambda app: processor)
+        monkeypatch.setattr(Config, "HUBSPOT_CLIENT_SECRET", SECRET)
+        body = json.dumps([{"eventId": 1, "subscriptionType": "deal.creation", "objectId": 7}])
+
+        response = client.post("/api/webhooks/hubspot", data=body, headers=signed_headers(body))
+
+        assert response.status_code == 200
+        assert processor.events.qsize() == 1
+
+    def test_route_rejects_bad_signature_and_full_queue(self, client, monkeypatch):
+        """Test that unsigned requests get 401 and a full queue gets 503 with Retry-After"""
+        processor = WebhookProcessor(app=None, maxsize=1)
+        monkeypatch.setattr(processor, "_start", lambda: None)
+        monkeypatch.setattr(webhook_routes, "get_processor", lambda app: processor)
+        monkeypatch.setattr(Config, "HUBSPOT_CLIENT_SECRET", SECRET)
+        body = json.dumps([{"eventId": 1}, {"eventId": 2}])
+
+        unsigned = client.post("/api/webhooks/hubspot", data=body)
+        full = client.post("/api/webhooks/hubspot", data=body, headers=signed_headers(body))
+
+        assert unsigned.status_code == 401
+        assert full.status_code == 503
+        assert full.headers["Retry-After"] == "10"